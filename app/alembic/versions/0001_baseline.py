@@ -0,0 +1,176 @@
+"""baseline
+
+Schema created by `Base.metadata.create_all` before migrations were
+introduced. Databases created that way are stamped at this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-12-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stock_ticker",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("ticker", sa.String(), nullable=False, comment="ticker of the stock"),
+        sa.Column("name", sa.String(), nullable=False, comment="name of the stock."),
+        sa.Column(
+            "exchange",
+            sa.Enum("NASDAQ", "NSE", name="stockexchanges"),
+            nullable=False,
+            comment="Stock exchange where the stock is present.",
+        ),
+        sa.Column(
+            "created_at", sa.TIMESTAMP(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.TIMESTAMP(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "ticker", "name", "exchange", name="_stock_ticker_uk_ticker_name_exchange"
+        ),
+    )
+    op.create_index("ix_stock_ticker_id", "stock_ticker", ["id"])
+
+    op.create_table(
+        "stock_index",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False, comment="Name of the Index."),
+        sa.Column(
+            "strategy",
+            sa.Enum("MARKET_CAP", name="indexstrategy"),
+            server_default="MARKET_CAP",
+            nullable=False,
+            comment="Strategy used to add the stock in the index",
+        ),
+        sa.Column(
+            "performance_calculation",
+            sa.Enum("EQUAL_WEIGHTED", name="performancecalculation"),
+            server_default="EQUAL_WEIGHTED",
+            nullable=False,
+            comment="Performance calculation of index",
+        ),
+        sa.Column("ticker_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_index("ix_stock_index_id", "stock_index", ["id"])
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum(
+                "INITIATED", "IN_PROGRESS", "FAILED", "COMPLETED", name="taskstatus"
+            ),
+            server_default="INITIATED",
+            nullable=False,
+        ),
+        sa.Column(
+            "task_type",
+            sa.Enum(
+                "TICKER_CREATOR",
+                "TICKER_PRICE_FETCHER",
+                "INDEX_CREATOR",
+                name="tasktype",
+            ),
+            server_default="TICKER_CREATOR",
+            nullable=False,
+        ),
+        sa.Column("run_date", sa.Date(), nullable=True),
+        sa.Column("depends_on", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_at", sa.TIMESTAMP(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.TIMESTAMP(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["depends_on"], ["tasks.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+
+    op.create_table(
+        "stock_index_ticker",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "date", sa.Date(), nullable=False, comment="Stock Index ticker date"
+        ),
+        sa.Column("stock_ticker_id", sa.Integer(), nullable=False),
+        sa.Column("stock_index_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["stock_ticker_id"], ["stock_ticker.id"]),
+        sa.ForeignKeyConstraint(["stock_index_id"], ["stock_index.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_stock_index_ticker_id", "stock_index_ticker", ["id"])
+
+    op.create_table(
+        "index_performance",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("stock_index_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "date", sa.Date(), nullable=False, comment="Index Performance date"
+        ),
+        sa.Column(
+            "value",
+            sa.Float(),
+            nullable=False,
+            comment="Index performance value for a date",
+        ),
+        sa.ForeignKeyConstraint(["stock_index_id"], ["stock_index.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_index_performance_id", "index_performance", ["id"])
+
+    op.create_table(
+        "daily_prices_all",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("stock_ticker_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "date", sa.Date(), nullable=False, comment="Price of the stock at a date"
+        ),
+        sa.Column(
+            "close_price", sa.Float(), nullable=False, comment="Close price of the stock."
+        ),
+        sa.Column(
+            "market_cap", sa.Float(), nullable=False, comment="Market cap of the stock."
+        ),
+        sa.ForeignKeyConstraint(["stock_ticker_id"], ["stock_ticker.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_daily_prices_all_id", "daily_prices_all", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_prices_all_id", table_name="daily_prices_all")
+    op.drop_table("daily_prices_all")
+    op.drop_index("ix_index_performance_id", table_name="index_performance")
+    op.drop_table("index_performance")
+    op.drop_index("ix_stock_index_ticker_id", table_name="stock_index_ticker")
+    op.drop_table("stock_index_ticker")
+    op.drop_index("ix_tasks_id", table_name="tasks")
+    op.drop_table("tasks")
+    op.drop_index("ix_stock_index_id", table_name="stock_index")
+    op.drop_table("stock_index")
+    op.drop_index("ix_stock_ticker_id", table_name="stock_ticker")
+    op.drop_table("stock_ticker")
+    sa.Enum(name="tasktype").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="taskstatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="performancecalculation").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="indexstrategy").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="stockexchanges").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,303 @@
+"""price ingestion and index build tables
+
+Catches the baseline up with the tables and constraints added for price
+watermarks, backfills, cached fundamentals, chain-linked index levels and
+dirty index dates. Steps already applied by an earlier `create_all` are
+skipped, and duplicate rows are dropped before unique constraints are added.
+Index levels stored before divisors existed are marked dirty so the
+INDEX_RECOMPUTE task rebuilds them as chain-linked levels.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-12-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TASK_STATUS_VALUES = ["INITIATED", "IN_PROGRESS", "FAILED", "COMPLETED"]
+# The type already exists on PostgreSQL; only reference it.
+TASK_STATUS = sa.Enum(*TASK_STATUS_VALUES, name="taskstatus").with_variant(
+    postgresql.ENUM(*TASK_STATUS_VALUES, name="taskstatus", create_type=False),
+    "postgresql",
+)
+
+NEW_ENUM_VALUES = {
+    "tasktype": ["PRICE_BACKFILL", "INDEX_RECOMPUTE"],
+    "performancecalculation": ["MARKET_CAP_WEIGHTED"],
+}
+
+UNIQUE_CONSTRAINTS = [
+    (
+        "daily_prices_all",
+        "_daily_prices_uk_stock_ticker_id_date",
+        ["stock_ticker_id", "date"],
+    ),
+    (
+        "stock_index_ticker",
+        "_stock_index_ticker_uk_stock_index_id_date_stock_ticker_id",
+        ["stock_index_id", "date", "stock_ticker_id"],
+    ),
+    (
+        "index_performance",
+        "_index_performance_uk_stock_index_id_date",
+        ["stock_index_id", "date"],
+    ),
+]
+
+
+def _has_table(table_name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns(table_name)
+    return any(column["name"] == column_name for column in columns)
+
+
+def _has_unique_constraint(table_name: str, columns: list[str]) -> bool:
+    constraints = sa.inspect(op.get_bind()).get_unique_constraints(table_name)
+    return any(constraint["column_names"] == columns for constraint in constraints)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        for enum_name, values in NEW_ENUM_VALUES.items():
+            for value in values:
+                op.execute(f"ALTER TYPE {enum_name} ADD VALUE IF NOT EXISTS '{value}'")
+    else:
+        # Non-native enums are VARCHARs sized to their longest value.
+        with op.batch_alter_table("stock_index") as batch_op:
+            batch_op.alter_column(
+                "performance_calculation",
+                existing_type=sa.Enum("EQUAL_WEIGHTED", name="performancecalculation"),
+                type_=sa.Enum(
+                    "EQUAL_WEIGHTED",
+                    "MARKET_CAP_WEIGHTED",
+                    name="performancecalculation",
+                ),
+                existing_nullable=False,
+                existing_server_default="EQUAL_WEIGHTED",
+            )
+
+    for column_name, comment in [
+        ("start_date", "First date of a date range task."),
+        ("end_date", "Last date of a date range task."),
+    ]:
+        if not _has_column("tasks", column_name):
+            with op.batch_alter_table("tasks") as batch_op:
+                batch_op.add_column(
+                    sa.Column(column_name, sa.Date(), nullable=True, comment=comment)
+                )
+    if not _has_column("index_performance", "divisor"):
+        with op.batch_alter_table("index_performance") as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    "divisor",
+                    sa.Float(),
+                    nullable=True,
+                    comment="Divisor after the close of the date; the next level "
+                    "is the value of the held constituents divided by it.",
+                )
+            )
+
+    for table_name, constraint_name, columns in UNIQUE_CONSTRAINTS:
+        if _has_unique_constraint(table_name, columns):
+            continue
+        key = ", ".join(columns)
+        op.execute(
+            f"DELETE FROM {table_name} WHERE id NOT IN "
+            f"(SELECT MAX(id) FROM {table_name} GROUP BY {key})"
+        )
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.create_unique_constraint(constraint_name, columns)
+
+    if not _has_table("price_watermark"):
+        op.create_table(
+            "price_watermark",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("stock_ticker_id", sa.Integer(), nullable=False),
+            sa.Column(
+                "first_date",
+                sa.Date(),
+                nullable=False,
+                comment="First date stored for the ticker",
+            ),
+            sa.Column(
+                "last_date",
+                sa.Date(),
+                nullable=False,
+                comment="Last date with provider data for the ticker",
+            ),
+            sa.ForeignKeyConstraint(["stock_ticker_id"], ["stock_ticker.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("stock_ticker_id"),
+        )
+        op.create_index("ix_price_watermark_id", "price_watermark", ["id"])
+
+    if not _has_table("price_gap"):
+        op.create_table(
+            "price_gap",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("stock_ticker_id", sa.Integer(), nullable=False),
+            sa.Column(
+                "start_date", sa.Date(), nullable=False, comment="First missing date"
+            ),
+            sa.Column(
+                "end_date", sa.Date(), nullable=False, comment="Last missing date"
+            ),
+            sa.ForeignKeyConstraint(["stock_ticker_id"], ["stock_ticker.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "stock_ticker_id",
+                "start_date",
+                name="_price_gap_uk_stock_ticker_id_start_date",
+            ),
+        )
+        op.create_index("ix_price_gap_id", "price_gap", ["id"])
+
+    if not _has_table("price_backfill_chunk"):
+        op.create_table(
+            "price_backfill_chunk",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("task_id", sa.Integer(), nullable=False),
+            sa.Column(
+                "stock_ticker_ids",
+                sa.JSON(),
+                nullable=False,
+                comment="Stock ticker ids fetched by the chunk.",
+            ),
+            sa.Column(
+                "start_date",
+                sa.Date(),
+                nullable=False,
+                comment="First date of the chunk",
+            ),
+            sa.Column(
+                "end_date", sa.Date(), nullable=False, comment="Last date of the chunk"
+            ),
+            sa.Column(
+                "status",
+                TASK_STATUS,
+                server_default="INITIATED",
+                nullable=False,
+            ),
+            sa.Column(
+                "rows_written", sa.Integer(), server_default="0", nullable=False
+            ),
+            sa.ForeignKeyConstraint(["task_id"], ["tasks.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_price_backfill_chunk_id", "price_backfill_chunk", ["id"])
+        op.create_index(
+            "ix_price_backfill_chunk_task_id", "price_backfill_chunk", ["task_id"]
+        )
+
+    if not _has_table("ticker_fundamentals"):
+        op.create_table(
+            "ticker_fundamentals",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("stock_ticker_id", sa.Integer(), nullable=False),
+            sa.Column(
+                "shares_outstanding",
+                sa.Float(),
+                nullable=False,
+                comment="Shares outstanding of the stock.",
+            ),
+            sa.Column(
+                "source",
+                sa.Enum(
+                    "MARKET_CAP_RATIO",
+                    "INCOME_STATEMENT",
+                    "FIXTURE",
+                    name="sharessource",
+                ),
+                nullable=False,
+                comment="Where the shares outstanding figure came from.",
+            ),
+            sa.Column(
+                "as_of_date",
+                sa.Date(),
+                nullable=False,
+                comment="Date the shares outstanding figure is for.",
+            ),
+            sa.Column(
+                "reported_quarter",
+                sa.Date(),
+                nullable=True,
+                comment="Latest reported quarter end at fetch time.",
+            ),
+            sa.Column(
+                "fetched_at",
+                sa.Date(),
+                nullable=False,
+                comment="Date the figure was fetched from the provider.",
+            ),
+            sa.ForeignKeyConstraint(["stock_ticker_id"], ["stock_ticker.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("stock_ticker_id"),
+        )
+        op.create_index("ix_ticker_fundamentals_id", "ticker_fundamentals", ["id"])
+
+    if not _has_table("index_dirty_date"):
+        op.create_table(
+            "index_dirty_date",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("stock_index_id", sa.Integer(), nullable=False),
+            sa.Column(
+                "date", sa.Date(), nullable=False, comment="Date with changed prices"
+            ),
+            sa.Column(
+                "marked_at",
+                sa.TIMESTAMP(),
+                server_default=sa.func.now(),
+                nullable=False,
+            ),
+            sa.ForeignKeyConstraint(["stock_index_id"], ["stock_index.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "stock_index_id",
+                "date",
+                name="_index_dirty_date_uk_stock_index_id_date",
+            ),
+        )
+        op.create_index("ix_index_dirty_date_id", "index_dirty_date", ["id"])
+        op.execute(
+            "INSERT INTO index_dirty_date (stock_index_id, date) "
+            "SELECT DISTINCT stock_index_id, date FROM index_performance "
+            "WHERE divisor IS NULL"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_index_dirty_date_id", table_name="index_dirty_date")
+    op.drop_table("index_dirty_date")
+    op.drop_index("ix_ticker_fundamentals_id", table_name="ticker_fundamentals")
+    op.drop_table("ticker_fundamentals")
+    sa.Enum(name="sharessource").drop(op.get_bind(), checkfirst=True)
+    op.drop_index("ix_price_backfill_chunk_task_id", table_name="price_backfill_chunk")
+    op.drop_index("ix_price_backfill_chunk_id", table_name="price_backfill_chunk")
+    op.drop_table("price_backfill_chunk")
+    op.drop_index("ix_price_gap_id", table_name="price_gap")
+    op.drop_table("price_gap")
+    op.drop_index("ix_price_watermark_id", table_name="price_watermark")
+    op.drop_table("price_watermark")
+
+    for table_name, constraint_name, _ in reversed(UNIQUE_CONSTRAINTS):
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_constraint(constraint_name, type_="unique")
+    with op.batch_alter_table("index_performance") as batch_op:
+        batch_op.drop_column("divisor")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("end_date")
+        batch_op.drop_column("start_date")
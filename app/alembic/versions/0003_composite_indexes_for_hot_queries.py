@@ -0,0 +1,36 @@
+"""composite indexes for hot queries
+
+Index builds and the price endpoints read `daily_prices_all` by date range
+and rank each date by market cap, so prices get a (date, market_cap) index.
+Composition and performance reads filter `stock_index_ticker` and
+`index_performance` by stock_index_id and date; the unique constraints added
+in 0002 already lead with those columns and serve as their indexes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-01-06 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_daily_prices_all_date_market_cap",
+        "daily_prices_all",
+        ["date", "market_cap"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_prices_all_date_market_cap", table_name="daily_prices_all")
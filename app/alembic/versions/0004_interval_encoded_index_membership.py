@@ -0,0 +1,213 @@
+"""interval encoded index membership
+
+Replaces the one-row-per-ticker-per-day `stock_index_ticker` table with
+`stock_index_membership` intervals `[valid_from, valid_to)` over the dates an
+index was built, opened and closed only when the composition changes. The
+stored daily compositions are converted into intervals before the old table
+is dropped; a ticker still in the last stored composition keeps an open
+interval.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-01-13 00:00:00.000000
+
+"""
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STOCK_INDEX_TICKER = sa.table(
+    "stock_index_ticker",
+    sa.column("id", sa.Integer),
+    sa.column("date", sa.Date),
+    sa.column("stock_ticker_id", sa.Integer),
+    sa.column("stock_index_id", sa.Integer),
+)
+STOCK_INDEX_MEMBERSHIP = sa.table(
+    "stock_index_membership",
+    sa.column("stock_index_id", sa.Integer),
+    sa.column("stock_ticker_id", sa.Integer),
+    sa.column("valid_from", sa.Date),
+    sa.column("valid_to", sa.Date),
+)
+INDEX_PERFORMANCE = sa.table(
+    "index_performance",
+    sa.column("stock_index_id", sa.Integer),
+    sa.column("date", sa.Date),
+)
+
+
+def _create_stock_index_membership() -> None:
+    op.create_table(
+        "stock_index_membership",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("stock_index_id", sa.Integer(), nullable=False),
+        sa.Column("stock_ticker_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "valid_from",
+            sa.Date(),
+            nullable=False,
+            comment="First built date the ticker is a member",
+        ),
+        sa.Column(
+            "valid_to",
+            sa.Date(),
+            nullable=True,
+            comment="First built date the ticker is no longer a member; null "
+            "while it still is.",
+        ),
+        sa.ForeignKeyConstraint(["stock_index_id"], ["stock_index.id"]),
+        sa.ForeignKeyConstraint(["stock_ticker_id"], ["stock_ticker.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "stock_index_id",
+            "stock_ticker_id",
+            "valid_from",
+            name="_stock_index_membership_uk_index_ticker_valid_from",
+        ),
+    )
+    op.create_index("ix_stock_index_membership_id", "stock_index_membership", ["id"])
+    op.create_index(
+        "ix_stock_index_membership_stock_index_id_valid_from",
+        "stock_index_membership",
+        ["stock_index_id", "valid_from"],
+    )
+
+
+def _create_stock_index_ticker() -> None:
+    op.create_table(
+        "stock_index_ticker",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column(
+            "date", sa.Date(), nullable=False, comment="Stock Index ticker date"
+        ),
+        sa.Column("stock_ticker_id", sa.Integer(), nullable=False),
+        sa.Column("stock_index_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["stock_index_id"], ["stock_index.id"]),
+        sa.ForeignKeyConstraint(["stock_ticker_id"], ["stock_ticker.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "stock_index_id",
+            "date",
+            "stock_ticker_id",
+            name="_stock_index_ticker_uk_stock_index_id_date_stock_ticker_id",
+        ),
+    )
+    op.create_index("ix_stock_index_ticker_id", "stock_index_ticker", ["id"])
+
+
+def upgrade() -> None:
+    _create_stock_index_membership()
+
+    connection = op.get_bind()
+    built_dates: dict[int, list] = defaultdict(list)
+    for stock_index_id, built_date in connection.execute(
+        sa.select(STOCK_INDEX_TICKER.c.stock_index_id, STOCK_INDEX_TICKER.c.date)
+        .distinct()
+        .order_by(STOCK_INDEX_TICKER.c.stock_index_id, STOCK_INDEX_TICKER.c.date)
+    ):
+        built_dates[stock_index_id].append(built_date)
+    positions = {
+        stock_index_id: {
+            built_date: position for position, built_date in enumerate(dates)
+        }
+        for stock_index_id, dates in built_dates.items()
+    }
+
+    # A ticker's run of consecutive built dates becomes one interval, closed
+    # on the built date following the run.
+    records: list[dict] = []
+    run: tuple | None = None
+
+    def close_run():
+        stock_index_id, stock_ticker_id, valid_from, last_position = run
+        dates = built_dates[stock_index_id]
+        records.append(
+            {
+                "stock_index_id": stock_index_id,
+                "stock_ticker_id": stock_ticker_id,
+                "valid_from": valid_from,
+                "valid_to": dates[last_position + 1]
+                if last_position + 1 < len(dates)
+                else None,
+            }
+        )
+
+    for stock_index_id, stock_ticker_id, member_date in connection.execute(
+        sa.select(
+            STOCK_INDEX_TICKER.c.stock_index_id,
+            STOCK_INDEX_TICKER.c.stock_ticker_id,
+            STOCK_INDEX_TICKER.c.date,
+        ).order_by(
+            STOCK_INDEX_TICKER.c.stock_index_id,
+            STOCK_INDEX_TICKER.c.stock_ticker_id,
+            STOCK_INDEX_TICKER.c.date,
+        )
+    ):
+        position = positions[stock_index_id][member_date]
+        if (
+            run is not None
+            and run[:2] == (stock_index_id, stock_ticker_id)
+            and run[3] + 1 == position
+        ):
+            run = (*run[:3], position)
+            continue
+        if run is not None:
+            close_run()
+        run = (stock_index_id, stock_ticker_id, member_date, position)
+    if run is not None:
+        close_run()
+    if records:
+        op.bulk_insert(STOCK_INDEX_MEMBERSHIP, records)
+
+    op.drop_index("ix_stock_index_ticker_id", table_name="stock_index_ticker")
+    op.drop_table("stock_index_ticker")
+
+
+def downgrade() -> None:
+    _create_stock_index_ticker()
+
+    connection = op.get_bind()
+    built_dates: dict[int, list] = defaultdict(list)
+    for stock_index_id, built_date in connection.execute(
+        sa.select(INDEX_PERFORMANCE.c.stock_index_id, INDEX_PERFORMANCE.c.date)
+        .distinct()
+        .order_by(INDEX_PERFORMANCE.c.stock_index_id, INDEX_PERFORMANCE.c.date)
+    ):
+        built_dates[stock_index_id].append(built_date)
+
+    records = [
+        {
+            "stock_index_id": stock_index_id,
+            "stock_ticker_id": stock_ticker_id,
+            "date": built_date,
+        }
+        for stock_index_id, stock_ticker_id, valid_from, valid_to in connection.execute(
+            sa.select(
+                STOCK_INDEX_MEMBERSHIP.c.stock_index_id,
+                STOCK_INDEX_MEMBERSHIP.c.stock_ticker_id,
+                STOCK_INDEX_MEMBERSHIP.c.valid_from,
+                STOCK_INDEX_MEMBERSHIP.c.valid_to,
+            )
+        )
+        for built_date in built_dates[stock_index_id]
+        if valid_from <= built_date and (valid_to is None or built_date < valid_to)
+    ]
+    if records:
+        op.bulk_insert(STOCK_INDEX_TICKER, records)
+
+    op.drop_index(
+        "ix_stock_index_membership_stock_index_id_valid_from",
+        table_name="stock_index_membership",
+    )
+    op.drop_index("ix_stock_index_membership_id", table_name="stock_index_membership")
+    op.drop_table("stock_index_membership")
@@ -0,0 +1,56 @@
+"""stock index rebalance policy
+
+Adds the rebalance policy and threshold buffer of a stock index. Existing
+indexes keep rebalancing daily.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-01-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REBALANCE_POLICY = sa.Enum(
+    "DAILY", "WEEKLY", "MONTHLY", "THRESHOLD", name="rebalancepolicy"
+)
+
+
+def upgrade() -> None:
+    REBALANCE_POLICY.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table("stock_index") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "rebalance_policy",
+                REBALANCE_POLICY,
+                server_default="DAILY",
+                nullable=False,
+                comment="When the index takes a new selection from its strategy",
+            )
+        )
+        batch_op.add_column(
+            sa.Column(
+                "rebalance_buffer",
+                sa.Integer(),
+                server_default="0",
+                nullable=False,
+                comment="Ranks a non-member has to climb past the last "
+                "constituent before a threshold rebalance.",
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("stock_index") as batch_op:
+        batch_op.drop_column("rebalance_buffer")
+        batch_op.drop_column("rebalance_policy")
+    REBALANCE_POLICY.drop(op.get_bind(), checkfirst=True)
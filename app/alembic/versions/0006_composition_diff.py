@@ -0,0 +1,122 @@
+"""composition diff
+
+Adds `composition_diff`, the stock tickers that joined and left an index on
+each built date, written by index builds so composition change reads are a
+range scan. Diffs of the already built dates are filled in from the
+membership intervals opened and closed on them.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-01-27 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STOCK_INDEX_MEMBERSHIP = sa.table(
+    "stock_index_membership",
+    sa.column("stock_index_id", sa.Integer),
+    sa.column("stock_ticker_id", sa.Integer),
+    sa.column("valid_from", sa.Date),
+    sa.column("valid_to", sa.Date),
+)
+INDEX_PERFORMANCE = sa.table(
+    "index_performance",
+    sa.column("stock_index_id", sa.Integer),
+    sa.column("date", sa.Date),
+)
+
+
+def upgrade() -> None:
+    composition_diff = op.create_table(
+        "composition_diff",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("stock_index_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "date",
+            sa.Date(),
+            nullable=False,
+            comment="Built date of the composition",
+        ),
+        sa.Column(
+            "added_count",
+            sa.Integer(),
+            nullable=False,
+            comment="Number of stock tickers that joined.",
+        ),
+        sa.Column(
+            "removed_count",
+            sa.Integer(),
+            nullable=False,
+            comment="Number of stock tickers that left.",
+        ),
+        sa.Column(
+            "added_stock_ticker_ids",
+            sa.JSON(),
+            nullable=False,
+            comment="Stock ticker ids that joined.",
+        ),
+        sa.Column(
+            "removed_stock_ticker_ids",
+            sa.JSON(),
+            nullable=False,
+            comment="Stock ticker ids that left.",
+        ),
+        sa.ForeignKeyConstraint(["stock_index_id"], ["stock_index.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "stock_index_id",
+            "date",
+            name="_composition_diff_uk_stock_index_id_date",
+        ),
+    )
+    op.create_index("ix_composition_diff_id", "composition_diff", ["id"])
+
+    connection = op.get_bind()
+    diffs: dict[tuple, tuple[list[int], list[int]]] = {
+        (stock_index_id, built_date): ([], [])
+        for stock_index_id, built_date in connection.execute(
+            sa.select(
+                INDEX_PERFORMANCE.c.stock_index_id, INDEX_PERFORMANCE.c.date
+            ).distinct()
+        )
+    }
+    for stock_index_id, stock_ticker_id, valid_from, valid_to in connection.execute(
+        sa.select(
+            STOCK_INDEX_MEMBERSHIP.c.stock_index_id,
+            STOCK_INDEX_MEMBERSHIP.c.stock_ticker_id,
+            STOCK_INDEX_MEMBERSHIP.c.valid_from,
+            STOCK_INDEX_MEMBERSHIP.c.valid_to,
+        ).order_by(STOCK_INDEX_MEMBERSHIP.c.stock_ticker_id)
+    ):
+        if (stock_index_id, valid_from) in diffs:
+            diffs[(stock_index_id, valid_from)][0].append(stock_ticker_id)
+        if (stock_index_id, valid_to) in diffs:
+            diffs[(stock_index_id, valid_to)][1].append(stock_ticker_id)
+    records = [
+        {
+            "stock_index_id": stock_index_id,
+            "date": diff_date,
+            "added_count": len(added),
+            "removed_count": len(removed),
+            "added_stock_ticker_ids": added,
+            "removed_stock_ticker_ids": removed,
+        }
+        for (stock_index_id, diff_date), (added, removed) in sorted(diffs.items())
+    ]
+    if records:
+        op.bulk_insert(composition_diff, records)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_composition_diff_id", table_name="composition_diff")
+    op.drop_table("composition_diff")
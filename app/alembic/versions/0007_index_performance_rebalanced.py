@@ -0,0 +1,43 @@
+"""index performance rebalanced
+
+Flags the index levels whose close rebalanced the constituents. Between
+rebalances an index holds the units bought on the last flagged date, so
+chain-linking a later build needs to know that date. Levels built so far
+were rebalanced every day.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-02-03 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("index_performance") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "rebalanced",
+                sa.Boolean(),
+                server_default=sa.true(),
+                nullable=False,
+                comment="Whether the constituents were rebalanced at the close of "
+                "the date; until the next rebalance the index holds the units "
+                "bought then.",
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("index_performance") as batch_op:
+        batch_op.drop_column("rebalanced")
@@ -23,6 +23,27 @@ class Settings(BaseSettings):
     LOGGING_LEVEL: str = "DEBUG"
     DATABASE_URL: str = "sqlite+aiosqlite:///./stocks.db"
     STOCK_INDEX_NAME: str = "mcap_100"
+    INDEX_BASE_LEVEL: float = 1000.0
+    INDEX_RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    INDEX_RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    INDEX_RESPONSE_CACHE_TTL_SECONDS: float = 3600.0
+    PAGE_SIZE: int = 1000
+    MAX_PAGE_SIZE: int = 10000
+    STREAM_BATCH_SIZE: int = 1000
+    TRADING_CALENDAR_EXCHANGE: str = "NASDAQ"
+    PRICE_PROVIDER: str = "YFINANCE"
+    PRICE_FETCH_CONCURRENCY: int = 8
+    PRICE_FETCH_BATCH_SIZE: int = 50
+    PRICE_BACKFILL_CHUNK_DAYS: int = 90
+    PROVIDER_MAX_REQUESTS_PER_SECOND: float = 5.0
+    PROVIDER_MIN_REQUESTS_PER_SECOND: float = 0.1
+    PROVIDER_RATE_INCREASE: float = 0.1
+    PROVIDER_MAX_RETRIES: int = 3
+    PROVIDER_BACKOFF_SECONDS: float = 1.0
+    PROVIDER_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    PROVIDER_CIRCUIT_RESET_SECONDS: float = 60.0
+    FUNDAMENTALS_TTL_DAYS: int = 30
+    FUNDAMENTALS_REPORT_LAG_DAYS: int = 45
 
     class Config:
         env_file = choose_env_file()
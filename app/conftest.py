@@ -3,6 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from database import Base
+from indexes.cache import index_response_cache
+from prices.matrix import price_matrix_cache
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -22,3 +24,5 @@ async def test_db():
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    price_matrix_cache.clear()
+    index_response_cache.clear()
@@ -1,6 +1,12 @@
 from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import AsyncIterator
 
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import declarative_base, sessionmaker
@@ -9,6 +15,9 @@ from config import get_settings
 
 settings = get_settings()
 
+ALEMBIC_CONFIG_PATH = Path(__file__).parent / "alembic.ini"
+BASELINE_REVISION = "0001"
+
 engine = create_async_engine(settings.DATABASE_URL, echo=True)
 
 async_session = sessionmaker(
@@ -42,3 +51,58 @@ class DB:
 
 
 get_db = DB()
+
+
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+async def bulk_upsert(
+    db: AsyncSession,
+    model,
+    records: list[dict],
+    index_elements: list[str],
+    update_columns: list[str] | None = None,
+) -> None:
+    """
+    Insert `records` into the table of `model` as a single executemany
+    `INSERT ... ON CONFLICT DO UPDATE` on the unique key `index_elements`.
+    Columns not in the key are updated unless `update_columns` narrows them;
+    an empty `update_columns` turns the statement into `ON CONFLICT DO NOTHING`.
+    """
+    if not records:
+        return
+    dialect_name = db.get_bind().dialect.name
+    insert = UPSERT_INSERTS.get(dialect_name)
+    if insert is None:
+        raise ValueError(f"Bulk upsert is not supported for dialect: {dialect_name}")
+
+    statement = insert(model.__table__)
+    if update_columns is None:
+        update_columns = [
+            column for column in records[0] if column not in index_elements
+        ]
+    if update_columns:
+        statement = statement.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: statement.excluded[column] for column in update_columns},
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=index_elements)
+    await db.execute(statement, records)
+
+
+def upgrade_database(connection: Connection) -> None:
+    """
+    Migrate the schema to the latest Alembic revision. Databases created with
+    `create_all` before migrations existed have no version table and are
+    stamped at the baseline revision first.
+    """
+    alembic_config = Config(str(ALEMBIC_CONFIG_PATH))
+    alembic_config.attributes["connection"] = connection
+    table_names = inspect(connection).get_table_names()
+    if "alembic_version" not in table_names and "stock_ticker" in table_names:
+        command.stamp(alembic_config, BASELINE_REVISION)
+    command.upgrade(alembic_config, "head")
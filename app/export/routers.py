@@ -1,4 +1,5 @@
 import os
+from datetime import date
 
 import pandas as pd
 from fastapi import APIRouter, Depends, Query, status
@@ -6,14 +7,16 @@ from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from config import get_settings
 from database import get_db
 from export import paths
 from export.factory import ExporterFactory
-from indexes.models import IndexPerformance
+from indexes.models import IndexPerformance, StockIndex
 from indexes.services import IndexService
 from logger import get_logger
 
 logger = get_logger(__name__)
+settings = get_settings()
 tags = ["export"]
 router = APIRouter(prefix=paths.base)
 
@@ -27,9 +30,15 @@ async def export_index_performance(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Export index performance data to the specified file type (xls or PDF).
+    Export the performance of `settings.STOCK_INDEX_NAME` to the specified file
+    type (xls or PDF).
     """
-    query = select(IndexPerformance).order_by(IndexPerformance.date)
+    query = (
+        select(IndexPerformance)
+        .join(StockIndex, StockIndex.id == IndexPerformance.stock_index_id)
+        .where(StockIndex.name == settings.STOCK_INDEX_NAME)
+        .order_by(IndexPerformance.date)
+    )
     result = await db.execute(query)
     index_data = result.scalars().all()
 
@@ -53,7 +62,9 @@ async def export_index_performance(
     status_code=status.HTTP_200_OK,
 )
 async def export_composition(
-    date: str = Query(..., description="Date for composition (YYYY-MM-DD)"),
+    target_date: date = Query(
+        ..., alias="date", description="Date for composition (YYYY-MM-DD)"
+    ),
     file_type: str = Query(..., description="File type: 'xls' or 'pdf'"),
     db: AsyncSession = Depends(get_db),
 ):
@@ -61,7 +72,7 @@ async def export_composition(
     Export composition data for a specific date to the specified file type (xls or PDF).
     """
     composition_data = await IndexService().get_composition_for_day(
-        db=db, target_date=date
+        db=db, target_date=target_date
     )
 
     df = pd.DataFrame(
@@ -75,7 +86,7 @@ async def export_composition(
         ]
     )
 
-    file_name = f"composition_{date}.{file_type}"
+    file_name = f"composition_{target_date}.{file_type}"
     exporter = ExporterFactory.get_exporter(file_type)
     file_path = os.path.join("/tmp", file_name)
     exporter.export(df, file_path)
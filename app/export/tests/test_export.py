@@ -0,0 +1,83 @@
+import io
+import zipfile
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from export import paths
+from export.routers import router
+from indexes.enums import IndexStrategy, PerformanceCalculation
+from indexes.models import StockIndex
+from indexes.services import IndexService, settings
+from indexes.tests.test_build import SESSIONS, seed_index
+
+
+@pytest.fixture
+async def export_client(test_db: AsyncSession, monkeypatch):
+    monkeypatch.setattr(settings, "STOCK_INDEX_NAME", "top_2")
+    await seed_index(test_db)
+    test_db.add(
+        StockIndex(
+            name="top_1",
+            strategy=IndexStrategy.MARKET_CAP,
+            performance_calculation=PerformanceCalculation.EQUAL_WEIGHTED,
+            ticker_count=1,
+        )
+    )
+    await test_db.commit()
+    await IndexService.build_indexes_range(
+        db=test_db, start_date=SESSIONS[0], end_date=SESSIONS[-1]
+    )
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_export_index_performance_of_configured_index(
+    export_client: httpx.AsyncClient,
+):
+    response = await export_client.get(
+        f"{paths.base}{paths.index_performance}", params={"file_type": "xls"}
+    )
+
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as workbook:
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+    # A header and one row per session of top_2, none of top_1.
+    assert sheet.count("<row ") == 1 + len(SESSIONS)
+
+
+@pytest.mark.asyncio
+async def test_export_composition_of_date(export_client: httpx.AsyncClient):
+    response = await export_client.get(
+        f"{paths.base}{paths.composition}",
+        params={"date": SESSIONS[-1], "file_type": "xls"},
+    )
+
+    assert response.status_code == 200
+    file_name = f"composition_{SESSIONS[-1]}.xls"
+    assert file_name in response.headers["content-disposition"]
+    with zipfile.ZipFile(io.BytesIO(response.content)) as workbook:
+        strings = workbook.read("xl/sharedStrings.xml").decode()
+    # CCC overtakes AAA on the last session.
+    assert "BBB" in strings and "CCC" in strings and "AAA" not in strings
+
+
+@pytest.mark.asyncio
+async def test_export_composition_rejects_malformed_date(
+    export_client: httpx.AsyncClient,
+):
+    response = await export_client.get(
+        f"{paths.base}{paths.composition}",
+        params={"date": "not-a-date", "file_type": "xls"},
+    )
+
+    assert response.status_code == 422
@@ -0,0 +1,8 @@
+from enum import StrEnum
+
+
+class SharesSource(StrEnum):
+    MARKET_CAP_RATIO: str = "MARKET_CAP_RATIO"
+    INCOME_STATEMENT: str = "INCOME_STATEMENT"
+    FIXTURE: str = "FIXTURE"
+    # Add more as required
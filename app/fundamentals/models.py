@@ -0,0 +1,37 @@
+import sqlalchemy as sa
+from sqlalchemy.sql.schema import ForeignKey
+
+from config import get_settings
+from database import Base
+from fundamentals.enums import SharesSource
+from stocks.models import StockTicker
+
+settings = get_settings()
+
+
+class TickerFundamentals(Base):
+    __tablename__ = "ticker_fundamentals"
+    """
+    Cached shares outstanding per ticker, used to turn close prices into market caps.
+    """
+    id = sa.Column(sa.Integer, nullable=False, primary_key=True, index=True)
+    stock_ticker_id = sa.Column(
+        sa.Integer, ForeignKey("stock_ticker.id"), nullable=False, unique=True
+    )
+    shares_outstanding = sa.Column(
+        sa.Float, nullable=False, comment="Shares outstanding of the stock."
+    )
+    source = sa.Column(
+        sa.Enum(SharesSource),
+        nullable=False,
+        comment="Where the shares outstanding figure came from.",
+    )
+    as_of_date = sa.Column(
+        sa.Date, nullable=False, comment="Date the shares outstanding figure is for."
+    )
+    reported_quarter = sa.Column(
+        sa.Date, nullable=True, comment="Latest reported quarter end at fetch time."
+    )
+    fetched_at = sa.Column(
+        sa.Date, nullable=False, comment="Date the figure was fetched from the provider."
+    )
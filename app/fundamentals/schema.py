@@ -0,0 +1,12 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+from fundamentals.enums import SharesSource
+
+
+class FundamentalsData(BaseModel):
+    shares_outstanding: float
+    source: SharesSource
+    as_of_date: date
+    reported_quarter: date | None = None
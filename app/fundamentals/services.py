@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from config import get_settings
+from database import bulk_upsert
+from fundamentals.models import TickerFundamentals
+from fundamentals.schema import FundamentalsData
+from logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+QUARTER_LENGTH = timedelta(days=91)
+
+
+def is_fundamentals_stale(fundamentals: TickerFundamentals, today: date) -> bool:
+    """
+    Cached fundamentals are stale once the TTL has passed, or once the next
+    quarter should have been reported and it was not checked for today yet.
+    """
+    if today - fundamentals.fetched_at >= timedelta(
+        days=settings.FUNDAMENTALS_TTL_DAYS
+    ):
+        return True
+    if fundamentals.reported_quarter is None or fundamentals.fetched_at >= today:
+        return False
+    next_report_date = (
+        fundamentals.reported_quarter
+        + QUARTER_LENGTH
+        + timedelta(days=settings.FUNDAMENTALS_REPORT_LAG_DAYS)
+    )
+    return today >= next_report_date
+
+
+async def load_fresh_shares_outstanding(
+    db: AsyncSession, stock_ticker_ids: list[int], today: date
+) -> dict[int, float]:
+    """
+    Shares outstanding per ticker for the cached fundamentals that are not stale.
+    """
+    result = await db.execute(
+        select(TickerFundamentals).where(
+            TickerFundamentals.stock_ticker_id.in_(stock_ticker_ids)
+        )
+    )
+    return {
+        fundamentals.stock_ticker_id: fundamentals.shares_outstanding
+        for fundamentals in result.scalars().all()
+        if not is_fundamentals_stale(fundamentals=fundamentals, today=today)
+    }
+
+
+async def upsert_fundamentals(
+    db: AsyncSession, fundamentals: dict[int, FundamentalsData], fetched_at: date
+):
+    """
+    Store freshly fetched fundamentals per stock ticker id. Does not commit.
+    """
+    await bulk_upsert(
+        db=db,
+        model=TickerFundamentals,
+        records=[
+            {
+                "stock_ticker_id": stock_ticker_id,
+                **data.model_dump(),
+                "fetched_at": fetched_at,
+            }
+            for stock_ticker_id, data in fundamentals.items()
+        ],
+        index_elements=["stock_ticker_id"],
+    )
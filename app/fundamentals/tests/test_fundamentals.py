@@ -0,0 +1,65 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from fundamentals.enums import SharesSource
+from fundamentals.models import TickerFundamentals
+from fundamentals.services import is_fundamentals_stale
+from price_provider.factory import FixturePriceProvider
+from prices.services import fetch_and_store_target_date_data
+from stocks.models import StockTicker
+
+
+class CountingFixturePriceProvider(FixturePriceProvider):
+    def __init__(self):
+        super().__init__()
+        self.fundamentals_calls = 0
+
+    def fetch_fundamentals(self, ticker: str):
+        self.fundamentals_calls += 1
+        return super().fetch_fundamentals(ticker)
+
+
+def test_is_fundamentals_stale():
+    fundamentals = TickerFundamentals(
+        shares_outstanding=1e9,
+        source=SharesSource.MARKET_CAP_RATIO,
+        as_of_date=date(2024, 5, 1),
+        reported_quarter=date(2024, 3, 31),
+        fetched_at=date(2024, 5, 1),
+    )
+
+    assert not is_fundamentals_stale(fundamentals, today=date(2024, 5, 20))
+    # TTL expired.
+    assert is_fundamentals_stale(fundamentals, today=date(2024, 6, 1))
+    # Next quarter (ending around June 30th) is expected to be reported.
+    fundamentals.fetched_at = date(2024, 8, 14)
+    assert is_fundamentals_stale(fundamentals, today=date(2024, 8, 15))
+    assert not is_fundamentals_stale(fundamentals, today=date(2024, 8, 14))
+
+
+@pytest.mark.asyncio
+async def test_ingestion_uses_cached_fundamentals(test_db: AsyncSession):
+    for symbol in ["AAPL", "MSFT"]:
+        test_db.add(StockTicker(ticker=symbol, name=symbol, exchange="NASDAQ"))
+    await test_db.commit()
+    provider = CountingFixturePriceProvider()
+
+    await fetch_and_store_target_date_data(
+        db=test_db,
+        provider=provider,
+        start_date=date(2024, 1, 1),
+        end_date=date(2024, 1, 31),
+    )
+    await fetch_and_store_target_date_data(
+        db=test_db,
+        provider=provider,
+        start_date=date(2024, 1, 1),
+        end_date=date(2024, 2, 29),
+    )
+
+    assert provider.fundamentals_calls == 2
+    result = await test_db.execute(select(TickerFundamentals))
+    assert {row.source for row in result.scalars().all()} == {SharesSource.FIXTURE}
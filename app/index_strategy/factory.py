@@ -1,16 +1,18 @@
 from datetime import date
 from typing import Callable
 
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
+import numpy as np
 
 from indexes.enums import IndexStrategy
-from prices.models import DailyPrices
+from prices.matrix import PriceMatrix
 
 
 class IndexStrategyFactory:
     """
     Factory for handling index strategies.
+
+    Strategies select constituents for every date of a price matrix and return
+    them as `{date: matrix columns}`, ordered by rank.
     """
 
     @staticmethod
@@ -28,16 +30,14 @@ class IndexStrategyFactory:
         return strategies[strategy_type]
 
     @staticmethod
-    async def _market_cap_strategy(
-        db: AsyncSession, top_n: int, target_date: date
-    ) -> list[int]:
+    def _market_cap_strategy(
+        matrix: PriceMatrix, top_n: int
+    ) -> dict[date, np.ndarray]:
         """
-        Strategy to select top `m` stocks by market capitalization.
+        Strategy to select top `n` stocks by market capitalization on every date
+        of the matrix.
         """
-        query = await db.execute(
-            select(DailyPrices.stock_ticker_id)
-            .where(DailyPrices.date == target_date)
-            .order_by(DailyPrices.market_cap.desc())
-            .limit(top_n)
-        )
-        return query.scalars().all()
+        return {
+            target_date: matrix.top_n(row, top_n)
+            for row, target_date in enumerate(matrix.dates)
+        }
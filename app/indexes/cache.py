@@ -0,0 +1,240 @@
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import date, datetime, UTC
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from indexes.schema import ResponseCacheStats
+from logger import get_logger
+from response_format import JSON_MEDIA_TYPE
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+PENDING_RESPONSE_INVALIDATIONS = "pending_response_invalidations"
+
+CacheKey = tuple[str, str, tuple]
+
+
+class CachedResponse:
+    """
+    Serialized response body of an /indexes endpoint, with the stock index and
+    the dates it was read from.
+    """
+
+    def __init__(
+        self,
+        body: bytes,
+        stock_index_name: str,
+        start_date: date,
+        end_date: date,
+    ):
+        self.body = body
+        self.stock_index_name = stock_index_name
+        self.start_date = start_date
+        self.end_date = end_date
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.last_modified = datetime.now(tz=UTC).replace(microsecond=0)
+        self.expires_at = time.monotonic() + settings.INDEX_RESPONSE_CACHE_TTL_SECONDS
+
+    def covers(
+        self, stock_index_names: set[str] | None, start_date: date, end_date: date
+    ) -> bool:
+        return (
+            stock_index_names is None or self.stock_index_name in stock_index_names
+        ) and (self.start_date <= end_date and start_date <= self.end_date)
+
+
+class ResponseCache:
+    """
+    Read-through LRU cache of /indexes response bodies keyed by endpoint,
+    stock index and request parameters. Entries expire after a TTL, and the
+    least recently used ones are evicted beyond `max_entries` or `max_bytes`.
+    Index builds invalidate the entries of the indexes and dates they write
+    through `stage_response_invalidation`, once their transaction commits.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[CacheKey, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidation, so a response read before one is not
+        # cached after it.
+        self.generation = 0
+
+    def get(self, key: CacheKey) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: CacheKey, entry: CachedResponse, generation: int):
+        """
+        Cache `entry`, read when the cache was at `generation`.
+        """
+        if generation != self.generation or len(entry.body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += len(entry.body)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(
+        self, stock_index_names: set[str] | None, start_date: date, end_date: date
+    ):
+        """
+        Drop the entries of `stock_index_names`, or of every index, read from
+        any date between `start_date` and `end_date`.
+        """
+        self.generation += 1
+        stale_keys = [
+            key
+            for key, entry in self._entries.items()
+            if entry.covers(stock_index_names, start_date, end_date)
+        ]
+        for key in stale_keys:
+            self._remove(key)
+        self.invalidations += len(stale_keys)
+        if stale_keys:
+            logger.debug(
+                f"Invalidated {len(stale_keys)} cached index responses between "
+                f"{start_date} and {end_date}."
+            )
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> ResponseCacheStats:
+        lookups = self.hits + self.misses
+        return ResponseCacheStats(
+            entries=len(self._entries),
+            bytes=self._bytes,
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes,
+            hits=self.hits,
+            misses=self.misses,
+            hit_ratio=self.hits / lookups if lookups else 0.0,
+            evictions=self.evictions,
+            invalidations=self.invalidations,
+        )
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+
+index_response_cache = ResponseCache(
+    max_entries=settings.INDEX_RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.INDEX_RESPONSE_CACHE_MAX_BYTES,
+)
+
+
+def stage_response_invalidation(
+    db: AsyncSession,
+    stock_index_names: set[str] | None,
+    start_date: date,
+    end_date: date,
+):
+    """
+    Invalidate the cached responses of `stock_index_names`, or of every index,
+    between `start_date` and `end_date` once the session commits.
+    """
+    db.info.setdefault(PENDING_RESPONSE_INVALIDATIONS, []).append(
+        (stock_index_names, start_date, end_date)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_response_invalidations(session: Session):
+    for invalidation in session.info.pop(PENDING_RESPONSE_INVALIDATIONS, []):
+        index_response_cache.invalidate(*invalidation)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_response_invalidations(session: Session):
+    session.info.pop(PENDING_RESPONSE_INVALIDATIONS, None)
+
+
+def _is_not_modified(request: Request, entry: CachedResponse) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+        return "*" in etags or entry.etag in etags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return entry.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _encode_json(content: Any) -> bytes:
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+async def cached_response(
+    request: Request,
+    endpoint: str,
+    start_date: date,
+    end_date: date,
+    read: Callable[[], Awaitable[Any]],
+    encode: Callable[[Any], bytes] = _encode_json,
+    media_type: str | None = None,
+) -> Response:
+    """
+    Serve `endpoint` of `settings.STOCK_INDEX_NAME` for the dates between
+    `start_date` and `end_date` from the index response cache, calling `read`
+    on a miss and caching its content as `encode`d into `media_type`, the
+    format negotiated from the Accept header, or JSON for endpoints that do
+    not negotiate one. Responses carry an ETag and Last-Modified; conditional
+    requests still matching them get a 304 without a body.
+    """
+    headers = {"Vary": "Accept"} if media_type is not None else {}
+    media_type = media_type or JSON_MEDIA_TYPE
+    key = (endpoint, settings.STOCK_INDEX_NAME, (start_date, end_date, media_type))
+    entry = index_response_cache.get(key)
+    if entry is None:
+        generation = index_response_cache.generation
+        content = await read()
+        entry = CachedResponse(
+            body=encode(content),
+            stock_index_name=settings.STOCK_INDEX_NAME,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        index_response_cache.put(key, entry, generation)
+
+    headers.update(
+        {
+            "ETag": entry.etag,
+            "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        }
+    )
+    if _is_not_modified(request, entry):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type=media_type, headers=headers)
@@ -8,4 +8,12 @@ class IndexStrategy(StrEnum):
 
 class PerformanceCalculation(StrEnum):
     EQUAL_WEIGHTED = "EQUAL_WEIGHTED"
+    MARKET_CAP_WEIGHTED = "MARKET_CAP_WEIGHTED"
     # Add more as needed
+
+
+class RebalancePolicy(StrEnum):
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+    THRESHOLD = "THRESHOLD"
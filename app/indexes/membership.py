@@ -0,0 +1,85 @@
+from collections import defaultdict
+from datetime import date
+
+MembershipInterval = tuple[date, date | None]
+
+
+def replay_memberships(
+    intervals: dict[int, list[MembershipInterval]],
+    compositions: dict[date, list[int]],
+    next_built_date: date | None,
+) -> dict[int, list[MembershipInterval]]:
+    """
+    Membership intervals per stock ticker id after the compositions of the
+    rebuilt dates replace whatever `intervals` held between the first rebuilt
+    date and `next_built_date`, the first built date after the range (None
+    when the range is the end of the index). Intervals are `[valid_from,
+    valid_to)` on built dates, so a ticker that stays a member across the
+    edges of the range keeps a single interval.
+    """
+    build_dates = sorted(compositions)
+    if not build_dates:
+        return {
+            stock_ticker_id: list(ticker_intervals)
+            for stock_ticker_id, ticker_intervals in intervals.items()
+        }
+    window_start, window_end = build_dates[0], next_built_date
+
+    pieces: dict[int, list[MembershipInterval]] = defaultdict(list)
+    for stock_ticker_id, ticker_intervals in intervals.items():
+        for valid_from, valid_to in ticker_intervals:
+            if valid_from < window_start:
+                pieces[stock_ticker_id].append(
+                    (
+                        valid_from,
+                        valid_to
+                        if valid_to is not None and valid_to <= window_start
+                        else window_start,
+                    )
+                )
+            if window_end is not None and (valid_to is None or valid_to > window_end):
+                pieces[stock_ticker_id].append((max(valid_from, window_end), valid_to))
+
+    joined: dict[int, date] = {}
+    for build_date in build_dates:
+        members = set(compositions[build_date])
+        for stock_ticker_id in list(joined):
+            if stock_ticker_id not in members:
+                pieces[stock_ticker_id].append(
+                    (joined.pop(stock_ticker_id), build_date)
+                )
+        for stock_ticker_id in members:
+            joined.setdefault(stock_ticker_id, build_date)
+    for stock_ticker_id, valid_from in joined.items():
+        pieces[stock_ticker_id].append((valid_from, window_end))
+
+    merged: dict[int, list[MembershipInterval]] = {}
+    for stock_ticker_id, ticker_pieces in pieces.items():
+        merged_intervals: list[MembershipInterval] = []
+        for valid_from, valid_to in sorted(ticker_pieces, key=lambda piece: piece[0]):
+            if merged_intervals and merged_intervals[-1][1] == valid_from:
+                merged_intervals[-1] = (merged_intervals[-1][0], valid_to)
+            else:
+                merged_intervals.append((valid_from, valid_to))
+        merged[stock_ticker_id] = merged_intervals
+    return merged
+
+
+def composition_diffs(
+    intervals: dict[int, list[MembershipInterval]], dates: list[date]
+) -> dict[date, tuple[list[int], list[int]]]:
+    """
+    Stock ticker ids added and removed on each of `dates`, relative to the
+    previous built date: intervals open on the date a ticker joins and close on
+    the date it leaves.
+    """
+    diffs: dict[date, tuple[list[int], list[int]]] = {
+        diff_date: ([], []) for diff_date in dates
+    }
+    for stock_ticker_id in sorted(intervals):
+        for valid_from, valid_to in intervals[stock_ticker_id]:
+            if valid_from in diffs:
+                diffs[valid_from][0].append(stock_ticker_id)
+            if valid_to in diffs:
+                diffs[valid_to][1].append(stock_ticker_id)
+    return diffs
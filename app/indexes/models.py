@@ -1,9 +1,11 @@
 import sqlalchemy as sa
-from sqlalchemy.sql.schema import ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.sql.schema import ForeignKey, UniqueConstraint
+from sqlalchemy.sql.sqltypes import TIMESTAMP
 
 from config import get_settings
 from database import Base
-from indexes.enums import IndexStrategy, PerformanceCalculation
+from indexes.enums import IndexStrategy, PerformanceCalculation, RebalancePolicy
 from stocks.models import StockTicker
 
 settings = get_settings()
@@ -28,26 +30,132 @@ class StockIndex(Base):
         comment="Performance calculation of index",
     )
     ticker_count = sa.Column(sa.Integer, nullable=False)
+    rebalance_policy = sa.Column(
+        sa.Enum(RebalancePolicy),
+        nullable=False,
+        server_default=RebalancePolicy.DAILY,
+        comment="When the index takes a new selection from its strategy",
+    )
+    rebalance_buffer = sa.Column(
+        sa.Integer,
+        nullable=False,
+        server_default="0",
+        comment="Ranks a non-member has to climb past the last constituent "
+        "before a threshold rebalance.",
+    )
 
 
-class StockIndexTicker(Base):
-    __tablename__ = "stock_index_ticker"
+class StockIndexMembership(Base):
+    __tablename__ = "stock_index_membership"
     """
-    Every day n stock ticker per composition will be added to this table.
+    A stock ticker is a member of an index from `valid_from` until `valid_to`.
+    Rows are only opened and closed when the composition changes, so storage
+    grows with the number of membership changes rather than with sessions.
     """
+    __table_args__ = (
+        UniqueConstraint(
+            "stock_index_id",
+            "stock_ticker_id",
+            "valid_from",
+            name="_stock_index_membership_uk_index_ticker_valid_from",
+        ),
+        sa.Index(
+            "ix_stock_index_membership_stock_index_id_valid_from",
+            "stock_index_id",
+            "valid_from",
+        ),
+    )
     id = sa.Column(sa.Integer, nullable=False, primary_key=True, index=True)
-    date = sa.Column(sa.Date, nullable=False, comment="Stock Index ticker date")
+    stock_index_id = sa.Column(sa.Integer, ForeignKey("stock_index.id"), nullable=False)
     stock_ticker_id = sa.Column(
         sa.Integer, ForeignKey("stock_ticker.id"), nullable=False
     )
+    valid_from = sa.Column(
+        sa.Date, nullable=False, comment="First built date the ticker is a member"
+    )
+    valid_to = sa.Column(
+        sa.Date,
+        nullable=True,
+        comment="First built date the ticker is no longer a member; null while "
+        "it still is.",
+    )
+
+
+class CompositionDiff(Base):
+    __tablename__ = "composition_diff"
+    """
+    Stock tickers that joined and left an index on a built date, relative to
+    the previous built date. Written with the composition at build time.
+    """
+    __table_args__ = (
+        UniqueConstraint(
+            "stock_index_id",
+            "date",
+            name="_composition_diff_uk_stock_index_id_date",
+        ),
+    )
+    id = sa.Column(sa.Integer, nullable=False, primary_key=True, index=True)
     stock_index_id = sa.Column(sa.Integer, ForeignKey("stock_index.id"), nullable=False)
+    date = sa.Column(sa.Date, nullable=False, comment="Built date of the composition")
+    added_count = sa.Column(
+        sa.Integer, nullable=False, comment="Number of stock tickers that joined."
+    )
+    removed_count = sa.Column(
+        sa.Integer, nullable=False, comment="Number of stock tickers that left."
+    )
+    added_stock_ticker_ids = sa.Column(
+        sa.JSON, nullable=False, comment="Stock ticker ids that joined."
+    )
+    removed_stock_ticker_ids = sa.Column(
+        sa.JSON, nullable=False, comment="Stock ticker ids that left."
+    )
 
 
 class IndexPerformance(Base):
     __tablename__ = "index_performance"
+    __table_args__ = (
+        UniqueConstraint(
+            "stock_index_id",
+            "date",
+            name="_index_performance_uk_stock_index_id_date",
+        ),
+    )
     id = sa.Column(sa.Integer, nullable=False, primary_key=True, index=True)
     stock_index_id = sa.Column(sa.Integer, ForeignKey("stock_index.id"), nullable=False)
     date = sa.Column(sa.Date, nullable=False, comment="Index Performance date")
     value = sa.Column(
         sa.Float, nullable=False, comment="Index performance value for a date"
     )
+    divisor = sa.Column(
+        sa.Float,
+        nullable=True,
+        comment="Divisor after the close of the date; the next level is the "
+        "value of the held constituents divided by it.",
+    )
+    rebalanced = sa.Column(
+        sa.Boolean,
+        nullable=False,
+        server_default=sa.true(),
+        comment="Whether the constituents were rebalanced at the close of the date; "
+        "until the next rebalance the index holds the units bought then.",
+    )
+
+
+class IndexDirtyDate(Base):
+    __tablename__ = "index_dirty_date"
+    """
+    (index, date) pairs whose prices were written after the index was built.
+    Rebuilding the index from the date, through every later chain-linked
+    day, clears them.
+    """
+    __table_args__ = (
+        UniqueConstraint(
+            "stock_index_id",
+            "date",
+            name="_index_dirty_date_uk_stock_index_id_date",
+        ),
+    )
+    id = sa.Column(sa.Integer, nullable=False, primary_key=True, index=True)
+    stock_index_id = sa.Column(sa.Integer, ForeignKey("stock_index.id"), nullable=False)
+    date = sa.Column(sa.Date, nullable=False, comment="Date with changed prices")
+    marked_at = sa.Column(TIMESTAMP, nullable=False, server_default=func.now())
@@ -4,3 +4,4 @@ composition = "/composition"
 composition_change = "/composition_change"
 summary = "/summary"
 stock_ticker_idx = "/stock_ticker_idx"
+cache_stats = "/cache_stats"
@@ -1,19 +1,35 @@
 from datetime import date, datetime, timedelta, UTC
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import get_settings
 from database import get_db
 from indexes import paths
+from indexes.cache import cached_response, index_response_cache
 from indexes.schema import (
     CompositionResponse,
     IndexPerformanceResponse,
+    ResponseCacheStats,
+    StockIndexPage,
     StockIndexResponse,
     SummaryMetricsResponse,
 )
-from indexes.services import fetch_all_stock_index_ticker, IndexService
+from indexes.services import (
+    fetch_stock_index_ticker_rows,
+    IndexService,
+    stream_stock_index_tickers,
+)
 from logger import get_logger
+from pagination import NDJSON_MEDIA_TYPE, ndjson_response, wants_ndjson
+from response_format import (
+    encode_rows,
+    negotiate_media_type,
+    negotiated_responses,
+    rows_response,
+)
+from trading_calendar.services import get_trading_calendar
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -23,64 +39,160 @@ router = APIRouter(prefix=paths.base)
 
 @router.get(
     f"{paths.performance}",
+    response_model=list[IndexPerformanceResponse],
+    responses=negotiated_responses(),
     status_code=status.HTTP_200_OK,
 )
 async def get_performance(
+    request: Request,
     start_date: date | None = None,
     end_date: date | None = None,
     db: AsyncSession = Depends(get_db),
-) -> list[IndexPerformanceResponse]:
+) -> Response:
+    """
+    Index levels between `start_date` and `end_date`, as JSON, an Arrow IPC
+    stream or MessagePack by `Accept`.
+    """
     end_date = datetime.now(tz=UTC).date() if end_date is None else end_date
     start_date = end_date - timedelta(days=30) if start_date is None else start_date
-    return await IndexService().get_index_performance(
-        db=db, start_date=start_date, end_date=end_date
+    media_type = negotiate_media_type(request)
+    return await cached_response(
+        request=request,
+        endpoint=paths.performance,
+        start_date=start_date,
+        end_date=end_date,
+        read=lambda: IndexService().get_index_performance_rows(
+            db=db, start_date=start_date, end_date=end_date
+        ),
+        encode=lambda rows: encode_rows(
+            media_type=media_type, model=IndexPerformanceResponse, rows=rows
+        ),
+        media_type=media_type,
     )
 
 
 @router.get(
     f"{paths.summary}",
+    response_model=SummaryMetricsResponse,
     status_code=status.HTTP_200_OK,
 )
 async def get_summary(
+    request: Request,
     start_date: date | None = None,
     end_date: date | None = None,
     db: AsyncSession = Depends(get_db),
-) -> SummaryMetricsResponse:
+) -> Response:
     end_date = datetime.now(tz=UTC).date() if end_date is None else end_date
     start_date = end_date - timedelta(days=30) if start_date is None else start_date
-    return await IndexService().get_summary_metrics(
-        db=db, start_date=start_date, end_date=end_date
+    # The summary runs from the sessions on or before the requested dates.
+    calendar = get_trading_calendar()
+    return await cached_response(
+        request=request,
+        endpoint=paths.summary,
+        start_date=calendar.previous_session(start_date),
+        end_date=calendar.previous_session(end_date),
+        read=lambda: IndexService().get_summary_metrics(
+            db=db, start_date=start_date, end_date=end_date
+        ),
     )
 
 
 @router.get(
     f"{paths.composition}",
+    response_model=CompositionResponse,
     status_code=status.HTTP_200_OK,
 )
 async def get_compostion(
-    target_date: date | None = None, db: AsyncSession = Depends(get_db)
-) -> CompositionResponse:
+    request: Request,
+    target_date: date | None = None,
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     target_date = datetime.now(tz=UTC).date() if target_date is None else target_date
-    return await IndexService().get_composition_for_day(db=db, target_date=target_date)
+    session_date = get_trading_calendar().previous_session(target_date)
+    return await cached_response(
+        request=request,
+        endpoint=paths.composition,
+        start_date=session_date,
+        end_date=session_date,
+        read=lambda: IndexService().get_composition_for_day(
+            db=db, target_date=target_date
+        ),
+    )
 
 
 @router.get(
     f"{paths.composition_change}",
+    response_model=dict[date, bool],
     status_code=status.HTTP_200_OK,
 )
 async def get_compostion_change(
-    start_date: date, end_date: date, db: AsyncSession = Depends(get_db)
-) -> dict[date, bool]:
-    return await IndexService().get_composition_change(
-        db=db, start_date=start_date, end_date=end_date
+    request: Request,
+    start_date: date,
+    end_date: date,
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    return await cached_response(
+        request=request,
+        endpoint=paths.composition_change,
+        start_date=start_date,
+        end_date=end_date,
+        read=lambda: IndexService().get_composition_change(
+            db=db, start_date=start_date, end_date=end_date
+        ),
     )
 
 
 @router.get(
     f"{paths.stock_ticker_idx}",
+    response_model=StockIndexPage,
+    responses=negotiated_responses(NDJSON_MEDIA_TYPE),
     status_code=status.HTTP_200_OK,
 )
 async def get_stock_ticker_idx(
+    request: Request,
+    ticker: list[str] | None = Query(None),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cursor: str | None = None,
+    limit: int = Query(settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
-) -> list[StockIndexResponse]:
-    return await fetch_all_stock_index_ticker(db=db)
+) -> Response:
+    """
+    Index membership intervals of `ticker`, or of every ticker, overlapping the
+    dates between `start_date` and `end_date`, one page at a time; pass the
+    returned `next_cursor` to get the next page. With
+    `Accept: application/x-ndjson` every matching interval is streamed instead,
+    one JSON object per line. Pages are also served as an Arrow IPC stream or
+    MessagePack by `Accept`; Arrow carries `next_cursor` in its schema
+    metadata.
+    """
+    if wants_ndjson(request):
+        return ndjson_response(
+            db=db,
+            model=StockIndexResponse,
+            batches=stream_stock_index_tickers(
+                db=db, tickers=ticker, start_date=start_date, end_date=end_date
+            ),
+        )
+    rows, next_cursor = await fetch_stock_index_ticker_rows(
+        db=db,
+        tickers=ticker,
+        start_date=start_date,
+        end_date=end_date,
+        cursor=cursor,
+        limit=limit,
+    )
+    return rows_response(
+        media_type=negotiate_media_type(request),
+        model=StockIndexResponse,
+        rows=rows,
+        envelope={"next_cursor": next_cursor},
+    )
+
+
+@router.get(
+    f"{paths.cache_stats}",
+    status_code=status.HTTP_200_OK,
+)
+async def get_cache_stats() -> ResponseCacheStats:
+    return index_response_cache.stats()
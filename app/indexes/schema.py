@@ -2,7 +2,7 @@ from datetime import date
 
 from pydantic import BaseModel
 
-from indexes.enums import IndexStrategy, PerformanceCalculation
+from indexes.enums import IndexStrategy, PerformanceCalculation, RebalancePolicy
 
 
 class StockIndexCreate(BaseModel):
@@ -12,6 +12,8 @@ class StockIndexCreate(BaseModel):
         PerformanceCalculation.EQUAL_WEIGHTED
     )
     ticker_count: int
+    rebalance_policy: RebalancePolicy = RebalancePolicy.DAILY
+    rebalance_buffer: int = 0
 
 
 class IndexPerformanceResponse(BaseModel):
@@ -22,6 +24,20 @@ class IndexPerformanceResponse(BaseModel):
         orm_mode = True
 
 
+class IndexLevelState(BaseModel):
+    """
+    Stored index level, divisor and constituents at the close of `date`; the
+    starting point for chain-linking the following sessions. The constituents
+    are held in the units bought at the close of `rebalance_date`.
+    """
+
+    rebalance_date: date
+    date: date
+    value: float
+    divisor: float
+    stock_ticker_ids: list[int]
+
+
 class SummaryMetricsResponse(BaseModel):
     cumulative_return: float
     average_daily_change: float
@@ -42,6 +58,24 @@ class CompositionResponse(BaseModel):
 
 class StockIndexResponse(BaseModel):
     id: int
-    date: date
-    stock_ticker_id: int
     stock_index_id: int
+    stock_ticker_id: int
+    valid_from: date
+    valid_to: date | None
+
+
+class StockIndexPage(BaseModel):
+    data: list[StockIndexResponse]
+    next_cursor: str | None = None
+
+
+class ResponseCacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    invalidations: int
@@ -1,29 +1,63 @@
 from collections import defaultdict
-from datetime import date, datetime, timedelta, UTC
+from datetime import date, datetime, UTC
+from typing import AsyncIterator
 
+import numpy as np
 from fastapi import Depends
+from sqlalchemy import and_, delete, func, or_, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from config import get_settings
-from database import get_db
+from database import bulk_upsert, get_db
 from index_strategy.factory import IndexStrategyFactory
-from indexes.models import IndexPerformance, StockIndex, StockIndexTicker
+from indexes.cache import stage_response_invalidation
+from indexes.enums import IndexStrategy
+from indexes.models import (
+    CompositionDiff,
+    IndexDirtyDate,
+    IndexPerformance,
+    StockIndex,
+    StockIndexMembership,
+)
+from indexes.membership import (
+    composition_diffs,
+    MembershipInterval,
+    replay_memberships,
+)
 from indexes.schema import (
     CompositionResponse,
-    IndexPerformanceResponse,
+    IndexLevelState,
     StockIndexCreate,
-    StockIndexResponse,
     SummaryMetricsResponse,
     TickerResponse,
 )
+from logger import get_logger
+from pagination import decode_cursor, encode_cursor
 from performance_calculation.factory import PerformanceCalculatorFactory
+from prices.matrix import PriceMatrix, price_matrix_cache
 from prices.models import DailyPrices
+from rebalance_policy.factory import RebalancePolicyFactory
 from stocks.models import StockTicker
+from trading_calendar.services import get_trading_calendar
 
+logger = get_logger(__name__)
 settings = get_settings()
 
 
+def _is_member_on(target_date):
+    """
+    Filter StockIndexMembership down to the intervals covering `target_date`.
+    """
+    return and_(
+        StockIndexMembership.valid_from <= target_date,
+        or_(
+            StockIndexMembership.valid_to.is_(None),
+            StockIndexMembership.valid_to > target_date,
+        ),
+    )
+
+
 class IndexService:
     @staticmethod
     async def create_stock_index(
@@ -45,6 +79,8 @@ class IndexService:
             strategy=stock_index_data.strategy,
             performance_calculation=stock_index_data.performance_calculation,
             ticker_count=stock_index_data.ticker_count,
+            rebalance_policy=stock_index_data.rebalance_policy,
+            rebalance_buffer=stock_index_data.rebalance_buffer,
         )
         db.add(stock_index)
         await db.commit()
@@ -52,36 +88,43 @@ class IndexService:
         return stock_index
 
     @staticmethod
-    async def get_index_performance(
+    async def get_index_performance_rows(
         db: AsyncSession, start_date: date, end_date: date
-    ) -> list[IndexPerformanceResponse]:
+    ) -> list[Row]:
+        """
+        (date, value) rows of the index between `start_date` and `end_date`,
+        in date order; the `IndexPerformanceResponse` fields.
+        """
         result = await db.execute(
-            select(IndexPerformance)
+            select(IndexPerformance.date, IndexPerformance.value)
             .join(StockIndex, StockIndex.id == IndexPerformance.stock_index_id)
             .where(StockIndex.name == settings.STOCK_INDEX_NAME)
             .where(IndexPerformance.date <= end_date)
             .where(IndexPerformance.date >= start_date)
+            .order_by(IndexPerformance.date)
         )
-        out: list[IndexPerformanceResponse] = []
-        for item in result.scalars().all():
-            out.append(IndexPerformanceResponse(date=item.date, index_value=item.value))
-        return out
+        return result.all()
 
     @staticmethod
     async def get_composition_for_day(
         db: AsyncSession, target_date: date
     ) -> CompositionResponse:
+        """
+        Composition on `target_date`, or on the last session before it when the
+        market was closed that day.
+        """
+        target_date = get_trading_calendar().previous_session(target_date)
         result = await db.execute(
             select(StockTicker.ticker, DailyPrices.market_cap, DailyPrices.close_price)
-            .select_from(StockIndexTicker)
-            .join(StockIndex, StockIndex.id == StockIndexTicker.stock_index_id)
+            .select_from(StockIndexMembership)
+            .join(StockIndex, StockIndex.id == StockIndexMembership.stock_index_id)
             .join(
                 DailyPrices,
-                DailyPrices.stock_ticker_id == StockIndexTicker.stock_ticker_id,
+                DailyPrices.stock_ticker_id == StockIndexMembership.stock_ticker_id,
             )
-            .join(StockTicker, StockTicker.id == StockIndexTicker.stock_ticker_id)
+            .join(StockTicker, StockTicker.id == StockIndexMembership.stock_ticker_id)
             .where(StockIndex.name == settings.STOCK_INDEX_NAME)
-            .where(StockIndexTicker.date == target_date)
+            .where(_is_member_on(target_date))
             .where(DailyPrices.date == target_date)
         )
         ticker_data: list[TickerResponse] = []
@@ -101,57 +144,64 @@ class IndexService:
     async def get_summary_metrics(
         db: AsyncSession, start_date: date, end_date: date
     ) -> SummaryMetricsResponse:
-        result = await db.execute(
-            select(IndexPerformance)
-            .join(StockIndex, StockIndex.id == IndexPerformance.stock_index_id)
+        """
+        Daily changes, cumulative return and per-day composition additions of
+        the index between `start_date` and `end_date`, read in one pass over its
+        levels: `LAG` gives each change and window aggregates the first and last
+        level, while the additions come from the composition diff of each date.
+        """
+        calendar = get_trading_calendar()
+        start_date = calendar.previous_session(start_date)
+        end_date = calendar.previous_session(end_date)
+        stock_index_id = (
+            select(StockIndex.id)
             .where(StockIndex.name == settings.STOCK_INDEX_NAME)
-            .where(IndexPerformance.date <= end_date)
-            .where(IndexPerformance.date >= start_date)
-            .order_by(IndexPerformance.date.desc())
-        )
-        result = result.scalars().all()
-        daily_changes: list[float] = []
-        prev_performance_value: float = 0.0
-        start_value = 0.0
-        end_value = 0.0
-        for idx_performance in result:
-            if idx_performance.date == start_date:
-                start_value = idx_performance.value
-            if idx_performance.date == end_date:
-                end_value = idx_performance.value
-            if prev_performance_value > 0:
-                daily_changes.append(idx_performance.value - prev_performance_value)
-            prev_performance_value = idx_performance.value
-
-        average_daily_change: float = sum(daily_changes) / len(daily_changes)
-        cumulative_return: float = (
-            ((end_value - start_value) / start_value) * 100 if start_value else 0.0
+            .scalar_subquery()
         )
-        composition_changes: list[int] = []
-        compostition_date_ticker_id_map: dict[date, set[int]] = defaultdict(set)
+        whole_range = {"order_by": IndexPerformance.date, "rows": (None, None)}
         result = await db.execute(
-            select(StockIndexTicker)
-            .join(StockIndex, StockIndex.id == StockIndexTicker.stock_index_id)
-            .where(StockIndex.name == settings.STOCK_INDEX_NAME)
-            .where(StockIndexTicker.date <= end_date)
-            .where(StockIndexTicker.date >= start_date)
-            .order_by(StockIndexTicker.date.desc())
+            select(
+                IndexPerformance.value
+                - func.lag(IndexPerformance.value).over(
+                    order_by=IndexPerformance.date
+                ),
+                func.coalesce(CompositionDiff.added_count, 0),
+                func.first_value(IndexPerformance.value).over(**whole_range),
+                func.last_value(IndexPerformance.value).over(**whole_range),
+            )
+            .outerjoin(
+                CompositionDiff,
+                and_(
+                    CompositionDiff.stock_index_id == IndexPerformance.stock_index_id,
+                    CompositionDiff.date == IndexPerformance.date,
+                ),
+            )
+            .where(IndexPerformance.stock_index_id == stock_index_id)
+            .where(IndexPerformance.date <= end_date)
+            .where(IndexPerformance.date >= start_date)
+            .order_by(IndexPerformance.date)
         )
-        for stock_idx_ticker in result.scalars().all():
-            compostition_date_ticker_id_map[stock_idx_ticker.date].add(
-                stock_idx_ticker.stock_ticker_id
+        rows = result.all()
+        if not rows:
+            return SummaryMetricsResponse(
+                cumulative_return=0.0,
+                average_daily_change=0.0,
+                composition_changes=[],
+                daily_changes=[],
             )
 
-        prev_tickers: set[int] = set([])
-        while start_date < end_date:
-            if not prev_tickers:
-                prev_tickers = compostition_date_ticker_id_map.get(start_date, set([]))
-                start_date = start_date + timedelta(days=1)
-                continue
-            curr_tickers = compostition_date_ticker_id_map.get(start_date, set([]))
-            composition_changes.append(len(curr_tickers.difference(prev_tickers)))
-            start_date = start_date + timedelta(days=1)
-            prev_tickers = curr_tickers
+        # The first date has no previous level, and its composition is the
+        # baseline the later additions are counted against.
+        daily_changes: list[float] = [daily_change for daily_change, *_ in rows[1:]]
+        composition_changes: list[int] = [changes for _, changes, *_ in rows[1:]]
+        _, _, start_value, end_value = rows[0]
+        # The mean of consecutive changes telescopes to the overall change.
+        average_daily_change: float = (
+            (end_value - start_value) / len(daily_changes) if daily_changes else 0.0
+        )
+        cumulative_return: float = (
+            ((end_value - start_value) / start_value) * 100 if start_value else 0.0
+        )
 
         return SummaryMetricsResponse(
             cumulative_return=cumulative_return,
@@ -164,34 +214,20 @@ class IndexService:
     async def get_composition_change(
         db: AsyncSession, start_date: date, end_date: date
     ) -> dict[date, bool]:
-        composition_changes: dict[date, bool] = {}
-        compostition_date_ticker_id_map: dict[date, set[int]] = defaultdict(set)
+        """
+        Whether any stock ticker joined the index on each built date from
+        `start_date` up to `end_date`, read from the stored composition diffs.
+        The first date is the baseline the changes are relative to.
+        """
         result = await db.execute(
-            select(StockIndexTicker)
-            .join(StockIndex, StockIndex.id == StockIndexTicker.stock_index_id)
+            select(CompositionDiff.date, CompositionDiff.added_count > 0)
+            .join(StockIndex, StockIndex.id == CompositionDiff.stock_index_id)
             .where(StockIndex.name == settings.STOCK_INDEX_NAME)
-            .where(StockIndexTicker.date <= end_date)
-            .where(StockIndexTicker.date >= start_date)
-            .order_by(StockIndexTicker.date.desc())
+            .where(CompositionDiff.date >= start_date)
+            .where(CompositionDiff.date < end_date)
+            .order_by(CompositionDiff.date)
         )
-        for stock_idx_ticker in result.scalars().all():
-            compostition_date_ticker_id_map[stock_idx_ticker.date].add(
-                stock_idx_ticker.stock_ticker_id
-            )
-
-        prev_tickers: set[int] = set([])
-        while start_date < end_date:
-            if not prev_tickers:
-                prev_tickers = compostition_date_ticker_id_map.get(start_date, set([]))
-                start_date = start_date + timedelta(days=1)
-                continue
-            curr_tickers = compostition_date_ticker_id_map.get(start_date, set([]))
-            composition_changes[start_date] = (
-                len(curr_tickers.difference(prev_tickers)) > 0
-            )
-            start_date = start_date + timedelta(days=1)
-            prev_tickers = curr_tickers
-        return composition_changes
+        return dict(result.all()[1:])
 
     @staticmethod
     async def get_stock_index(db: AsyncSession, stock_index_name: str):
@@ -208,80 +244,511 @@ class IndexService:
         """
         Build an index for the specified stock index and date.
         """
-        stock_index = await IndexService.get_stock_index(
-            db=db, stock_index_name=stock_index_name
+        await IndexService.build_index_range(
+            db=db,
+            start_date=target_date,
+            end_date=target_date,
+            stock_index_name=stock_index_name,
+        )
+
+    @staticmethod
+    async def get_stock_indexes(
+        db: AsyncSession, stock_index_names: list[str] | None = None
+    ) -> list[StockIndex]:
+        """
+        Stock indexes with the given names, or every registered index.
+        """
+        query = select(StockIndex).order_by(StockIndex.id)
+        if stock_index_names is not None:
+            query = query.where(StockIndex.name.in_(stock_index_names))
+        result = await db.execute(query)
+        stock_indexes = result.scalars().all()
+        if stock_index_names is not None and len(stock_indexes) != len(
+            set(stock_index_names)
+        ):
+            raise ValueError("No stock index found for name")
+        return stock_indexes
+
+    @staticmethod
+    async def build_index_range(
+        db: AsyncSession, start_date: date, end_date: date, stock_index_name: str
+    ) -> int:
+        """
+        Build an index for every date with prices between `start_date` and
+        `end_date`. Returns the number of dates built.
+        """
+        built = await IndexService.build_indexes_range(
+            db=db,
+            start_date=start_date,
+            end_date=end_date,
+            stock_index_names=[stock_index_name],
         )
+        return built[stock_index_name]
 
-        index_strategy_factory = IndexStrategyFactory().get_strategy(
-            stock_index.strategy
+    @staticmethod
+    async def build_indexes_range(
+        db: AsyncSession,
+        start_date: date,
+        end_date: date,
+        stock_index_names: list[str] | None = None,
+        refresh_prices: bool = False,
+    ) -> dict[str, int]:
+        """
+        Build the given indexes, or every registered index, for each date with
+        prices between `start_date` and `end_date`. All indexes are evaluated
+        against one cached price matrix, reloaded from the database first when
+        `refresh_prices` is set, indexes sharing a strategy and ticker count
+        share its selection, and every composition and value is written in a
+        single transaction, replacing anything stored for the range.
+        Strategies only run on the dates an index rebalances on; between
+        rebalances the held constituents are rolled forward.
+        Returns the number of dates built per index name.
+        """
+        stock_indexes = await IndexService.get_stock_indexes(
+            db=db, stock_index_names=stock_index_names
+        )
+        prev_states = await IndexService.get_index_level_states(
+            db=db,
+            stock_index_ids=[stock_index.id for stock_index in stock_indexes],
+            before_date=start_date,
+        )
+        # The previous close of every index is the base its levels chain from.
+        matrix = await price_matrix_cache.get(
+            db=db,
+            start_date=min(
+                [
+                    start_date,
+                    *(state.rebalance_date for state in prev_states.values()),
+                ]
+            ),
+            end_date=end_date,
+            refresh=refresh_prices,
         )
-        selected_stock_ids = await index_strategy_factory(
-            db=db, top_n=stock_index.ticker_count, target_date=target_date
+        build_matrix = matrix.window(start_date, end_date)
+
+        held_constituents: dict[int, np.ndarray] = {}
+        rebalance_dates: dict[int, list[date]] = {}
+        for stock_index in stock_indexes:
+            prev_state = prev_states.get(stock_index.id)
+            if prev_state is not None and prev_state.stock_ticker_ids:
+                held_constituents[stock_index.id] = np.array(
+                    [
+                        matrix.ticker_positions[stock_ticker_id]
+                        for stock_ticker_id in prev_state.stock_ticker_ids
+                        if stock_ticker_id in matrix.ticker_positions
+                    ],
+                    dtype=np.int64,
+                )
+            rebalance_dates[stock_index.id] = (
+                RebalancePolicyFactory.get_rebalance_dates(
+                    rebalance_policy=stock_index.rebalance_policy,
+                    dates=build_matrix.dates,
+                    prev_date=prev_state.date
+                    if stock_index.id in held_constituents
+                    else None,
+                )
+            )
+        selection_keys = list(
+            dict.fromkeys(
+                (stock_index.strategy, stock_index.ticker_count)
+                for stock_index in stock_indexes
+            )
+        )
+        selection_dates = sorted(
+            set().union(*rebalance_dates.values()) if rebalance_dates else set()
+        )
+        selections = IndexService._select_constituents(
+            matrix=build_matrix.take(selection_dates), selection_keys=selection_keys
         )
+        index_stock_ticker_ids: dict[int, dict[date, list[int]]] = {}
+        index_performance_values: dict[int, dict[date, tuple[float, float]]] = {}
+        index_rebalance_dates: dict[int, set[date]] = {}
+        built: dict[str, int] = {}
+        for stock_index in stock_indexes:
+            selection = selections[(stock_index.strategy, stock_index.ticker_count)]
+            rebalance_policy_factory = RebalancePolicyFactory().get_policy(
+                stock_index.rebalance_policy
+            )
+            constituents, rebalanced = rebalance_policy_factory(
+                dates=build_matrix.dates,
+                selections={
+                    rebalance_date: selection[rebalance_date]
+                    for rebalance_date in rebalance_dates[stock_index.id]
+                },
+                held=held_constituents.get(stock_index.id),
+                top_n=stock_index.ticker_count,
+                buffer=stock_index.rebalance_buffer,
+            )
+            index_rebalance_dates[stock_index.id] = set(rebalanced)
+
+            performance_calculator_factory = (
+                PerformanceCalculatorFactory().get_calculator(
+                    stock_index.performance_calculation
+                )
+            )
+            index_performance_values[stock_index.id] = performance_calculator_factory(
+                matrix=matrix,
+                constituents=constituents,
+                rebalance_dates=index_rebalance_dates[stock_index.id],
+                prev_state=prev_states.get(stock_index.id),
+            )
+            index_stock_ticker_ids[stock_index.id] = {
+                target_date: matrix.stock_ticker_ids[columns].tolist()
+                for target_date, columns in constituents.items()
+            }
+            built[stock_index.name] = len(index_performance_values[stock_index.id])
 
         await IndexService._store_index_tickers(
             db=db,
-            stock_index_id=stock_index.id,
-            selected_stock_ids=selected_stock_ids,
-            target_date=target_date,
+            index_stock_ticker_ids=index_stock_ticker_ids,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        await IndexService._store_index_performance(
+            db=db,
+            index_performance_values=index_performance_values,
+            index_rebalance_dates=index_rebalance_dates,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        await db.execute(
+            delete(IndexDirtyDate)
+            .where(IndexDirtyDate.stock_index_id.in_(index_performance_values))
+            .where(IndexDirtyDate.date >= start_date)
+            .where(IndexDirtyDate.date <= end_date)
         )
+        await db.commit()
+        logger.info(
+            f"Built {len(built)} indexes for {len(build_matrix.dates)} dates between "
+            f"{start_date} and {end_date}."
+        )
+        return built
+
+    @staticmethod
+    def _select_constituents(
+        matrix: PriceMatrix, selection_keys: list[tuple[IndexStrategy, int]]
+    ) -> dict[tuple[IndexStrategy, int], dict[date, np.ndarray]]:
+        """
+        Run the strategy of every `(strategy, ticker count)` key over `matrix`.
+        """
+        selections: dict[tuple[IndexStrategy, int], dict[date, np.ndarray]] = {}
+        for strategy_type, top_n in selection_keys:
+            index_strategy_factory = IndexStrategyFactory().get_strategy(strategy_type)
+            selections[(strategy_type, top_n)] = index_strategy_factory(
+                matrix=matrix, top_n=top_n
+            )
+        return selections
 
-        performance_calculator_factory = PerformanceCalculatorFactory().get_calculator(
-            stock_index.performance_calculation
+    @staticmethod
+    async def _store_index_tickers(
+        db: AsyncSession,
+        index_stock_ticker_ids: dict[int, dict[date, list[int]]],
+        start_date: date,
+        end_date: date,
+    ):
+        """
+        Replay the selected stock ticker ids between `start_date` and `end_date`
+        into StockIndexMembership intervals, per stock index id. Only intervals
+        touching the range are read, and only the ones that changed are deleted
+        or upserted on (stock_index_id, stock_ticker_id, valid_from), so writes
+        follow membership changes instead of sessions.
+
+        The CompositionDiff of every rebuilt date, and of the first built date
+        after the range whose previous composition may have changed, is
+        upserted from the replayed interval bounds. Cached responses read from
+        those dates are invalidated on commit.
+        """
+        next_built_result = await db.execute(
+            select(IndexPerformance.stock_index_id, func.min(IndexPerformance.date))
+            .where(IndexPerformance.stock_index_id.in_(index_stock_ticker_ids))
+            .where(IndexPerformance.date > end_date)
+            .group_by(IndexPerformance.stock_index_id)
         )
-        index_performance_value = await performance_calculator_factory(
-            db=db, ticker_count=stock_index.ticker_count, target_date=target_date
+        next_built_dates = dict(next_built_result.all())
+        await IndexService._stage_response_invalidation(
+            db=db,
+            stock_index_ids=list(index_stock_ticker_ids),
+            start_date=start_date,
+            end_date=max([end_date, *next_built_dates.values()]),
         )
 
-        await IndexService._store_index_performance(
+        stale_ids: list[int] = []
+        records: list[dict] = []
+        diff_records: list[dict] = []
+        for stock_index_id, compositions in index_stock_ticker_ids.items():
+            await db.execute(
+                delete(CompositionDiff)
+                .where(CompositionDiff.stock_index_id == stock_index_id)
+                .where(CompositionDiff.date >= start_date)
+                .where(CompositionDiff.date <= end_date)
+                .where(CompositionDiff.date.not_in(compositions))
+            )
+            if not compositions:
+                continue
+            next_built_date = next_built_dates.get(stock_index_id)
+            query = (
+                select(
+                    StockIndexMembership.id,
+                    StockIndexMembership.stock_ticker_id,
+                    StockIndexMembership.valid_from,
+                    StockIndexMembership.valid_to,
+                )
+                .where(StockIndexMembership.stock_index_id == stock_index_id)
+                .where(
+                    or_(
+                        StockIndexMembership.valid_to.is_(None),
+                        StockIndexMembership.valid_to >= min(compositions),
+                    )
+                )
+            )
+            if next_built_date is not None:
+                query = query.where(StockIndexMembership.valid_from <= next_built_date)
+            result = await db.execute(query)
+            stored: dict[tuple[int, date, date | None], int] = {}
+            intervals: dict[int, list[MembershipInterval]] = defaultdict(list)
+            for membership_id, stock_ticker_id, valid_from, valid_to in result.all():
+                stored[(stock_ticker_id, valid_from, valid_to)] = membership_id
+                intervals[stock_ticker_id].append((valid_from, valid_to))
+
+            replayed_intervals = replay_memberships(
+                intervals=intervals,
+                compositions=compositions,
+                next_built_date=next_built_date,
+            )
+            replayed = {
+                (stock_ticker_id, valid_from, valid_to)
+                for stock_ticker_id, ticker_intervals in replayed_intervals.items()
+                for valid_from, valid_to in ticker_intervals
+            }
+            stale_ids.extend(
+                membership_id
+                for key, membership_id in stored.items()
+                if key not in replayed
+            )
+            records.extend(
+                {
+                    "stock_index_id": stock_index_id,
+                    "stock_ticker_id": stock_ticker_id,
+                    "valid_from": valid_from,
+                    "valid_to": valid_to,
+                }
+                for stock_ticker_id, valid_from, valid_to in sorted(
+                    replayed - stored.keys(), key=lambda key: (key[1], key[0])
+                )
+            )
+            diff_dates = sorted(compositions)
+            if next_built_date is not None:
+                diff_dates.append(next_built_date)
+            diff_records.extend(
+                {
+                    "stock_index_id": stock_index_id,
+                    "date": diff_date,
+                    "added_count": len(added),
+                    "removed_count": len(removed),
+                    "added_stock_ticker_ids": added,
+                    "removed_stock_ticker_ids": removed,
+                }
+                for diff_date, (added, removed) in composition_diffs(
+                    intervals=replayed_intervals, dates=diff_dates
+                ).items()
+            )
+
+        if stale_ids:
+            await db.execute(
+                delete(StockIndexMembership).where(
+                    StockIndexMembership.id.in_(stale_ids)
+                )
+            )
+        await bulk_upsert(
             db=db,
-            stock_index_id=stock_index.id,
-            value=index_performance_value,
-            target_date=target_date,
+            model=StockIndexMembership,
+            records=records,
+            index_elements=["stock_index_id", "stock_ticker_id", "valid_from"],
+        )
+        await bulk_upsert(
+            db=db,
+            model=CompositionDiff,
+            records=diff_records,
+            index_elements=["stock_index_id", "date"],
         )
 
     @staticmethod
-    async def _store_index_tickers(
+    async def _store_index_performance(
         db: AsyncSession,
-        stock_index_id: int,
-        selected_stock_ids: list[int],
-        target_date: date,
+        index_performance_values: dict[int, dict[date, tuple[float, float]]],
+        index_rebalance_dates: dict[int, set[date]],
+        start_date: date,
+        end_date: date,
     ):
         """
-        Store selected stocks in StockIndexTicker for the given index and date.
+        Upsert the calculated levels and divisors, flagged on the rebalance
+        dates, on (stock_index_id, date) and drop rows between `start_date` and
+        `end_date` that were not recalculated, per stock index id. Cached
+        responses read from the range are invalidated on commit.
         """
-        stock_index_tickers = [
-            StockIndexTicker(
-                date=target_date,
-                stock_ticker_id=stock_ticker_id,
-                stock_index_id=stock_index_id,
+        await IndexService._stage_response_invalidation(
+            db=db,
+            stock_index_ids=list(index_performance_values),
+            start_date=start_date,
+            end_date=end_date,
+        )
+        for stock_index_id, values in index_performance_values.items():
+            await db.execute(
+                delete(IndexPerformance)
+                .where(IndexPerformance.stock_index_id == stock_index_id)
+                .where(IndexPerformance.date >= start_date)
+                .where(IndexPerformance.date <= end_date)
+                .where(IndexPerformance.date.not_in(values))
             )
-            for stock_ticker_id in selected_stock_ids
+        records = [
+            {
+                "stock_index_id": stock_index_id,
+                "date": target_date,
+                "value": value,
+                "divisor": divisor,
+                "rebalanced": target_date in index_rebalance_dates[stock_index_id],
+            }
+            for stock_index_id, values in index_performance_values.items()
+            for target_date, (value, divisor) in values.items()
         ]
-        db.add_all(stock_index_tickers)
-        await db.commit()
+        await bulk_upsert(
+            db=db,
+            model=IndexPerformance,
+            records=records,
+            index_elements=["stock_index_id", "date"],
+        )
 
     @staticmethod
-    async def _store_index_performance(
-        db: AsyncSession, stock_index_id: int, value: float, target_date: date
+    async def _stage_response_invalidation(
+        db: AsyncSession, stock_index_ids: list[int], start_date: date, end_date: date
     ):
         """
-        Store selected stocks in Store Index performance for the given index and date.
+        Invalidate the cached responses of the stock indexes between
+        `start_date` and `end_date` once the session commits.
         """
-        index_performance = IndexPerformance(
-            stock_index_id=stock_index_id,
-            date=target_date,
-            value=value,
+        result = await db.execute(
+            select(StockIndex.name).where(StockIndex.id.in_(stock_index_ids))
+        )
+        stage_response_invalidation(
+            db=db,
+            stock_index_names=set(result.scalars().all()),
+            start_date=start_date,
+            end_date=end_date,
         )
-        db.add(index_performance)
-        await db.commit()
+
+    @staticmethod
+    async def get_index_level_states(
+        db: AsyncSession, stock_index_ids: list[int], before_date: date
+    ) -> dict[int, IndexLevelState]:
+        """
+        Last stored level, divisor and constituents before `before_date`, and
+        the last rebalance up to it, per stock index id. Indexes without a
+        chain-linked history are left out.
+        """
+        latest = (
+            select(
+                IndexPerformance.stock_index_id,
+                func.max(IndexPerformance.date).label("date"),
+            )
+            .where(IndexPerformance.stock_index_id.in_(stock_index_ids))
+            .where(IndexPerformance.date < before_date)
+            .group_by(IndexPerformance.stock_index_id)
+            .subquery()
+        )
+        performance_result = await db.execute(
+            select(
+                IndexPerformance.stock_index_id,
+                IndexPerformance.date,
+                IndexPerformance.value,
+                IndexPerformance.divisor,
+            ).join(
+                latest,
+                and_(
+                    latest.c.stock_index_id == IndexPerformance.stock_index_id,
+                    latest.c.date == IndexPerformance.date,
+                ),
+            )
+        )
+        rebalance_result = await db.execute(
+            select(IndexPerformance.stock_index_id, func.max(IndexPerformance.date))
+            .join(
+                latest,
+                and_(
+                    latest.c.stock_index_id == IndexPerformance.stock_index_id,
+                    IndexPerformance.date <= latest.c.date,
+                ),
+            )
+            .where(IndexPerformance.rebalanced)
+            .group_by(IndexPerformance.stock_index_id)
+        )
+        rebalance_dates = dict(rebalance_result.all())
+        tickers_result = await db.execute(
+            select(
+                StockIndexMembership.stock_index_id,
+                StockIndexMembership.stock_ticker_id,
+            )
+            .join(
+                latest,
+                and_(
+                    latest.c.stock_index_id == StockIndexMembership.stock_index_id,
+                    _is_member_on(latest.c.date),
+                ),
+            )
+            .order_by(StockIndexMembership.stock_ticker_id)
+        )
+        stock_ticker_ids: dict[int, list[int]] = defaultdict(list)
+        for stock_index_id, stock_ticker_id in tickers_result.all():
+            stock_ticker_ids[stock_index_id].append(stock_ticker_id)
+
+        return {
+            stock_index_id: IndexLevelState(
+                date=state_date,
+                value=value,
+                divisor=divisor,
+                stock_ticker_ids=stock_ticker_ids[stock_index_id],
+                rebalance_date=rebalance_dates.get(stock_index_id, state_date),
+            )
+            for stock_index_id, state_date, value, divisor in performance_result.all()
+            if divisor is not None
+        }
+
+    @staticmethod
+    async def get_calculated_dates(
+        db: AsyncSession, stock_index_ids: list[int], start_date: date, end_date: date
+    ) -> dict[int, set[date]]:
+        """
+        Dates between `start_date` and `end_date` that already have an index
+        value and are not dirty, per stock index id.
+        """
+        result = await db.execute(
+            select(IndexPerformance.stock_index_id, IndexPerformance.date)
+            .where(IndexPerformance.stock_index_id.in_(stock_index_ids))
+            .where(IndexPerformance.date >= start_date)
+            .where(IndexPerformance.date <= end_date)
+        )
+        calculated_dates: dict[int, set[date]] = {
+            stock_index_id: set() for stock_index_id in stock_index_ids
+        }
+        for stock_index_id, calculated_date in result.all():
+            calculated_dates[stock_index_id].add(calculated_date)
+
+        dirty_result = await db.execute(
+            select(IndexDirtyDate.stock_index_id, IndexDirtyDate.date)
+            .where(IndexDirtyDate.stock_index_id.in_(stock_index_ids))
+            .where(IndexDirtyDate.date >= start_date)
+            .where(IndexDirtyDate.date <= end_date)
+        )
+        for stock_index_id, dirty_date in dirty_result.all():
+            calculated_dates[stock_index_id].discard(dirty_date)
+        return calculated_dates
 
     @staticmethod
     async def is_index_calculated_and_tickers_present(
         db: AsyncSession, stock_index_name: str, target_date: date
     ) -> bool:
         """
-        Check if index calculation and tickers are already added for a specific stock index and date.
+        Check if index calculation and tickers are already added for a specific stock index and date,
+        and no price of the date changed since.
         """
         stock_index = await IndexService.get_stock_index(
             db=db, stock_index_name=stock_index_name
@@ -296,41 +763,228 @@ class IndexService:
         is_performance_calculated = performance_result.scalars().first() is not None
 
         tickers_result = await db.execute(
-            select(StockIndexTicker).where(
-                StockIndexTicker.stock_index_id == stock_index.id,
-                StockIndexTicker.date == target_date,
+            select(StockIndexMembership).where(
+                StockIndexMembership.stock_index_id == stock_index.id,
+                _is_member_on(target_date),
             )
         )
         are_tickers_present = tickers_result.scalars().first() is not None
 
-        return are_tickers_present and is_performance_calculated
+        dirty_result = await db.execute(
+            select(IndexDirtyDate).where(
+                IndexDirtyDate.stock_index_id == stock_index.id,
+                IndexDirtyDate.date == target_date,
+            )
+        )
+        is_dirty = dirty_result.scalars().first() is not None
+
+        return are_tickers_present and is_performance_calculated and not is_dirty
+
+    @staticmethod
+    async def mark_dates_dirty(db: AsyncSession, dates: set[date]):
+        """
+        Mark every registered index dirty on `dates`, in the caller's transaction.
+        Cached responses read from the dates, which show their prices, are
+        invalidated on commit.
+        """
+        if not dates:
+            return
+        stage_response_invalidation(
+            db=db, stock_index_names=None, start_date=min(dates), end_date=max(dates)
+        )
+        result = await db.execute(select(StockIndex.id))
+        await bulk_upsert(
+            db=db,
+            model=IndexDirtyDate,
+            records=[
+                {"stock_index_id": stock_index_id, "date": dirty_date}
+                for stock_index_id in result.scalars().all()
+                for dirty_date in dates
+            ],
+            index_elements=["stock_index_id", "date"],
+            update_columns=[],
+        )
+
+    @staticmethod
+    async def recompute_dirty_indexes(db: AsyncSession) -> dict[str, int]:
+        """
+        Rebuild every index from its earliest dirty date through its last built
+        date, since each later level chains from the dirty one. Indexes sharing
+        a range are rebuilt in one pass, on prices reloaded from the database:
+        the dirty prices may have been written by another process, which the
+        cached price matrix never sees. Returns the number of dates rebuilt per
+        index name.
+        """
+        dirty_result = await db.execute(
+            select(
+                IndexDirtyDate.stock_index_id,
+                func.min(IndexDirtyDate.date),
+                func.max(IndexDirtyDate.date),
+            ).group_by(IndexDirtyDate.stock_index_id)
+        )
+        dirty_ranges = {
+            stock_index_id: (first_date, last_date)
+            for stock_index_id, first_date, last_date in dirty_result.all()
+        }
+        if not dirty_ranges:
+            return {}
+        built_result = await db.execute(
+            select(IndexPerformance.stock_index_id, func.max(IndexPerformance.date))
+            .where(IndexPerformance.stock_index_id.in_(dirty_ranges))
+            .group_by(IndexPerformance.stock_index_id)
+        )
+        last_built_dates = dict(built_result.all())
+        stock_indexes = await IndexService.get_stock_indexes(db=db)
+
+        ranges: dict[tuple[date, date], list[str]] = defaultdict(list)
+        for stock_index in stock_indexes:
+            if stock_index.id not in dirty_ranges:
+                continue
+            first_date, last_date = dirty_ranges[stock_index.id]
+            last_built_date = last_built_dates.get(stock_index.id)
+            if last_built_date is not None:
+                last_date = max(last_date, last_built_date)
+            ranges[(first_date, last_date)].append(stock_index.name)
+
+        rebuilt: dict[str, int] = {}
+        for (start_date, end_date), stock_index_names in sorted(ranges.items()):
+            rebuilt.update(
+                await IndexService.build_indexes_range(
+                    db=db,
+                    start_date=start_date,
+                    end_date=end_date,
+                    stock_index_names=stock_index_names,
+                    refresh_prices=True,
+                )
+            )
+        return rebuilt
 
 
 async def execute_index_creator(
     db: AsyncSession = Depends(get_db),
     stock_index_name: str | None = None,
     target_date: date | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
 ):
+    """
+    Build `stock_index_name`, or every registered index, for `target_date` or
+    for every session between `start_date` and `end_date` when a range is
+    given. The build starts at the first session any index is missing.
+    """
     target_date = (
         datetime.now(tz=UTC).date()
         if target_date is None
         else target_date
     )
-    stock_index_name = (
-        settings.STOCK_INDEX_NAME if stock_index_name is None else stock_index_name
+    if start_date is None or end_date is None:
+        start_date = end_date = target_date
+    stock_indexes = await IndexService.get_stock_indexes(
+        db=db,
+        stock_index_names=None if stock_index_name is None else [stock_index_name],
     )
-
-    if not (
-        await IndexService.is_index_calculated_and_tickers_present(
-            db=db, stock_index_name=stock_index_name, target_date=target_date
-        )
-    ):
-        await IndexService.build_index(
-            db=db, target_date=target_date, stock_index_name=stock_index_name
+    stock_index_names = [stock_index.name for stock_index in stock_indexes]
+    calculated_dates = await IndexService.get_calculated_dates(
+        db=db,
+        stock_index_ids=[stock_index.id for stock_index in stock_indexes],
+        start_date=start_date,
+        end_date=end_date,
+    )
+    missing_sessions = [
+        session_date
+        for session_date in get_trading_calendar().sessions(start_date, end_date)
+        if any(session_date not in dates for dates in calculated_dates.values())
+    ]
+    if not missing_sessions:
+        logger.debug(
+            f"Indexes {stock_index_names} already built between "
+            f"{start_date} and {end_date}."
         )
+        return
+
+    await IndexService.build_indexes_range(
+        db=db,
+        start_date=missing_sessions[0],
+        end_date=end_date,
+        stock_index_names=stock_index_names,
+    )
+
+
+async def execute_index_recompute(db: AsyncSession = Depends(get_db)):
+    rebuilt = await IndexService.recompute_dirty_indexes(db=db)
+    logger.debug(f"Recomputed dirty index dates: {rebuilt}")
 
 
-async def fetch_all_stock_index_ticker(db: AsyncSession) -> list[StockIndexResponse]:
-    query = select(StockIndexTicker)
-    res = await db.execute(query)
-    return res.scalars().all()
+def _stock_index_tickers_query(
+    tickers: list[str] | None, start_date: date | None, end_date: date | None
+):
+    """
+    Membership intervals in id order, filtered to `tickers` and the intervals
+    overlapping the dates between `start_date` and `end_date`. Rows hold the
+    `StockIndexResponse` fields.
+    """
+    query = select(
+        StockIndexMembership.id,
+        StockIndexMembership.stock_index_id,
+        StockIndexMembership.stock_ticker_id,
+        StockIndexMembership.valid_from,
+        StockIndexMembership.valid_to,
+    ).order_by(StockIndexMembership.id)
+    if tickers:
+        query = query.join(
+            StockTicker, StockTicker.id == StockIndexMembership.stock_ticker_id
+        ).where(StockTicker.ticker.in_(tickers))
+    if start_date is not None:
+        query = query.where(
+            or_(
+                StockIndexMembership.valid_to.is_(None),
+                StockIndexMembership.valid_to > start_date,
+            )
+        )
+    if end_date is not None:
+        query = query.where(StockIndexMembership.valid_from <= end_date)
+    return query
+
+
+async def fetch_stock_index_ticker_rows(
+    db: AsyncSession,
+    tickers: list[str] | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cursor: str | None = None,
+    limit: int = settings.PAGE_SIZE,
+) -> tuple[list[Row], str | None]:
+    """
+    One page of at most `limit` membership interval rows after `cursor`,
+    seeking on the id of the last row of the previous page, and the cursor of
+    the next page.
+    """
+    query = _stock_index_tickers_query(
+        tickers=tickers, start_date=start_date, end_date=end_date
+    )
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, [int])
+        query = query.where(StockIndexMembership.id > last_id)
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    next_cursor = encode_cursor((rows[limit - 1].id,)) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+async def stream_stock_index_tickers(
+    db: AsyncSession,
+    tickers: list[str] | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> AsyncIterator[list[Row]]:
+    """
+    Every matching membership interval row, read through a server-side cursor
+    in batches of `settings.STREAM_BATCH_SIZE` rows.
+    """
+    result = await db.stream(
+        _stock_index_tickers_query(
+            tickers=tickers, start_date=start_date, end_date=end_date
+        ).execution_options(yield_per=settings.STREAM_BATCH_SIZE)
+    )
+    async for rows in result.partitions():
+        yield rows
@@ -0,0 +1,390 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from indexes.enums import IndexStrategy, PerformanceCalculation, RebalancePolicy
+from indexes.models import (
+    IndexDirtyDate,
+    IndexPerformance,
+    StockIndex,
+    StockIndexMembership,
+)
+from indexes.services import IndexService, execute_index_creator
+from prices.models import DailyPrices
+from prices.services import upsert_daily_prices
+from stocks.models import StockTicker
+
+SESSIONS = [date(2024, 3, 4), date(2024, 3, 5), date(2024, 3, 6)]
+
+
+async def seed_index(db: AsyncSession) -> dict[str, int]:
+    for symbol in ["AAA", "BBB", "CCC"]:
+        db.add(StockTicker(ticker=symbol, name=symbol, exchange="NASDAQ"))
+    db.add(
+        StockIndex(
+            name="top_2",
+            strategy=IndexStrategy.MARKET_CAP,
+            performance_calculation=PerformanceCalculation.EQUAL_WEIGHTED,
+            ticker_count=2,
+        )
+    )
+    await db.commit()
+    result = await db.execute(select(StockTicker.ticker, StockTicker.id))
+    ticker_ids = dict(result.all())
+    # CCC overtakes AAA on the last session.
+    market_caps = {
+        "AAA": [300.0, 300.0, 100.0],
+        "BBB": [200.0, 200.0, 200.0],
+        "CCC": [100.0, 100.0, 400.0],
+    }
+    for symbol, caps in market_caps.items():
+        for session_date, market_cap in zip(SESSIONS, caps):
+            db.add(
+                DailyPrices(
+                    stock_ticker_id=ticker_ids[symbol],
+                    date=session_date,
+                    close_price=market_cap / 10,
+                    market_cap=market_cap,
+                )
+            )
+    await db.commit()
+    return ticker_ids
+
+
+async def stored_index(db: AsyncSession):
+    memberships = await db.execute(
+        select(
+            StockIndexMembership.stock_ticker_id,
+            StockIndexMembership.valid_from,
+            StockIndexMembership.valid_to,
+        )
+    )
+    performance = await db.execute(
+        select(IndexPerformance.date, IndexPerformance.value)
+    )
+    values = dict(performance.all())
+    members: dict[date, set[int]] = {}
+    for stock_ticker_id, valid_from, valid_to in memberships.all():
+        for member_date in values:
+            if valid_from <= member_date and (
+                valid_to is None or member_date < valid_to
+            ):
+                members.setdefault(member_date, set()).add(stock_ticker_id)
+    return members, values
+
+
+async def stored_levels(db: AsyncSession):
+    result = await db.execute(
+        select(
+            IndexPerformance.stock_index_id,
+            IndexPerformance.date,
+            IndexPerformance.value,
+            IndexPerformance.divisor,
+        )
+    )
+    return {
+        (stock_index_id, level_date): (value, divisor)
+        for stock_index_id, level_date, value, divisor in result.all()
+    }
+
+
+@pytest.mark.asyncio
+async def test_build_index_range(test_db: AsyncSession):
+    ticker_ids = await seed_index(test_db)
+
+    built = await IndexService.build_index_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_name="top_2",
+    )
+    # Rebuilding the range replaces the stored rows.
+    await IndexService.build_index_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_name="top_2",
+    )
+    members, values = await stored_index(test_db)
+
+    assert built == 3
+    assert members == {
+        SESSIONS[0]: {ticker_ids["AAA"], ticker_ids["BBB"]},
+        SESSIONS[1]: {ticker_ids["AAA"], ticker_ids["BBB"]},
+        SESSIONS[2]: {ticker_ids["CCC"], ticker_ids["BBB"]},
+    }
+    # AAA falls from 30 to 10 while held, so the level drops by a third.
+    assert values == {
+        SESSIONS[0]: 1000.0,
+        SESSIONS[1]: 1000.0,
+        SESSIONS[2]: pytest.approx(2000.0 / 3),
+    }
+
+
+@pytest.mark.asyncio
+async def test_execute_index_creator_builds_missing_sessions(test_db: AsyncSession):
+    await seed_index(test_db)
+    await IndexService.build_index(
+        db=test_db, target_date=SESSIONS[0], stock_index_name="top_2"
+    )
+
+    await execute_index_creator(
+        db=test_db,
+        stock_index_name="top_2",
+        start_date=date(2024, 3, 2),
+        end_date=SESSIONS[-1],
+    )
+    members, values = await stored_index(test_db)
+
+    assert sorted(values) == SESSIONS
+    assert all(len(member_ids) == 2 for member_ids in members.values())
+
+
+@pytest.mark.asyncio
+async def test_execute_index_creator_builds_every_index(test_db: AsyncSession):
+    ticker_ids = await seed_index(test_db)
+    for name, ticker_count in [("top_1", 1), ("top_3", 3)]:
+        test_db.add(
+            StockIndex(
+                name=name,
+                strategy=IndexStrategy.MARKET_CAP,
+                performance_calculation=PerformanceCalculation.EQUAL_WEIGHTED,
+                ticker_count=ticker_count,
+            )
+        )
+    await test_db.commit()
+
+    await execute_index_creator(
+        db=test_db, start_date=SESSIONS[0], end_date=SESSIONS[-1]
+    )
+    result = await test_db.execute(
+        select(StockIndex.name, IndexPerformance.date, IndexPerformance.value).join(
+            StockIndex, StockIndex.id == IndexPerformance.stock_index_id
+        )
+    )
+    values = {(name, value_date): value for name, value_date, value in result.all()}
+    memberships = await test_db.execute(
+        select(
+            StockIndexMembership.stock_ticker_id,
+            StockIndexMembership.valid_from,
+            StockIndexMembership.valid_to,
+        )
+        .join(StockIndex, StockIndex.id == StockIndexMembership.stock_index_id)
+        .where(StockIndex.name == "top_1")
+        .order_by(StockIndexMembership.valid_from)
+    )
+
+    assert len(values) == 9
+    assert values[("top_1", SESSIONS[2])] == pytest.approx(1000.0 / 3)
+    assert values[("top_3", SESSIONS[2])] == pytest.approx(16000.0 / 9)
+    # Memberships are intervals over the built sessions; CCC's is still open.
+    assert memberships.all() == [
+        (ticker_ids["AAA"], SESSIONS[0], SESSIONS[2]),
+        (ticker_ids["CCC"], SESSIONS[2], None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_daily_builds_chain_from_previous_state(test_db: AsyncSession):
+    await seed_index(test_db)
+    test_db.add(
+        StockIndex(
+            name="cap_weighted",
+            strategy=IndexStrategy.MARKET_CAP,
+            performance_calculation=PerformanceCalculation.MARKET_CAP_WEIGHTED,
+            ticker_count=2,
+        )
+    )
+    await test_db.commit()
+    names = ["top_2", "cap_weighted"]
+
+    await IndexService.build_indexes_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_names=names,
+    )
+    fast_forward = await stored_levels(test_db)
+    for session_date in SESSIONS[1:]:
+        await IndexService.build_indexes_range(
+            db=test_db,
+            start_date=session_date,
+            end_date=session_date,
+            stock_index_names=names,
+        )
+    incremental = await stored_levels(test_db)
+    cap_weighted = await test_db.execute(
+        select(IndexPerformance.value, IndexPerformance.divisor)
+        .join(StockIndex, StockIndex.id == IndexPerformance.stock_index_id)
+        .where(StockIndex.name == "cap_weighted")
+        .order_by(IndexPerformance.date)
+    )
+    cap_weighted = cap_weighted.all()
+
+    assert incremental.keys() == fast_forward.keys()
+    for key, (value, divisor) in fast_forward.items():
+        assert incremental[key] == (pytest.approx(value), pytest.approx(divisor))
+    # Held AAA + BBB fall from 500 to 300; the divisor absorbs CCC joining.
+    assert [value for value, _ in cap_weighted] == pytest.approx(
+        [1000.0, 1000.0, 600.0]
+    )
+    assert cap_weighted[-1][1] == pytest.approx(600.0 / 600.0)
+
+
+@pytest.mark.asyncio
+async def test_price_corrections_recompute_dirty_days(test_db: AsyncSession):
+    ticker_ids = await seed_index(test_db)
+    await IndexService.build_index_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_name="top_2",
+    )
+
+    # BBB's close on the second session is corrected from 20 to 40.
+    await upsert_daily_prices(
+        db=test_db,
+        records=[
+            {
+                "stock_ticker_id": ticker_ids["BBB"],
+                "date": SESSIONS[1],
+                "close_price": 40.0,
+                "market_cap": 200.0,
+            }
+        ],
+    )
+    await test_db.commit()
+    assert not await IndexService.is_index_calculated_and_tickers_present(
+        db=test_db, stock_index_name="top_2", target_date=SESSIONS[1]
+    )
+
+    rebuilt = await IndexService.recompute_dirty_indexes(db=test_db)
+    _, values = await stored_index(test_db)
+    dirty_dates = await test_db.execute(select(IndexDirtyDate))
+
+    # Only the corrected session and the one chained after it are rebuilt.
+    assert rebuilt == {"top_2": 2}
+    assert dirty_dates.scalars().all() == []
+    assert values[SESSIONS[0]] == 1000.0
+    assert values[SESSIONS[1]] == pytest.approx(1500.0)
+    assert values[SESSIONS[2]] == pytest.approx(1500.0 * (10.0 / 30 + 0.5) / 2)
+
+
+@pytest.mark.asyncio
+async def test_dirty_days_are_recomputed_from_prices_written_elsewhere(
+    test_db: AsyncSession,
+):
+    ticker_ids = await seed_index(test_db)
+    await IndexService.build_index_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_name="top_2",
+    )
+
+    # Another process corrects BBB's close on the second session and marks the
+    # date dirty; the cached price matrix never sees the write.
+    await test_db.execute(
+        update(DailyPrices)
+        .where(DailyPrices.stock_ticker_id == ticker_ids["BBB"])
+        .where(DailyPrices.date == SESSIONS[1])
+        .values(close_price=40.0)
+    )
+    await IndexService.mark_dates_dirty(db=test_db, dates={SESSIONS[1]})
+    await test_db.commit()
+
+    await IndexService.recompute_dirty_indexes(db=test_db)
+    _, values = await stored_index(test_db)
+
+    assert values[SESSIONS[1]] == pytest.approx(1500.0)
+
+
+@pytest.mark.asyncio
+async def test_weekly_rebalance_rolls_constituents_between_rebalances(
+    test_db: AsyncSession,
+):
+    ticker_ids = await seed_index(test_db)
+    test_db.add(
+        StockIndex(
+            name="weekly_top_2",
+            strategy=IndexStrategy.MARKET_CAP,
+            performance_calculation=PerformanceCalculation.EQUAL_WEIGHTED,
+            ticker_count=2,
+            rebalance_policy=RebalancePolicy.WEEKLY,
+        )
+    )
+    await test_db.commit()
+
+    for session_date in SESSIONS:
+        await IndexService.build_index(
+            db=test_db, target_date=session_date, stock_index_name="weekly_top_2"
+        )
+    members, values = await stored_index(test_db)
+
+    # CCC overtakes AAA mid-week, but the index keeps its Monday selection.
+    assert members == {
+        session_date: {ticker_ids["AAA"], ticker_ids["BBB"]}
+        for session_date in SESSIONS
+    }
+    assert values[SESSIONS[2]] == pytest.approx(1000.0 * (10.0 / 30 + 1.0) / 2)
+
+
+@pytest.mark.asyncio
+async def test_weekly_equal_weights_drift_between_rebalances(test_db: AsyncSession):
+    ticker_ids = await seed_index(test_db)
+    test_db.add(
+        StockIndex(
+            name="weekly_top_2",
+            strategy=IndexStrategy.MARKET_CAP,
+            performance_calculation=PerformanceCalculation.EQUAL_WEIGHTED,
+            ticker_count=2,
+            rebalance_policy=RebalancePolicy.WEEKLY,
+        )
+    )
+    # BBB doubles on Tuesday and falls back on Wednesday.
+    await test_db.execute(
+        update(DailyPrices)
+        .where(DailyPrices.stock_ticker_id == ticker_ids["BBB"])
+        .where(DailyPrices.date == SESSIONS[1])
+        .values(close_price=40.0)
+    )
+    await test_db.commit()
+    names = ["top_2", "weekly_top_2"]
+
+    await IndexService.build_indexes_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_names=names,
+    )
+    fast_forward = await stored_levels(test_db)
+    for session_date in SESSIONS[1:]:
+        await IndexService.build_indexes_range(
+            db=test_db,
+            start_date=session_date,
+            end_date=session_date,
+            stock_index_names=names,
+        )
+    incremental = await stored_levels(test_db)
+    result = await test_db.execute(
+        select(StockIndex.name, IndexPerformance.date, IndexPerformance.value).join(
+            StockIndex, StockIndex.id == IndexPerformance.stock_index_id
+        )
+    )
+    values = {(name, value_date): value for name, value_date, value in result.all()}
+
+    assert incremental.keys() == fast_forward.keys()
+    for key, (value, divisor) in fast_forward.items():
+        assert incremental[key] == (pytest.approx(value), pytest.approx(divisor))
+    assert values[("weekly_top_2", SESSIONS[1])] == pytest.approx(1500.0)
+    # Held since Monday, BBB weighs 2/3 after its rise and gives it all back.
+    assert values[("weekly_top_2", SESSIONS[2])] == pytest.approx(
+        1000.0 * (10.0 / 30 + 20.0 / 20) / 2
+    )
+    # Rebalanced to equal weights on Tuesday, AAA's fall hurts the daily index more.
+    assert values[("top_2", SESSIONS[2])] == pytest.approx(
+        1500.0 * (10.0 / 30 + 20.0 / 40) / 2
+    )
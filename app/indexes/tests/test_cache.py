@@ -0,0 +1,100 @@
+from datetime import date
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from indexes import cache, paths
+from indexes.cache import CachedResponse, index_response_cache, ResponseCache
+from indexes.routers import router
+from indexes.services import IndexService, settings
+from indexes.tests.test_build import SESSIONS, seed_index
+
+
+def cached(body: bytes, start_date: date, end_date: date) -> CachedResponse:
+    return CachedResponse(
+        body=body, stock_index_name="top_2", start_date=start_date, end_date=end_date
+    )
+
+
+def test_cache_evicts_least_recently_used_and_expired_entries(monkeypatch):
+    response_cache = ResponseCache(max_entries=2, max_bytes=10)
+    response_cache.put(("a", "top_2", ()), cached(b"aaaa", *SESSIONS[:2]), 0)
+    response_cache.put(("b", "top_2", ()), cached(b"bbbb", *SESSIONS[:2]), 0)
+    assert response_cache.get(("a", "top_2", ())) is not None
+
+    # Over the byte limit, "b" is the least recently used entry.
+    response_cache.put(("c", "top_2", ()), cached(b"cccc", *SESSIONS[:2]), 0)
+    assert response_cache.get(("b", "top_2", ())) is None
+
+    now = cache.time.monotonic()
+    monkeypatch.setattr(
+        cache.time,
+        "monotonic",
+        lambda: now + settings.INDEX_RESPONSE_CACHE_TTL_SECONDS + 1,
+    )
+    assert response_cache.get(("a", "top_2", ())) is None
+    stats = response_cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (1, 2, 1)
+    assert stats.entries == 1 and stats.bytes == 4
+
+
+def test_invalidation_drops_overlapping_entries_only():
+    response_cache = ResponseCache(max_entries=10, max_bytes=100)
+    response_cache.put(("a", "top_2", ()), cached(b"a", SESSIONS[0], SESSIONS[0]), 0)
+    response_cache.put(("b", "top_2", ()), cached(b"b", SESSIONS[1], SESSIONS[2]), 0)
+    generation = response_cache.generation
+
+    response_cache.invalidate({"top_2"}, SESSIONS[2], SESSIONS[2])
+    response_cache.invalidate({"other"}, SESSIONS[0], SESSIONS[2])
+    # A response read before an invalidation is not cached after it.
+    response_cache.put(("c", "top_2", ()), cached(b"c", *SESSIONS[:2]), generation)
+
+    assert response_cache.get(("a", "top_2", ())) is not None
+    assert response_cache.get(("b", "top_2", ())) is None
+    assert response_cache.get(("c", "top_2", ())) is None
+
+
+@pytest.mark.asyncio
+async def test_responses_are_cached_until_a_build_writes_their_dates(
+    test_db: AsyncSession, monkeypatch
+):
+    monkeypatch.setattr(settings, "STOCK_INDEX_NAME", "top_2")
+    await seed_index(test_db)
+    await IndexService.build_index_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_name="top_2",
+    )
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    url = f"{paths.base}{paths.performance}"
+    params = {"start_date": SESSIONS[0], "end_date": SESSIONS[-1]}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        first = await client.get(url, params=params)
+        not_modified = await client.get(
+            url, params=params, headers={"If-None-Match": first.headers["ETag"]}
+        )
+        await IndexService.build_index(
+            db=test_db, target_date=SESSIONS[-1], stock_index_name="top_2"
+        )
+        # The rebuilt levels are read again, and keep the ETag of equal content.
+        rebuilt = await client.get(
+            url, params=params, headers={"If-None-Match": first.headers["ETag"]}
+        )
+        stats = await client.get(f"{paths.base}{paths.cache_stats}")
+
+    assert first.status_code == 200
+    assert [row["index_value"] for row in first.json()][0] == 1000.0
+    assert not_modified.status_code == 304
+    assert rebuilt.status_code == 304
+    assert (stats.json()["hits"], stats.json()["misses"]) == (1, 2)
+    assert stats.json()["invalidations"] == 1
+    assert index_response_cache.stats().entries == 1
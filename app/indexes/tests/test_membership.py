@@ -0,0 +1,52 @@
+from datetime import date
+
+from indexes.membership import replay_memberships
+
+DATES = [date(2024, 3, day) for day in range(4, 9)]
+
+
+def test_replay_opens_and_closes_intervals_on_changes():
+    replayed = replay_memberships(
+        intervals={},
+        compositions={
+            DATES[0]: [1, 2],
+            DATES[1]: [1, 2],
+            DATES[2]: [2, 3],
+            DATES[3]: [1, 2],
+        },
+        next_built_date=None,
+    )
+
+    assert replayed == {
+        1: [(DATES[0], DATES[2]), (DATES[3], None)],
+        2: [(DATES[0], None)],
+        3: [(DATES[2], DATES[3])],
+    }
+
+
+def test_replay_rebuilt_range_merges_with_stored_neighbours():
+    stored = {
+        1: [(DATES[0], None)],
+        2: [(DATES[0], DATES[2])],
+        3: [(DATES[2], None)],
+    }
+
+    # Rebuilding the unchanged middle dates leaves the intervals as stored.
+    assert (
+        replay_memberships(
+            intervals=stored,
+            compositions={DATES[1]: [1, 2], DATES[2]: [1, 3]},
+            next_built_date=DATES[3],
+        )
+        == stored
+    )
+    # Ticker 2 now stays a member on DATES[2] and leaves with the later dates.
+    assert replay_memberships(
+        intervals=stored,
+        compositions={DATES[2]: [1, 2]},
+        next_built_date=DATES[3],
+    ) == {
+        1: [(DATES[0], None)],
+        2: [(DATES[0], DATES[3])],
+        3: [(DATES[3], None)],
+    }
@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from indexes.models import CompositionDiff
+from indexes.services import IndexService, settings
+from indexes.tests.test_build import SESSIONS, seed_index
+
+
+@pytest.fixture
+async def built_index(test_db: AsyncSession, monkeypatch):
+    monkeypatch.setattr(settings, "STOCK_INDEX_NAME", "top_2")
+    await seed_index(test_db)
+    await IndexService.build_index_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_name="top_2",
+    )
+    return test_db
+
+
+@pytest.mark.asyncio
+async def test_summary_metrics_over_range(built_index: AsyncSession):
+    summary = await IndexService.get_summary_metrics(
+        db=built_index, start_date=SESSIONS[0], end_date=SESSIONS[-1]
+    )
+
+    assert summary.daily_changes == pytest.approx([0.0, -1000.0 / 3])
+    assert summary.average_daily_change == pytest.approx(-500.0 / 3)
+    assert summary.cumulative_return == pytest.approx(-100.0 / 3)
+    # CCC joins on the last session.
+    assert summary.composition_changes == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_summary_metrics_of_single_session(built_index: AsyncSession):
+    summary = await IndexService.get_summary_metrics(
+        db=built_index, start_date=SESSIONS[1], end_date=SESSIONS[1]
+    )
+
+    assert summary.daily_changes == []
+    assert summary.average_daily_change == 0.0
+    assert summary.cumulative_return == 0.0
+    assert summary.composition_changes == []
+
+
+@pytest.mark.asyncio
+async def test_composition_change_reads_stored_diffs(built_index: AsyncSession):
+    result = await built_index.execute(
+        select(
+            CompositionDiff.date,
+            CompositionDiff.added_count,
+            CompositionDiff.removed_count,
+        ).order_by(CompositionDiff.date)
+    )
+    composition_change = await IndexService.get_composition_change(
+        db=built_index, start_date=SESSIONS[0], end_date=date(2024, 3, 7)
+    )
+
+    # The first composition adds both of its constituents.
+    assert result.all() == [
+        (SESSIONS[0], 2, 0),
+        (SESSIONS[1], 0, 0),
+        (SESSIONS[2], 1, 1),
+    ]
+    assert composition_change == {SESSIONS[1]: False, SESSIONS[2]: True}
@@ -4,7 +4,7 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI, status
 
 from config import get_settings
-from database import async_session, Base, engine, get_db
+from database import async_session, engine, get_db, upgrade_database
 from export.routers import router as export_router
 from indexes.routers import router as indexes_router
 from logger import get_logger
@@ -23,7 +23,7 @@ scheduler = AsyncIOScheduler()
 async def lifespan(app: FastAPI):
     get_db.setup()
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_database)
     async with async_session() as session:
         await create_startup_tasks(db=session)
         await execute_scheduled_tasks(db=session)
@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import date
+from typing import AsyncIterator, Callable, Sequence
+
+import orjson
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(values: tuple) -> str:
+    """
+    Opaque keyset cursor from the sort key `values` of the last row of a page.
+    """
+    payload = [
+        value.isoformat() if isinstance(value, date) else value for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, types: list[Callable]) -> tuple:
+    """
+    Sort key of a cursor made by `encode_cursor`, each value parsed with the
+    matching `types` callable. Malformed cursors are a 400.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(payload) != len(types):
+            raise ValueError("Cursor does not match the sort key")
+        return tuple(parse(value) for parse, value in zip(types, payload))
+    except (TypeError, ValueError) as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor."
+        ) from error
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(
+    db: AsyncSession,
+    model: type[BaseModel],
+    batches: AsyncIterator[Sequence[Sequence]],
+) -> StreamingResponse:
+    """
+    Stream `batches` of rows, tuples starting with the fields of `model` in
+    order, as newline-delimited JSON. The request's session is closed before
+    a streaming body is sent, so the rows are read on it again and it is
+    closed once the stream ends.
+    """
+    names = list(model.model_fields)
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for batch in batches:
+                yield b"".join(
+                    orjson.dumps(dict(zip(names, row))) + b"\n" for row in batch
+                )
+        finally:
+            await db.close()
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
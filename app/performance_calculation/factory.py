@@ -1,14 +1,34 @@
 from datetime import date
-from typing import Callable
+from typing import Callable, Collection
 
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
+import numpy as np
+import pandas as pd
 
+from config import get_settings
 from indexes.enums import PerformanceCalculation
-from prices.models import DailyPrices
+from indexes.schema import IndexLevelState
+from prices.matrix import PriceMatrix
+
+settings = get_settings()
 
 
 class PerformanceCalculatorFactory:
+    """
+    Calculators chain-link an index level through the sessions of the
+    constituents selected by an index strategy and return
+    `{date: (level, divisor)}`.
+
+    The index holds a number of units of each constituent, fixed at the close
+    of the rebalance date it was selected on and held until the next one, so
+    equal weights drift with prices in between. A day's level is the value of
+    the units held since the previous close divided by the previous divisor.
+    After the close of a rebalance date the units are reset to the new
+    constituents and the divisor is adjusted to `rebalanced value / level`, so
+    membership changes never move the level. Each day therefore costs O(N) on
+    top of the prior day's state, and a range of days is computed in one
+    vectorized pass.
+    """
+
     @staticmethod
     def get_calculator(calculation_type: PerformanceCalculation) -> Callable:
         """
@@ -16,6 +36,7 @@ class PerformanceCalculatorFactory:
         """
         calculators = {
             PerformanceCalculation.EQUAL_WEIGHTED: PerformanceCalculatorFactory._equal_weighted,
+            PerformanceCalculation.MARKET_CAP_WEIGHTED: PerformanceCalculatorFactory._market_cap_weighted,
         }
 
         if calculation_type not in calculators:
@@ -26,18 +47,147 @@ class PerformanceCalculatorFactory:
         return calculators[calculation_type]
 
     @staticmethod
-    async def _equal_weighted(
-        db: AsyncSession, ticker_count: int, target_date: date
-    ) -> float:
+    def _equal_weighted(
+        matrix: PriceMatrix,
+        constituents: dict[date, np.ndarray],
+        rebalance_dates: Collection[date],
+        prev_state: IndexLevelState | None = None,
+    ) -> dict[date, tuple[float, float]]:
         """
-        Equal-weighted performance calculation.
+        Equal-weighted performance calculation: every constituent is bought for
+        the same amount, so the level moves by the average constituent return.
         """
-        query = await db.execute(
-            select(DailyPrices.close_price)
-            .where(DailyPrices.date == target_date)
-            .order_by(DailyPrices.market_cap.desc())
-            .limit(ticker_count)
+        return PerformanceCalculatorFactory._chain_linked(
+            matrix=matrix,
+            prices=matrix.close,
+            constituents=constituents,
+            rebalance_dates=rebalance_dates,
+            prev_state=prev_state,
+            equal_weighted=True,
         )
-        close_prices = query.scalars().all()
 
-        return sum(close_prices) / len(close_prices) if close_prices else 0.0
+    @staticmethod
+    def _market_cap_weighted(
+        matrix: PriceMatrix,
+        constituents: dict[date, np.ndarray],
+        rebalance_dates: Collection[date],
+        prev_state: IndexLevelState | None = None,
+    ) -> dict[date, tuple[float, float]]:
+        """
+        Market-cap-weighted performance calculation: the level is the total
+        market cap of the constituents divided by the divisor.
+        """
+        return PerformanceCalculatorFactory._chain_linked(
+            matrix=matrix,
+            prices=matrix.market_cap,
+            constituents=constituents,
+            rebalance_dates=rebalance_dates,
+            prev_state=prev_state,
+            equal_weighted=False,
+        )
+
+    @staticmethod
+    def _chain_linked(
+        matrix: PriceMatrix,
+        prices: np.ndarray,
+        constituents: dict[date, np.ndarray],
+        rebalance_dates: Collection[date],
+        prev_state: IndexLevelState | None,
+        equal_weighted: bool,
+    ) -> dict[date, tuple[float, float]]:
+        """
+        Levels and divisors for every date of `constituents`. Without a previous
+        state the first date starts at `settings.INDEX_BASE_LEVEL`; a missing
+        price keeps the last known one.
+
+        Units are bought on `rebalance_dates`, and on the first date without a
+        previous state, and held until the next rebalance, so prices are only
+        read and forward-filled for the constituent columns.
+        """
+        if not constituents:
+            return {}
+        if prev_state is not None and (
+            prev_state.divisor <= 0 or prev_state.date not in matrix.date_positions
+        ):
+            prev_state = None
+
+        target_dates = sorted(constituents)
+        rows = [matrix.date_positions[target_date] for target_date in target_dates]
+        members = [constituents[target_date] for target_date in target_dates]
+        rebalanced = [target_date in rebalance_dates for target_date in target_dates]
+        # Rows of the close prices the units held after each row were bought at.
+        unit_rows = list(rows)
+        if prev_state is not None:
+            prev_row = matrix.date_positions[prev_state.date]
+            rows.insert(0, prev_row)
+            members.insert(
+                0,
+                np.array(
+                    [
+                        matrix.ticker_positions[stock_ticker_id]
+                        for stock_ticker_id in prev_state.stock_ticker_ids
+                        if stock_ticker_id in matrix.ticker_positions
+                    ],
+                    dtype=np.int64,
+                ),
+            )
+            rebalanced.insert(0, True)
+            unit_rows.insert(
+                0, matrix.date_positions.get(prev_state.rebalance_date, prev_row)
+            )
+        else:
+            rebalanced[0] = True
+
+        columns = np.unique(np.concatenate(members))
+        first_row = unit_rows[0]
+        held_prices = (
+            pd.DataFrame(prices[first_row : rows[-1] + 1, columns]).ffill().to_numpy()
+        )
+        day_prices = held_prices[np.array(rows) - first_row]
+
+        rebalance_positions = np.flatnonzero(rebalanced)
+        unit_prices = held_prices[np.array(unit_rows)[rebalance_positions] - first_row]
+        holdings = np.zeros(unit_prices.shape, dtype=bool)
+        for position, member_position in enumerate(rebalance_positions):
+            holdings[
+                position, np.searchsorted(columns, members[member_position])
+            ] = True
+        holdings &= unit_prices > 0
+        if equal_weighted:
+            rebalance_units = np.divide(
+                1.0, unit_prices, out=np.zeros_like(unit_prices), where=holdings
+            )
+        else:
+            rebalance_units = holdings.astype(float)
+        units = rebalance_units[np.cumsum(rebalanced) - 1]
+
+        rebalanced_values = np.nansum(units * day_prices, axis=1)
+        held_values = np.nansum(units[:-1] * day_prices[1:], axis=1)
+        growth = np.divide(
+            held_values,
+            rebalanced_values[:-1],
+            out=np.ones_like(held_values),
+            where=rebalanced_values[:-1] > 0,
+        )
+
+        if prev_state is not None:
+            first_level = (
+                held_values[0] / prev_state.divisor
+                if held_values[0] > 0
+                else prev_state.value
+            )
+            growth = growth[1:]
+            rebalanced_values = rebalanced_values[1:]
+        else:
+            first_level = settings.INDEX_BASE_LEVEL
+        levels = first_level * np.concatenate([[1.0], np.cumprod(growth)])
+        divisors = np.divide(
+            rebalanced_values,
+            levels,
+            out=np.zeros_like(levels),
+            where=levels > 0,
+        )
+        return {
+            target_date: (float(level), float(divisor))
+            for target_date, level, divisor in zip(target_dates, levels, divisors)
+        }
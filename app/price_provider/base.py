@@ -0,0 +1,26 @@
+from datetime import date
+
+import pandas as pd
+
+from fundamentals.schema import FundamentalsData
+
+
+class ProviderThrottledError(Exception):
+    """
+    Raised by providers when the upstream API signals throttling.
+    """
+
+
+class PriceProvider:
+    def fetch_history(
+        self, tickers: list[str], start: date, end: date
+    ) -> dict[str, pd.DataFrame]:
+        """
+        Daily history for every ticker between `start` and `end` (both inclusive).
+        Each frame is indexed by timestamp and has at least a `Close` column.
+        Tickers without data are left out of the result.
+        """
+        raise NotImplementedError("Fetch history method must be implemented.")
+
+    def fetch_fundamentals(self, ticker: str) -> FundamentalsData:
+        raise NotImplementedError("Fetch fundamentals method must be implemented.")
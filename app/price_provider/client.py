@@ -0,0 +1,216 @@
+import random
+import threading
+import time
+from datetime import date
+from typing import Callable
+
+import pandas as pd
+
+from fundamentals.schema import FundamentalsData
+from logger import get_logger
+from price_provider.base import PriceProvider, ProviderThrottledError
+
+logger = get_logger(__name__)
+
+THROTTLING_MESSAGES = ("429", "too many requests", "rate limit")
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised without calling the provider while the circuit breaker is open.
+    """
+
+
+def is_throttling_error(error: Exception) -> bool:
+    if isinstance(error, (ProviderThrottledError, TimeoutError)):
+        return True
+    message = str(error).lower()
+    return any(throttling in message for throttling in THROTTLING_MESSAGES)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `acquire` blocks until a token is available.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._refill()
+                # Tolerate float rounding so a full wait always yields a token.
+                if self.tokens >= 1 - 1e-9:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def set_rate(self, rate: float):
+        with self.lock:
+            self._refill()
+            self.rate = rate
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds. After that a single trial call is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if self.trial_in_flight or (
+                self.clock() - self.opened_at < self.reset_timeout
+            ):
+                raise CircuitOpenError("Price provider circuit is open.")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release_trial(self):
+        """
+        End a trial call without an outcome, for errors that say nothing about
+        the provider's health. The circuit stays half-open for the next call.
+        """
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.debug("Price provider circuit opened.")
+                self.opened_at = self.clock()
+            self.trial_in_flight = False
+
+
+class RateLimitedPriceProvider(PriceProvider):
+    """
+    Wraps a provider with a token bucket, adaptive backoff and a circuit
+    breaker. The request rate is adjusted AIMD-style: every success adds
+    `rate_increase` requests/sec up to `max_rate`, every throttling signal
+    (429 or timeout) halves it down to `min_rate` and retries after an
+    exponential, jittered backoff. Throttling and connection failures count
+    towards the circuit breaker; other errors are re-raised without closing
+    or re-opening it.
+    """
+
+    def __init__(
+        self,
+        provider: PriceProvider,
+        max_rate: float,
+        min_rate: float,
+        rate_increase: float,
+        max_retries: int,
+        backoff: float,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.provider = provider
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate_increase = rate_increase
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.rate = max_rate
+        self.rate_lock = threading.Lock()
+        self.token_bucket = TokenBucket(
+            rate=max_rate, capacity=max(1.0, max_rate), clock=clock, sleep=sleep
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=failure_threshold, reset_timeout=reset_timeout, clock=clock
+        )
+
+    def _adjust_rate(self, throttled: bool):
+        with self.rate_lock:
+            if throttled:
+                self.rate = max(self.min_rate, self.rate / 2)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.rate_increase)
+            self.token_bucket.set_rate(self.rate)
+
+    def _call(self, method: Callable, *args):
+        for attempt in range(self.max_retries + 1):
+            self.circuit_breaker.before_call()
+            self.token_bucket.acquire()
+            try:
+                result = method(*args)
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                if throttled or isinstance(e, ConnectionError):
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.release_trial()
+                    raise
+                if throttled:
+                    self._adjust_rate(throttled=True)
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2**attempt * random.uniform(0.5, 1.5)
+                logger.debug(
+                    f"Price provider call failed ({e}); retrying in {delay:.2f}s "
+                    f"at {self.rate:.2f} requests/sec."
+                )
+                self.sleep(delay)
+            else:
+                self.circuit_breaker.record_success()
+                self._adjust_rate(throttled=False)
+                return result
+
+    def fetch_history(
+        self, tickers: list[str], start: date, end: date
+    ) -> dict[str, pd.DataFrame]:
+        return self._call(self.provider.fetch_history, tickers, start, end)
+
+    def fetch_fundamentals(self, ticker: str) -> FundamentalsData:
+        return self._call(self.provider.fetch_fundamentals, ticker)
@@ -0,0 +1,159 @@
+import time
+import zlib
+from datetime import date, datetime, timedelta, UTC
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from config import get_settings
+from fundamentals.enums import SharesSource
+from fundamentals.schema import FundamentalsData
+from price_provider.base import PriceProvider, ProviderThrottledError
+from price_provider.client import is_throttling_error, RateLimitedPriceProvider
+from prices.enums import PriceProviderType
+
+settings = get_settings()
+
+
+class YFinancePriceProvider(PriceProvider):
+    def fetch_history(
+        self, tickers: list[str], start: date, end: date
+    ) -> dict[str, pd.DataFrame]:
+        # One multi-ticker download per call; yfinance treats `end` as exclusive.
+        data = yf.download(
+            tickers,
+            start=start,
+            end=end + timedelta(days=1),
+            group_by="ticker",
+            progress=False,
+            threads=False,
+        )
+        # yfinance reports per-ticker failures instead of raising them.
+        download_errors = getattr(yf.shared, "_ERRORS", {}) or {}
+        throttled = [
+            ticker
+            for ticker, error in download_errors.items()
+            if is_throttling_error(Exception(error))
+        ]
+        if throttled:
+            raise ProviderThrottledError(f"Rate limited while fetching {throttled}.")
+        history: dict[str, pd.DataFrame] = {}
+        if data is None or data.empty:
+            return history
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                ticker_data = data[ticker]
+            else:
+                ticker_data = data
+            ticker_data = ticker_data.dropna(subset=["Close"])
+            if not ticker_data.empty:
+                history[ticker] = ticker_data
+        return history
+
+    def fetch_fundamentals(self, ticker: str) -> FundamentalsData:
+        stock = yf.Ticker(ticker)
+        income_stmt = stock.quarterly_income_stmt
+        latest_quarter_date = (
+            max(income_stmt.keys()).date() if not income_stmt.empty else None
+        )
+        current_market_cap = stock.info.get("marketCap", 0.0)
+        last_close_price = stock.info.get("previousClose", 0.0)
+        if last_close_price:
+            return FundamentalsData(
+                shares_outstanding=current_market_cap // last_close_price,
+                source=SharesSource.MARKET_CAP_RATIO,
+                as_of_date=datetime.now(tz=UTC).date(),
+                reported_quarter=latest_quarter_date,
+            )
+        if latest_quarter_date is None:
+            raise ValueError(f"No shares outstanding available for {ticker}.")
+        return FundamentalsData(
+            shares_outstanding=float(
+                income_stmt[max(income_stmt.keys())]["Basic Average Shares"]
+            ),
+            source=SharesSource.INCOME_STATEMENT,
+            as_of_date=latest_quarter_date,
+            reported_quarter=latest_quarter_date,
+        )
+
+
+class FixturePriceProvider(PriceProvider):
+    """
+    Deterministic synthetic prices for tests and benchmarks, no network needed.
+    A ticker always gets the same close for the same date regardless of the
+    requested range. `latency` simulates the round-trip time of one request.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    @staticmethod
+    def _seed(ticker: str) -> int:
+        return zlib.crc32(ticker.encode())
+
+    def fetch_history(
+        self, tickers: list[str], start: date, end: date
+    ) -> dict[str, pd.DataFrame]:
+        if self.latency:
+            time.sleep(self.latency)
+        index = pd.bdate_range(start=start, end=end)
+        if index.empty:
+            return {}
+        ordinals = np.array([day.toordinal() for day in index], dtype=np.int64)
+        history: dict[str, pd.DataFrame] = {}
+        for ticker in tickers:
+            seed = self._seed(ticker)
+            base_price = 20.0 + seed % 480
+            noise = ((ordinals * 2654435761 + seed) % 10007) / 10007 - 0.5
+            close = base_price * (
+                1 + 0.1 * np.sin(ordinals / 30 + seed % 7) + 0.02 * noise
+            )
+            history[ticker] = pd.DataFrame({"Close": close}, index=index)
+        return history
+
+    def fetch_fundamentals(self, ticker: str) -> FundamentalsData:
+        if self.latency:
+            time.sleep(self.latency)
+        return FundamentalsData(
+            shares_outstanding=float(1e8 + (self._seed(ticker) % 1000) * 1e7),
+            source=SharesSource.FIXTURE,
+            as_of_date=datetime.now(tz=UTC).date(),
+        )
+
+
+class PriceProviderFactory:
+    providers: dict[str, type[PriceProvider]] = {
+        PriceProviderType.YFINANCE: YFinancePriceProvider,
+        PriceProviderType.FIXTURE: FixturePriceProvider,
+    }
+    # One rate limited provider per type for the whole process, so its
+    # adaptive rate and circuit breaker carry over between runs and are
+    # shared by every caller of the same upstream.
+    instances: dict[str, PriceProvider] = {}
+
+    @staticmethod
+    def get_provider(provider_type: str) -> PriceProvider:
+        """
+        Returns the provider wrapped with rate limiting and a circuit breaker.
+        """
+        instance = PriceProviderFactory.instances.get(provider_type)
+        if instance is not None:
+            return instance
+        provider = PriceProviderFactory.providers.get(provider_type)
+        if not provider:
+            raise ValueError(f"Unsupported price provider type: {provider_type}")
+        instance = RateLimitedPriceProvider(
+            provider=provider(),
+            max_rate=settings.PROVIDER_MAX_REQUESTS_PER_SECOND,
+            min_rate=settings.PROVIDER_MIN_REQUESTS_PER_SECOND,
+            rate_increase=settings.PROVIDER_RATE_INCREASE,
+            max_retries=settings.PROVIDER_MAX_RETRIES,
+            backoff=settings.PROVIDER_BACKOFF_SECONDS,
+            failure_threshold=settings.PROVIDER_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.PROVIDER_CIRCUIT_RESET_SECONDS,
+        )
+        PriceProviderFactory.instances[provider_type] = instance
+        return instance
@@ -0,0 +1,136 @@
+from datetime import date
+
+import pytest
+
+from price_provider.base import PriceProvider, ProviderThrottledError
+from price_provider.client import CircuitOpenError, RateLimitedPriceProvider
+from price_provider.factory import PriceProviderFactory
+from prices.enums import PriceProviderType
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class ThrottlingStubProvider(PriceProvider):
+    """
+    Accepts `requests_per_second` calls per second of the fake clock and
+    throttles everything above that.
+    """
+
+    def __init__(self, clock: FakeClock, requests_per_second: int):
+        self.clock = clock
+        self.requests_per_second = requests_per_second
+        self.calls: dict[int, int] = {}
+        self.throttled = 0
+
+    def fetch_history(self, tickers: list[str], start: date, end: date):
+        second = int(self.clock())
+        self.calls[second] = self.calls.get(second, 0) + 1
+        if self.calls[second] > self.requests_per_second:
+            self.throttled += 1
+            raise ProviderThrottledError("429 Too Many Requests")
+        return {}
+
+
+class FailingStubProvider(PriceProvider):
+    def __init__(self):
+        self.calls = 0
+        self.error: Exception = ConnectionError("connection refused")
+
+    def fetch_history(self, tickers: list[str], start: date, end: date):
+        self.calls += 1
+        raise self.error
+
+
+def rate_limited(provider: PriceProvider, clock: FakeClock, **kwargs):
+    options = {
+        "max_rate": 20.0,
+        "min_rate": 0.5,
+        "rate_increase": 0.1,
+        "max_retries": 5,
+        "backoff": 0.1,
+        "failure_threshold": 100,
+        "reset_timeout": 30.0,
+    }
+    options.update(kwargs)
+    return RateLimitedPriceProvider(
+        provider=provider, clock=clock, sleep=clock.sleep, **options
+    )
+
+
+def test_rate_adapts_to_throttling():
+    clock = FakeClock()
+    stub = ThrottlingStubProvider(clock=clock, requests_per_second=2)
+    provider = rate_limited(stub, clock)
+
+    for _ in range(50):
+        provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 2))
+
+    assert stub.throttled > 0
+    assert provider.rate < 20.0
+    # Once adapted, the client stays close to what the stub can sustain.
+    assert stub.throttled < 25
+
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = FakeClock()
+    stub = FailingStubProvider()
+    provider = rate_limited(stub, clock, max_retries=0, failure_threshold=3)
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 2))
+    with pytest.raises(CircuitOpenError):
+        provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 2))
+    assert stub.calls == 3
+
+    clock.sleep(30.0)
+    with pytest.raises(ConnectionError):
+        provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 2))
+    assert stub.calls == 4
+    with pytest.raises(CircuitOpenError):
+        provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 2))
+
+
+def test_circuit_breaker_ignores_other_errors_while_half_open():
+    clock = FakeClock()
+    stub = FailingStubProvider()
+    provider = rate_limited(stub, clock, max_retries=0, failure_threshold=3)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 2))
+
+    clock.sleep(30.0)
+    stub.error = ValueError("unknown ticker")
+    with pytest.raises(ValueError):
+        provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 2))
+
+    # Neither closed nor re-opened: the next call is another trial.
+    assert provider.circuit_breaker.is_open
+    assert provider.circuit_breaker.failures == 3
+    stub.error = ConnectionError("connection refused")
+    with pytest.raises(ConnectionError):
+        provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 2))
+    assert stub.calls == 5
+    with pytest.raises(CircuitOpenError):
+        provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 2))
+
+
+def test_factory_keeps_one_rate_limiter_per_provider(monkeypatch):
+    monkeypatch.setattr(PriceProviderFactory, "instances", {})
+
+    provider = PriceProviderFactory.get_provider(PriceProviderType.FIXTURE)
+    provider.rate = 1.0
+
+    # A later run sees the rate the earlier one adapted to.
+    assert PriceProviderFactory.get_provider(PriceProviderType.FIXTURE) is provider
+    assert PriceProviderFactory.get_provider(PriceProviderType.FIXTURE).rate == 1.0
+    assert PriceProviderFactory.get_provider(PriceProviderType.YFINANCE) is not provider
@@ -0,0 +1,7 @@
+from enum import StrEnum
+
+
+class PriceProviderType(StrEnum):
+    YFINANCE: str = "YFINANCE"
+    FIXTURE: str = "FIXTURE"
+    # Add more as required
@@ -0,0 +1,190 @@
+"""
+Bulk load vendor price dumps (CSV or Parquet) into `daily_prices_all`.
+
+Usage:
+    python -m prices.loader prices.parquet --chunk-size 200000
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, UTC
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_session
+from fundamentals.services import load_fresh_shares_outstanding
+from logger import get_logger
+from prices.schema import PriceLoadResult
+from prices.services import (
+    advance_watermark,
+    load_watermarks,
+    store_watermarks,
+    upsert_daily_prices,
+)
+from stocks.services import fetch_all_tickers
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def iter_price_file_chunks(
+    file_path: str, columns: list[str], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield `columns` of a CSV or Parquet file `chunk_size` rows at a time, so only
+    one chunk is held in memory.
+    """
+    suffix = Path(file_path).suffix.lower()
+    if suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    elif suffix == ".csv":
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_size)
+    else:
+        raise ValueError(f"Unsupported price file type: {suffix}")
+
+
+async def load_price_file(
+    db: AsyncSession,
+    file_path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    symbol_column: str = "symbol",
+    date_column: str = "date",
+    close_column: str = "close",
+    market_cap_column: str | None = "market_cap",
+) -> PriceLoadResult:
+    """
+    Stream a price file into `daily_prices_all`, one bulk upsert and commit per
+    chunk. Symbols are mapped to stock ticker ids through a single lookup; rows
+    for unknown symbols are skipped. Without a market cap column the market cap
+    is derived from the cached shares outstanding. Watermarks of the loaded
+    tickers are extended once the whole file is in.
+    """
+    ticker_ids = {
+        ticker.ticker: ticker.id for ticker in await fetch_all_tickers(db=db)
+    }
+    shares_outstanding: dict[int, float] = {}
+    if market_cap_column is None:
+        shares_outstanding = await load_fresh_shares_outstanding(
+            db=db,
+            stock_ticker_ids=list(ticker_ids.values()),
+            today=datetime.now(tz=UTC).date(),
+        )
+    columns = [symbol_column, date_column, close_column]
+    if market_cap_column is not None:
+        columns.append(market_cap_column)
+
+    result = PriceLoadResult()
+    loaded_dates: dict[int, tuple[date, date]] = {}
+    unknown_symbols: set[str] = set()
+    started_at = time.perf_counter()
+    for chunk in iter_price_file_chunks(
+        file_path=file_path, columns=columns, chunk_size=chunk_size
+    ):
+        result.rows_read += len(chunk)
+        prices = pd.DataFrame(
+            {
+                "stock_ticker_id": chunk[symbol_column].map(ticker_ids),
+                "date": pd.to_datetime(chunk[date_column]).dt.date,
+                "close_price": chunk[close_column].astype(float),
+            }
+        )
+        unknown_symbols.update(chunk.loc[prices["stock_ticker_id"].isna(), symbol_column])
+        if market_cap_column is not None:
+            prices["market_cap"] = chunk[market_cap_column].astype(float)
+        else:
+            prices["market_cap"] = prices["close_price"] * prices[
+                "stock_ticker_id"
+            ].map(shares_outstanding)
+        prices = prices.dropna()
+        prices["stock_ticker_id"] = prices["stock_ticker_id"].astype(int)
+        result.rows_skipped += len(chunk) - len(prices)
+        if prices.empty:
+            continue
+
+        await upsert_daily_prices(db=db, records=prices.to_dict("records"))
+        await db.commit()
+        result.rows_written += len(prices)
+
+        for stock_ticker_id, first_date, last_date in (
+            prices.groupby("stock_ticker_id")["date"]
+            .agg(["min", "max"])
+            .itertuples()
+        ):
+            stock_ticker_id = int(stock_ticker_id)
+            if stock_ticker_id in loaded_dates:
+                loaded_first, loaded_last = loaded_dates[stock_ticker_id]
+                first_date = min(first_date, loaded_first)
+                last_date = max(last_date, loaded_last)
+            loaded_dates[stock_ticker_id] = (first_date, last_date)
+
+        result.rows_per_second = result.rows_written / max(
+            time.perf_counter() - started_at, 1e-9
+        )
+        logger.info(
+            f"Loaded {result.rows_written} of {result.rows_read} rows read "
+            f"({result.rows_per_second:.0f} rows/sec)."
+        )
+
+    watermarks, gaps = await load_watermarks(
+        db=db, stock_ticker_ids=list(loaded_dates)
+    )
+    for stock_ticker_id, (first_date, last_date) in loaded_dates.items():
+        watermarks[stock_ticker_id], gaps[stock_ticker_id] = advance_watermark(
+            watermark=watermarks.get(stock_ticker_id),
+            gaps=gaps.get(stock_ticker_id, []),
+            range_start=first_date,
+            range_end=last_date,
+            last_price_date=last_date,
+        )
+    await store_watermarks(
+        db=db, watermarks=watermarks, gaps=gaps, stock_ticker_ids=set(loaded_dates)
+    )
+    await db.commit()
+
+    result.unknown_symbols = sorted(unknown_symbols)
+    result.rows_per_second = result.rows_written / max(
+        time.perf_counter() - started_at, 1e-9
+    )
+    return result
+
+
+async def main(args: argparse.Namespace):
+    async with async_session() as db:
+        result = await load_price_file(
+            db=db,
+            file_path=args.file_path,
+            chunk_size=args.chunk_size,
+            symbol_column=args.symbol_column,
+            date_column=args.date_column,
+            close_column=args.close_column,
+            market_cap_column=args.market_cap_column or None,
+        )
+    logger.info(
+        f"Finished loading {args.file_path}: {result.rows_written} rows written, "
+        f"{result.rows_skipped} skipped, {result.rows_per_second:.0f} rows/sec."
+    )
+    if result.unknown_symbols:
+        logger.info(f"Unknown symbols: {', '.join(result.unknown_symbols)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("file_path", help="CSV or Parquet file with daily prices.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--symbol-column", default="symbol")
+    parser.add_argument("--date-column", default="date")
+    parser.add_argument("--close-column", default="close")
+    parser.add_argument(
+        "--market-cap-column",
+        default="market_cap",
+        help="Pass an empty value to derive market caps from cached shares.",
+    )
+    asyncio.run(main(parser.parse_args()))
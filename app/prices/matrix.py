@@ -0,0 +1,266 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+
+from logger import get_logger
+from prices.models import DailyPrices
+
+logger = get_logger(__name__)
+
+PENDING_PRICE_RECORDS = "pending_price_records"
+
+
+class PriceMatrix:
+    """
+    Dense date x ticker arrays of close prices and market caps for a window of
+    days. Rows follow `dates`, columns follow `stock_ticker_ids` and cells
+    without a stored price are NaN.
+    """
+
+    def __init__(
+        self,
+        start_date: date,
+        end_date: date,
+        dates: list[date],
+        stock_ticker_ids: np.ndarray,
+        close: np.ndarray,
+        market_cap: np.ndarray,
+    ):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.dates = dates
+        self.stock_ticker_ids = stock_ticker_ids
+        self.close = close
+        self.market_cap = market_cap
+        self._index_positions()
+
+    def _index_positions(self):
+        self.date_positions = {
+            price_date: position for position, price_date in enumerate(self.dates)
+        }
+        self.ticker_positions = {
+            int(stock_ticker_id): position
+            for position, stock_ticker_id in enumerate(self.stock_ticker_ids)
+        }
+
+    @classmethod
+    def from_rows(
+        cls,
+        start_date: date,
+        end_date: date,
+        rows: list[tuple[date, int, float, float]],
+    ) -> "PriceMatrix":
+        """
+        Build a matrix from `(date, stock_ticker_id, close_price, market_cap)` rows.
+        """
+        if not rows:
+            return cls(
+                start_date=start_date,
+                end_date=end_date,
+                dates=[],
+                stock_ticker_ids=np.empty(0, dtype=np.int64),
+                close=np.empty((0, 0)),
+                market_cap=np.empty((0, 0)),
+            )
+        price_dates, stock_ticker_ids, close_prices, market_caps = zip(*rows)
+        dates, date_rows = np.unique(
+            np.array(price_dates, dtype="datetime64[D]"), return_inverse=True
+        )
+        stock_ticker_ids, ticker_columns = np.unique(
+            np.array(stock_ticker_ids, dtype=np.int64), return_inverse=True
+        )
+        close = np.full((len(dates), len(stock_ticker_ids)), np.nan)
+        market_cap = np.full((len(dates), len(stock_ticker_ids)), np.nan)
+        close[date_rows, ticker_columns] = close_prices
+        market_cap[date_rows, ticker_columns] = market_caps
+        return cls(
+            start_date=start_date,
+            end_date=end_date,
+            dates=dates.astype(object).tolist(),
+            stock_ticker_ids=stock_ticker_ids,
+            close=close,
+            market_cap=market_cap,
+        )
+
+    @classmethod
+    async def load(
+        cls, db: AsyncSession, start_date: date, end_date: date
+    ) -> "PriceMatrix":
+        """
+        Load every stored price between `start_date` and `end_date` in one query.
+        """
+        result = await db.execute(
+            select(
+                DailyPrices.date,
+                DailyPrices.stock_ticker_id,
+                DailyPrices.close_price,
+                DailyPrices.market_cap,
+            )
+            .where(DailyPrices.date >= start_date)
+            .where(DailyPrices.date <= end_date)
+        )
+        matrix = cls.from_rows(
+            start_date=start_date, end_date=end_date, rows=result.all()
+        )
+        logger.debug(
+            f"Loaded price matrix of {len(matrix.dates)} dates x "
+            f"{len(matrix.stock_ticker_ids)} tickers for {start_date} - {end_date}."
+        )
+        return matrix
+
+    def covers(self, start_date: date, end_date: date) -> bool:
+        return self.start_date <= start_date and end_date <= self.end_date
+
+    def window(self, start_date: date, end_date: date) -> "PriceMatrix":
+        """
+        View of the rows between `start_date` and `end_date`; arrays are shared.
+        """
+        first = bisect_left(self.dates, start_date)
+        last = bisect_right(self.dates, end_date)
+        return PriceMatrix(
+            start_date=start_date,
+            end_date=end_date,
+            dates=self.dates[first:last],
+            stock_ticker_ids=self.stock_ticker_ids,
+            close=self.close[first:last],
+            market_cap=self.market_cap[first:last],
+        )
+
+    def take(self, dates: list[date]) -> "PriceMatrix":
+        """
+        Matrix of only the rows of `dates`, which must be in the matrix; arrays
+        are copied.
+        """
+        rows = [self.date_positions[price_date] for price_date in dates]
+        return PriceMatrix(
+            start_date=self.start_date,
+            end_date=self.end_date,
+            dates=list(dates),
+            stock_ticker_ids=self.stock_ticker_ids,
+            close=self.close[rows],
+            market_cap=self.market_cap[rows],
+        )
+
+    def apply(self, records: list[dict]):
+        """
+        Write upserted price records into the matrix, adding rows and columns for
+        dates and tickers not seen before. Records outside the window are ignored.
+        """
+        records = [
+            record
+            for record in records
+            if self.start_date <= record["date"] <= self.end_date
+        ]
+        if not records:
+            return
+        new_dates = {record["date"] for record in records}.difference(
+            self.date_positions
+        )
+        new_stock_ticker_ids = {
+            record["stock_ticker_id"] for record in records
+        }.difference(self.ticker_positions)
+        if new_dates or new_stock_ticker_ids:
+            self._grow(sorted(new_dates), sorted(new_stock_ticker_ids))
+
+        rows = [self.date_positions[record["date"]] for record in records]
+        columns = [
+            self.ticker_positions[record["stock_ticker_id"]] for record in records
+        ]
+        self.close[rows, columns] = [record["close_price"] for record in records]
+        self.market_cap[rows, columns] = [record["market_cap"] for record in records]
+
+    def _grow(self, new_dates: list[date], new_stock_ticker_ids: list[int]):
+        dates = sorted(self.dates + new_dates)
+        stock_ticker_ids = np.concatenate(
+            [self.stock_ticker_ids, np.array(new_stock_ticker_ids, dtype=np.int64)]
+        )
+        old_rows = [bisect_left(dates, price_date) for price_date in self.dates]
+        old_columns = len(self.stock_ticker_ids)
+        close = np.full((len(dates), len(stock_ticker_ids)), np.nan)
+        market_cap = np.full((len(dates), len(stock_ticker_ids)), np.nan)
+        close[old_rows, :old_columns] = self.close
+        market_cap[old_rows, :old_columns] = self.market_cap
+        self.dates = dates
+        self.stock_ticker_ids = stock_ticker_ids
+        self.close = close
+        self.market_cap = market_cap
+        self._index_positions()
+
+    def top_n(self, row: int, n: int) -> np.ndarray:
+        """
+        Columns of the `n` largest market caps on `row`, largest first. Ties are
+        broken by ticker id; tickers without a price that day are never picked.
+        """
+        market_caps = self.market_cap[row]
+        columns = np.flatnonzero(~np.isnan(market_caps))
+        if len(columns) > n > 0:
+            cutoff = np.partition(market_caps[columns], len(columns) - n)[
+                len(columns) - n
+            ]
+            columns = columns[market_caps[columns] >= cutoff]
+        order = np.lexsort((self.stock_ticker_ids[columns], -market_caps[columns]))
+        return columns[order][:n]
+
+
+class PriceMatrixCache:
+    """
+    Keeps the last loaded price matrix so repeated index builds over the same
+    window reuse it. Price rows staged with `stage_price_records` are applied
+    when their transaction commits. Prices written by other processes never
+    reach it, so reads that must see them, such as dirty date rebuilds, pass
+    `refresh` to reload the window from the database.
+    """
+
+    def __init__(self):
+        self._matrix: PriceMatrix | None = None
+
+    async def get(
+        self,
+        db: AsyncSession,
+        start_date: date,
+        end_date: date,
+        refresh: bool = False,
+    ) -> PriceMatrix:
+        if (
+            refresh
+            or self._matrix is None
+            or not self._matrix.covers(start_date, end_date)
+        ):
+            self._matrix = await PriceMatrix.load(
+                db=db, start_date=start_date, end_date=end_date
+            )
+        return self._matrix.window(start_date, end_date)
+
+    def apply(self, records: list[dict]):
+        if self._matrix is not None:
+            self._matrix.apply(records)
+
+    def clear(self):
+        self._matrix = None
+
+
+price_matrix_cache = PriceMatrixCache()
+
+
+def stage_price_records(db: AsyncSession, records: list[dict]):
+    """
+    Apply `records` to the price matrix cache once the session commits them.
+    """
+    db.info.setdefault(PENDING_PRICE_RECORDS, []).extend(records)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_price_records(session: Session):
+    records = session.info.pop(PENDING_PRICE_RECORDS, None)
+    if records:
+        price_matrix_cache.apply(records)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_price_records(session: Session):
+    session.info.pop(PENDING_PRICE_RECORDS, None)
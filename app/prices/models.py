@@ -1,15 +1,25 @@
 import sqlalchemy as sa
-from sqlalchemy.sql.schema import ForeignKey
+from sqlalchemy.sql.schema import ForeignKey, UniqueConstraint
 
 from config import get_settings
 from database import Base
 from stocks.models import StockTicker
+from tasks.enums import TaskStatus
+from tasks.models import Tasks
 
 settings = get_settings()
 
 
 class DailyPrices(Base):
     __tablename__ = "daily_prices_all"
+    __table_args__ = (
+        UniqueConstraint(
+            "stock_ticker_id",
+            "date",
+            name="_daily_prices_uk_stock_ticker_id_date",
+        ),
+        sa.Index("ix_daily_prices_all_date_market_cap", "date", "market_cap"),
+    )
     id = sa.Column(sa.Integer, nullable=False, primary_key=True, index=True)
     stock_ticker_id = sa.Column(
         sa.Integer, ForeignKey("stock_ticker.id"), nullable=True
@@ -19,3 +29,64 @@ class DailyPrices(Base):
         sa.Float, nullable=False, comment="Close price of the stock."
     )
     market_cap = sa.Column(sa.Float, nullable=False, comment="Market cap of the stock.")
+
+
+class PriceWatermark(Base):
+    __tablename__ = "price_watermark"
+    """
+    Date span of stored prices per ticker. `last_date` only moves to days the
+    provider actually returned a price for, so filled days are fetched again.
+    """
+    id = sa.Column(sa.Integer, nullable=False, primary_key=True, index=True)
+    stock_ticker_id = sa.Column(
+        sa.Integer, ForeignKey("stock_ticker.id"), nullable=False, unique=True
+    )
+    first_date = sa.Column(
+        sa.Date, nullable=False, comment="First date stored for the ticker"
+    )
+    last_date = sa.Column(
+        sa.Date, nullable=False, comment="Last date with provider data for the ticker"
+    )
+
+
+class PriceGap(Base):
+    __tablename__ = "price_gap"
+    """
+    Known holes between `first_date` and `last_date` of a ticker's watermark.
+    """
+    __table_args__ = (
+        UniqueConstraint(
+            "stock_ticker_id",
+            "start_date",
+            name="_price_gap_uk_stock_ticker_id_start_date",
+        ),
+    )
+    id = sa.Column(sa.Integer, nullable=False, primary_key=True, index=True)
+    stock_ticker_id = sa.Column(
+        sa.Integer, ForeignKey("stock_ticker.id"), nullable=False
+    )
+    start_date = sa.Column(sa.Date, nullable=False, comment="First missing date")
+    end_date = sa.Column(sa.Date, nullable=False, comment="Last missing date")
+
+
+class PriceBackfillChunk(Base):
+    __tablename__ = "price_backfill_chunk"
+    """
+    One tickers x date range unit of a PRICE_BACKFILL task. A chunk is marked
+    COMPLETED in the same transaction that stores its prices, so a crashed
+    backfill resumes from the chunks that are not COMPLETED.
+    """
+    id = sa.Column(sa.Integer, nullable=False, primary_key=True, index=True)
+    task_id = sa.Column(sa.Integer, ForeignKey("tasks.id"), nullable=False, index=True)
+    stock_ticker_ids = sa.Column(
+        sa.JSON, nullable=False, comment="Stock ticker ids fetched by the chunk."
+    )
+    start_date = sa.Column(sa.Date, nullable=False, comment="First date of the chunk")
+    end_date = sa.Column(sa.Date, nullable=False, comment="Last date of the chunk")
+    status = sa.Column(
+        sa.Enum(TaskStatus),
+        nullable=False,
+        default=TaskStatus.INITIATED,
+        server_default=TaskStatus.INITIATED,
+    )
+    rows_written = sa.Column(sa.Integer, nullable=False, default=0, server_default="0")
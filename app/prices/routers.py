@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, status
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 
 from config import get_settings
 from database import get_db
 from logger import get_logger
+from pagination import NDJSON_MEDIA_TYPE, ndjson_response, wants_ndjson
 from prices import paths
-from prices.schema import DailyPriceResponse
-from prices.services import fetch_all_daily_prices
+from prices.schema import DailyPricePage, DailyPriceResponse
+from prices.services import fetch_daily_price_rows, stream_daily_prices
+from response_format import negotiate_media_type, negotiated_responses, rows_response
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -17,9 +21,46 @@ router = APIRouter(prefix=paths.base)
 
 @router.get(
     f"",
+    response_model=DailyPricePage,
+    responses=negotiated_responses(NDJSON_MEDIA_TYPE),
     status_code=status.HTTP_200_OK,
 )
 async def get_all_stocks(
+    request: Request,
+    ticker: list[str] | None = Query(None),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cursor: str | None = None,
+    limit: int = Query(settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
-) -> list[DailyPriceResponse]:
-    return await fetch_all_daily_prices(db=db)
+) -> Response:
+    """
+    Prices of `ticker`, or of every ticker, between `start_date` and
+    `end_date`, one page at a time; pass the returned `next_cursor` to get the
+    next page. With `Accept: application/x-ndjson` every matching price is
+    streamed instead, one JSON object per line. Pages are also served as an
+    Arrow IPC stream or MessagePack by `Accept`; Arrow carries `next_cursor`
+    in its schema metadata.
+    """
+    if wants_ndjson(request):
+        return ndjson_response(
+            db=db,
+            model=DailyPriceResponse,
+            batches=stream_daily_prices(
+                db=db, tickers=ticker, start_date=start_date, end_date=end_date
+            ),
+        )
+    rows, next_cursor = await fetch_daily_price_rows(
+        db=db,
+        tickers=ticker,
+        start_date=start_date,
+        end_date=end_date,
+        cursor=cursor,
+        limit=limit,
+    )
+    return rows_response(
+        media_type=negotiate_media_type(request),
+        model=DailyPriceResponse,
+        rows=rows,
+        envelope={"next_cursor": next_cursor},
+    )
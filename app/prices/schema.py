@@ -12,3 +12,30 @@ class DailyPriceResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class DailyPricePage(BaseModel):
+    data: list[DailyPriceResponse]
+    next_cursor: str | None = None
+
+
+class PriceIngestionResult(BaseModel):
+    succeeded: list[str] = []
+    failed: dict[str, str] = {}
+    up_to_date: list[str] = []
+
+
+class PriceBackfillProgress(BaseModel):
+    total_chunks: int
+    completed_chunks: int
+    failed_chunks: int
+    rows_written: int
+    rows_per_second: float
+
+
+class PriceLoadResult(BaseModel):
+    rows_read: int = 0
+    rows_written: int = 0
+    rows_skipped: int = 0
+    rows_per_second: float = 0.0
+    unknown_symbols: list[str] = []
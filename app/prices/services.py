@@ -1,146 +1,827 @@
+import asyncio
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta, UTC
+from typing import AsyncIterator, Awaitable, Callable
 
-import yfinance as yf
+import pandas as pd
 from fastapi import Depends
+from sqlalchemy import delete, Row, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from database import get_db
+from config import get_settings
+from database import bulk_upsert, get_db
+from fundamentals.schema import FundamentalsData
+from fundamentals.services import load_fresh_shares_outstanding, upsert_fundamentals
+from indexes.services import IndexService
 from logger import get_logger
-from prices.models import DailyPrices
-from prices.schema import DailyPriceResponse
+from pagination import decode_cursor, encode_cursor
+from price_provider.factory import PriceProvider, PriceProviderFactory
+from prices.matrix import stage_price_records
+from prices.models import (
+    DailyPrices,
+    PriceBackfillChunk,
+    PriceGap,
+    PriceWatermark,
+)
+from prices.schema import (
+    PriceBackfillProgress,
+    PriceIngestionResult,
+)
 from stocks.models import StockTicker
 from stocks.services import fetch_all_tickers
+from tasks.enums import TaskStatus
+from trading_calendar.services import get_trading_calendar, TradingCalendar
 
 logger = get_logger(__name__)
+settings = get_settings()
 
+PREV_PRICE_LOOKBACK = timedelta(days=10)
 
-async def fetch_and_store_target_date_data(
-    db: AsyncSession = Depends(get_db),
-):
-    end_date = datetime.now(tz=UTC).date()
-    start_date = end_date - timedelta(days=30)
-    tickers = await fetch_all_tickers(db=db)
-    for ticker in tickers:
-        stock = yf.Ticker(ticker.ticker)
+
+def _fetch_batch_data(
+    provider: PriceProvider,
+    symbols: list[str],
+    start_date: date,
+    end_date: date,
+    cached_symbols: set[str],
+) -> dict[str, tuple[FundamentalsData | None, pd.DataFrame] | Exception]:
+    """
+    Blocking provider calls for a batch of tickers. Runs inside the worker pool.
+    History for the whole batch comes from a single bulk request; fundamentals
+    are only looked up for tickers that got a price back and are not in
+    `cached_symbols`.
+    """
+    history = provider.fetch_history(symbols, start_date, end_date)
+    batch_data: dict[str, tuple[FundamentalsData | None, pd.DataFrame] | Exception] = {}
+    for symbol in symbols:
+        ticker_history = history.get(symbol)
+        if ticker_history is None or ticker_history.empty:
+            batch_data[symbol] = (None, pd.DataFrame(columns=["Close"]))
+            continue
+        if symbol in cached_symbols:
+            batch_data[symbol] = (None, ticker_history)
+            continue
         try:
-            latest_quarter_date = max(stock.quarterly_income_stmt.keys())
-            current_market_cap = stock.info.get('marketCap', 0.0)
-            last_close_price = stock.info.get('previousClose', 0.0)
-            if last_close_price:
-                total_shares = current_market_cap // last_close_price
-            else:
-                total_shares = float(stock.quarterly_income_stmt[latest_quarter_date]['Basic Average Shares'])
-            # returns last 30 days
-            history = stock.history()
-            data_per_day: dict[datetime.date, DailyPrices] = {}
-            first_data = {}
-            for date, row in history.iterrows():
-                close_price = float(row.get('Close', 0.0))
-                market_cap = total_shares * close_price
-                daily_price = DailyPrices(
-                    stock_ticker_id=ticker.id,
-                    date=date.date(),
-                    close_price=close_price,
-                    market_cap=market_cap,
-                )
-                if not first_data:
-                    first_data = {
-                        "close_price": close_price,
-                        "market_cap": market_cap
-                    }
-                data_per_day[date.date()] = daily_price
-                db.add(daily_price)
-
-            prev_data = {}
-            while start_date <= end_date:
-                if start_date not in data_per_day:
-                    if prev_data:
-                        daily_price = DailyPrices(
-                            stock_ticker_id=ticker.id,
-                            date=start_date,
-                            close_price=prev_data.get("close_price", 0.0),
-                            market_cap=prev_data.get("market_cap", 0.0),
-                        )
-                    else:
-                        daily_price = DailyPrices(
-                            stock_ticker_id=ticker.id,
-                            date=start_date,
-                            close_price=first_data.get("close_price", 0.0),
-                            market_cap=first_data.get("market_cap", 0.0),
-                        )
-                    db.add(daily_price)         
-                else:
-                    prev_data = {
-                        "close_price": data_per_day[start_date].close_price,
-                        "market_cap": data_per_day[start_date].market_cap
-                    }
-                start_date = start_date + timedelta(days=1)
-            logger.debug(data_per_day)
-            start_date = end_date - timedelta(days=30)
-
-            await db.commit()
+            batch_data[symbol] = (provider.fetch_fundamentals(symbol), ticker_history)
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.debug(f"Failed to fetch or store data for ticker {ticker.ticker}: {row}")
-            await db.rollback()
+            batch_data[symbol] = e
+    return batch_data
 
 
-async def check_if_history_data_is_present(
-    db: AsyncSession = Depends(get_db), target_date: date | None = None
-) -> bool:
-    target_date = (
-        datetime.now(tz=UTC).date() - timedelta(days=1)
-        if target_date is None
-        else target_date
+def _build_price_records(
+    stock_ticker_id: int,
+    total_shares: float | None,
+    history: pd.DataFrame,
+    start_date: date,
+    end_date: date,
+    prev_data: dict | None = None,
+    calendar: TradingCalendar | None = None,
+) -> list[dict]:
+    """
+    Turn provider history into `daily_prices_all` rows for the trading sessions
+    between `start_date` and `end_date`. The history is reindexed onto the
+    sessions in one pass; sessions without a price are forward-filled from the
+    previous available day, seeded with `prev_data` (the stored row before
+    `start_date`) or else back-filled from the first price.
+    """
+    calendar = get_trading_calendar() if calendar is None else calendar
+    sessions = calendar.sessions_index(start_date, end_date)
+    if sessions.empty:
+        return []
+    days = pd.DatetimeIndex(history.index)
+    if days.tz is not None:
+        days = days.tz_localize(None)
+    close = pd.Series(history["Close"].to_numpy(dtype=float), index=days.normalize())
+    close = close[~close.index.duplicated(keep="last")].reindex(sessions)
+    if close.isna().all() and not prev_data:
+        raise ValueError("No price history returned.")
+
+    prices = pd.DataFrame(
+        {"close_price": close, "market_cap": close * (total_shares or 0.0)}
+    ).ffill()
+    if prev_data:
+        prices = prices.fillna(
+            {
+                "close_price": prev_data["close_price"],
+                "market_cap": prev_data["market_cap"],
+            }
+        )
+    else:
+        prices = prices.bfill()
+
+    return [
+        {
+            "stock_ticker_id": stock_ticker_id,
+            "date": day,
+            "close_price": close_price,
+            "market_cap": market_cap,
+        }
+        for day, close_price, market_cap in zip(
+            sessions.date,
+            prices["close_price"].tolist(),
+            prices["market_cap"].tolist(),
+        )
+    ]
+
+
+async def upsert_daily_prices(db: AsyncSession, records: list[dict]):
+    """
+    Write price rows in one statement. Re-ingesting a (ticker, date) overwrites
+    the stored close price and market cap instead of adding a duplicate.
+    Every index is marked dirty for the written dates in the same transaction,
+    and the cached price matrix picks the rows up once it commits.
+    """
+    await bulk_upsert(
+        db=db,
+        model=DailyPrices,
+        records=records,
+        index_elements=["stock_ticker_id", "date"],
     )
-    tickers = await fetch_all_tickers(db=db)
-    ticker_ids = [ticker.id for ticker in tickers]
+    stage_price_records(db=db, records=records)
+    await IndexService.mark_dates_dirty(
+        db=db, dates={record["date"] for record in records}
+    )
+
+
+async def load_watermarks(
+    db: AsyncSession, stock_ticker_ids: list[int]
+) -> tuple[dict[int, tuple[date, date]], dict[int, list[tuple[date, date]]]]:
+    """
+    Return the (first_date, last_date) watermark and the known gaps per ticker.
+    """
+    watermark_result = await db.execute(
+        select(PriceWatermark).where(
+            PriceWatermark.stock_ticker_id.in_(stock_ticker_ids)
+        )
+    )
+    watermarks = {
+        watermark.stock_ticker_id: (watermark.first_date, watermark.last_date)
+        for watermark in watermark_result.scalars().all()
+    }
+    gap_result = await db.execute(
+        select(PriceGap)
+        .where(PriceGap.stock_ticker_id.in_(stock_ticker_ids))
+        .order_by(PriceGap.start_date)
+    )
+    gaps: dict[int, list[tuple[date, date]]] = defaultdict(list)
+    for gap in gap_result.scalars().all():
+        gaps[gap.stock_ticker_id].append((gap.start_date, gap.end_date))
+    return watermarks, gaps
+
+
+def missing_ranges(
+    watermark: tuple[date, date] | None,
+    gaps: list[tuple[date, date]],
+    start_date: date,
+    end_date: date,
+    calendar: TradingCalendar | None = None,
+) -> list[tuple[date, date]]:
+    """
+    Date ranges inside `start_date`..`end_date` that are not stored yet: before
+    the first stored date, inside a known gap, or after the last stored date.
+    Ranges without a trading session are left out.
+    """
+    calendar = get_trading_calendar() if calendar is None else calendar
+    if watermark is None:
+        ranges = [(start_date, end_date)]
+    else:
+        ranges = _stored_range_holes(watermark, gaps, start_date, end_date)
+    return [
+        (range_start, range_end)
+        for range_start, range_end in ranges
+        if not calendar.sessions_index(range_start, range_end).empty
+    ]
+
+
+def _stored_range_holes(
+    watermark: tuple[date, date],
+    gaps: list[tuple[date, date]],
+    start_date: date,
+    end_date: date,
+) -> list[tuple[date, date]]:
+    first_date, last_date = watermark
+    ranges: list[tuple[date, date]] = []
+    if start_date < first_date:
+        ranges.append((start_date, min(first_date - timedelta(days=1), end_date)))
+    for gap_start, gap_end in gaps:
+        if gap_start <= end_date and gap_end >= start_date:
+            ranges.append((max(gap_start, start_date), min(gap_end, end_date)))
+    if last_date < end_date:
+        ranges.append((max(last_date + timedelta(days=1), start_date), end_date))
+    return ranges
+
+
+def advance_watermark(
+    watermark: tuple[date, date] | None,
+    gaps: list[tuple[date, date]],
+    range_start: date,
+    range_end: date,
+    last_price_date: date | None,
+    calendar: TradingCalendar | None = None,
+) -> tuple[tuple[date, date], list[tuple[date, date]]]:
+    """
+    Watermark and gaps of a ticker after `range_start`..`range_end` was stored.
+    `last_price_date` is the latest day in the range with a provider price.
+    Holes without a trading session are not recorded as gaps.
+    """
+    calendar = get_trading_calendar() if calendar is None else calendar
+    one_day = timedelta(days=1)
+    if watermark is None:
+        return (range_start, last_price_date or range_start - one_day), []
+
+    first_date, last_date = watermark
+    new_gaps: list[tuple[date, date]] = []
+    for gap_start, gap_end in gaps:
+        if gap_end < range_start or gap_start > range_end:
+            new_gaps.append((gap_start, gap_end))
+            continue
+        if gap_start < range_start:
+            new_gaps.append((gap_start, range_start - one_day))
+        if gap_end > range_end:
+            new_gaps.append((range_end + one_day, gap_end))
+    if range_start > last_date + one_day:
+        new_gaps.append((last_date + one_day, range_start - one_day))
+    if range_end < first_date - one_day:
+        new_gaps.append((range_end + one_day, first_date - one_day))
+
+    new_last_date = max(last_date, last_price_date) if last_price_date else last_date
+    new_gaps = [
+        (gap_start, gap_end)
+        for gap_start, gap_end in new_gaps
+        if not calendar.sessions_index(gap_start, gap_end).empty
+    ]
+    return (min(first_date, range_start), new_last_date), sorted(new_gaps)
+
+
+async def store_watermarks(
+    db: AsyncSession,
+    watermarks: dict[int, tuple[date, date]],
+    gaps: dict[int, list[tuple[date, date]]],
+    stock_ticker_ids: set[int],
+):
+    """
+    Persist the watermark and replace the gaps of `stock_ticker_ids`.
+    """
+    if not stock_ticker_ids:
+        return
+    await bulk_upsert(
+        db=db,
+        model=PriceWatermark,
+        records=[
+            {
+                "stock_ticker_id": stock_ticker_id,
+                "first_date": watermarks[stock_ticker_id][0],
+                "last_date": watermarks[stock_ticker_id][1],
+            }
+            for stock_ticker_id in stock_ticker_ids
+        ],
+        index_elements=["stock_ticker_id"],
+    )
+    await db.execute(
+        delete(PriceGap).where(PriceGap.stock_ticker_id.in_(stock_ticker_ids))
+    )
+    await bulk_upsert(
+        db=db,
+        model=PriceGap,
+        records=[
+            {
+                "stock_ticker_id": stock_ticker_id,
+                "start_date": gap_start,
+                "end_date": gap_end,
+            }
+            for stock_ticker_id in stock_ticker_ids
+            for gap_start, gap_end in gaps.get(stock_ticker_id, [])
+        ],
+        index_elements=["stock_ticker_id", "start_date"],
+    )
+
+
+async def _fetch_prev_prices(
+    db: AsyncSession, stock_ticker_ids: list[int], before_date: date
+) -> dict[int, dict]:
+    """
+    Latest stored row before `before_date` per ticker, looking back at most
+    PREV_PRICE_LOOKBACK. Used to fill the start of a range the provider has no
+    price for.
+    """
+    if not stock_ticker_ids:
+        return {}
     result = await db.execute(
-        select(DailyPrices).where(
-            DailyPrices.stock_ticker_id.in_(ticker_ids), DailyPrices.date == target_date
+        select(
+            DailyPrices.stock_ticker_id,
+            DailyPrices.close_price,
+            DailyPrices.market_cap,
+        )
+        .where(
+            DailyPrices.stock_ticker_id.in_(stock_ticker_ids),
+            DailyPrices.date < before_date,
+            DailyPrices.date >= before_date - PREV_PRICE_LOOKBACK,
+        )
+        .order_by(DailyPrices.date)
+    )
+    # Rows come in date order, so the latest one per ticker wins.
+    return {
+        stock_ticker_id: {"close_price": close_price, "market_cap": market_cap}
+        for stock_ticker_id, close_price, market_cap in result.all()
+    }
+
+
+async def _ingest_work(
+    db: AsyncSession,
+    provider: PriceProvider,
+    work: list[tuple[date, date, list[str]]],
+    ticker_ids: dict[str, int],
+    watermarks: dict[int, tuple[date, date]],
+    gaps: dict[int, list[tuple[date, date]]],
+    concurrency: int,
+    ingestion_result: PriceIngestionResult,
+    checkpoint: Callable[[AsyncSession, int, set[str], int], Awaitable[None]]
+    | None = None,
+) -> set[str]:
+    """
+    Fetch every (range_start, range_end, symbols) item of `work` with at most
+    `concurrency` provider calls in flight. Provider calls run in a worker pool
+    so the event loop stays free; each item is upserted together with its
+    watermarks and fundamentals in one transaction as it completes. `checkpoint`
+    is awaited inside that transaction with the work index, the symbols that
+    failed and the number of rows written. Returns the symbols that failed.
+    """
+    today = datetime.now(tz=UTC).date()
+    cached_shares = await load_fresh_shares_outstanding(
+        db=db, stock_ticker_ids=list(ticker_ids.values()), today=today
+    )
+    shares_outstanding = {
+        symbol: cached_shares[stock_ticker_id]
+        for symbol, stock_ticker_id in ticker_ids.items()
+        if stock_ticker_id in cached_shares
+    }
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    failed_symbols: set[str] = set()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        async def fetch(work_index: int):
+            range_start, range_end, batch = work[work_index]
+            async with semaphore:
+                try:
+                    return work_index, await loop.run_in_executor(
+                        executor,
+                        _fetch_batch_data,
+                        provider,
+                        batch,
+                        range_start,
+                        range_end,
+                        set(shares_outstanding),
+                    )
+                except Exception as e:
+                    return work_index, {symbol: e for symbol in batch}
+
+        for next_completed in asyncio.as_completed(
+            [fetch(work_index) for work_index in range(len(work))]
+        ):
+            work_index, batch_data = await next_completed
+            range_start, range_end, batch = work[work_index]
+            prev_prices = await _fetch_prev_prices(
+                db=db,
+                stock_ticker_ids=[ticker_ids[symbol] for symbol in batch],
+                before_date=range_start,
+            )
+            batch_records: list[dict] = []
+            batch_watermarks: dict[int, tuple[date, date]] = {}
+            batch_gaps: dict[int, list[tuple[date, date]]] = {}
+            batch_fundamentals: dict[int, FundamentalsData] = {}
+            batch_failed: set[str] = set()
+            for symbol in batch:
+                stock_ticker_id = ticker_ids[symbol]
+                data = batch_data[symbol]
+                try:
+                    if isinstance(data, Exception):
+                        raise data
+                    fundamentals, history = data
+                    if fundamentals is not None:
+                        batch_fundamentals[stock_ticker_id] = fundamentals
+                    batch_records.extend(
+                        _build_price_records(
+                            stock_ticker_id=stock_ticker_id,
+                            total_shares=(
+                                fundamentals.shares_outstanding
+                                if fundamentals is not None
+                                else shares_outstanding.get(symbol)
+                            ),
+                            history=history,
+                            start_date=range_start,
+                            end_date=range_end,
+                            prev_data=prev_prices.get(stock_ticker_id),
+                        )
+                    )
+                except Exception as e:
+                    logger.debug(f"Failed to fetch data for ticker {symbol}: {e}")
+                    ingestion_result.failed[symbol] = str(e)
+                    batch_failed.add(symbol)
+                    continue
+                (
+                    batch_watermarks[stock_ticker_id],
+                    batch_gaps[stock_ticker_id],
+                ) = advance_watermark(
+                    watermark=watermarks.get(stock_ticker_id),
+                    gaps=gaps.get(stock_ticker_id, []),
+                    range_start=range_start,
+                    range_end=range_end,
+                    last_price_date=(
+                        history.index.max().date() if not history.empty else None
+                    ),
+                )
+            try:
+                await upsert_daily_prices(db=db, records=batch_records)
+                await store_watermarks(
+                    db=db,
+                    watermarks=batch_watermarks,
+                    gaps=batch_gaps,
+                    stock_ticker_ids=set(batch_watermarks),
+                )
+                await upsert_fundamentals(
+                    db=db, fundamentals=batch_fundamentals, fetched_at=today
+                )
+                if checkpoint is not None:
+                    await checkpoint(db, work_index, batch_failed, len(batch_records))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.debug(f"Failed to store data for tickers {batch}: {e}")
+                for symbol in batch:
+                    if symbol not in batch_failed:
+                        ingestion_result.failed[symbol] = str(e)
+                failed_symbols.update(batch)
+                continue
+            failed_symbols.update(batch_failed)
+            watermarks.update(batch_watermarks)
+            gaps.update(batch_gaps)
+            shares_outstanding.update(
+                {
+                    symbol: batch_fundamentals[ticker_ids[symbol]].shares_outstanding
+                    for symbol in batch
+                    if ticker_ids[symbol] in batch_fundamentals
+                }
+            )
+    return failed_symbols
+
+
+async def fetch_and_store_target_date_data(
+    db: AsyncSession = Depends(get_db),
+    provider: PriceProvider | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    concurrency: int | None = None,
+    batch_size: int | None = None,
+) -> PriceIngestionResult:
+    """
+    Fetch the prices missing between `start_date` and `end_date` (by default the
+    last 30 days). Every ticker asks the provider only for the ranges its
+    watermark says are missing; tickers sharing a range are fetched in batches
+    of `batch_size`, with at most `concurrency` batches in flight.
+    """
+    end_date = datetime.now(tz=UTC).date() if end_date is None else end_date
+    start_date = end_date - timedelta(days=30) if start_date is None else start_date
+    provider = (
+        PriceProviderFactory.get_provider(settings.PRICE_PROVIDER)
+        if provider is None
+        else provider
+    )
+    concurrency = (
+        settings.PRICE_FETCH_CONCURRENCY if concurrency is None else concurrency
+    )
+    batch_size = settings.PRICE_FETCH_BATCH_SIZE if batch_size is None else batch_size
+    if concurrency < 1 or batch_size < 1:
+        raise ValueError("Concurrency and batch size should be at least 1.")
+
+    ticker_ids = {
+        ticker.ticker: ticker.id for ticker in await fetch_all_tickers(db=db)
+    }
+    watermarks, gaps = await load_watermarks(
+        db=db, stock_ticker_ids=list(ticker_ids.values())
+    )
+    ingestion_result = PriceIngestionResult()
+    range_symbols: dict[tuple[date, date], list[str]] = defaultdict(list)
+    for symbol, stock_ticker_id in ticker_ids.items():
+        ranges = missing_ranges(
+            watermark=watermarks.get(stock_ticker_id),
+            gaps=gaps.get(stock_ticker_id, []),
+            start_date=start_date,
+            end_date=end_date,
         )
+        if not ranges:
+            ingestion_result.up_to_date.append(symbol)
+        for missing_range in ranges:
+            range_symbols[missing_range].append(symbol)
+
+    work: list[tuple[date, date, list[str]]] = [
+        (range_start, range_end, symbols[idx : idx + batch_size])
+        for (range_start, range_end), symbols in range_symbols.items()
+        for idx in range(0, len(symbols), batch_size)
+    ]
+    requested_days = sum(
+        ((range_end - range_start).days + 1) * len(batch)
+        for range_start, range_end, batch in work
+    )
+    logger.debug(f"Fetching {requested_days} ticker-days in {len(work)} batches.")
+    failed_symbols = await _ingest_work(
+        db=db,
+        provider=provider,
+        work=work,
+        ticker_ids=ticker_ids,
+        watermarks=watermarks,
+        gaps=gaps,
+        concurrency=concurrency,
+        ingestion_result=ingestion_result,
     )
-    existing_data = result.scalars().all()
-    return len(existing_data) == len(tickers)
+
+    ingestion_result.succeeded = [
+        symbol
+        for symbol in ticker_ids
+        if symbol not in failed_symbols and symbol not in ingestion_result.up_to_date
+    ]
+    logger.debug(
+        f"Price ingestion finished: {len(ingestion_result.succeeded)} succeeded, "
+        f"{len(ingestion_result.failed)} failed, "
+        f"{len(ingestion_result.up_to_date)} up to date."
+    )
+    return ingestion_result
 
 
 async def execute_ticker_price_fetcher(
     db: AsyncSession = Depends(get_db), target_date: date | None = None
 ):
-    end_date = (
-        datetime.now(tz=UTC).date()
+    """
+    Bring every ticker up to date from `target_date` (by default 30 days ago)
+    until today, fetching only the missing ranges.
+    """
+    end_date = datetime.now(tz=UTC).date()
+    start_date = (
+        end_date - timedelta(days=30)
         if target_date is None
         else target_date
     )
-    start_date = end_date - timedelta(days=30)
 
     if start_date > end_date:
         raise ValueError("Start date should be less than end date.")
     if end_date - start_date > timedelta(days=30):
         raise ValueError("30 days is the limit of fetching history.")
-    if not (await check_if_history_data_is_present(db=db, target_date=end_date)):
-        await fetch_and_store_target_date_data(
-            db=db
-        )
+    await fetch_and_store_target_date_data(
+        db=db,
+        provider=PriceProviderFactory.get_provider(settings.PRICE_PROVIDER),
+        start_date=start_date,
+        end_date=end_date,
+    )
+
 
+def plan_backfill_chunks(
+    stock_ticker_ids: list[int],
+    start_date: date,
+    end_date: date,
+    batch_size: int,
+    chunk_days: int,
+) -> list[tuple[list[int], date, date]]:
+    """
+    Split a backfill into (stock ticker ids, start, end) chunks of at most
+    `batch_size` tickers and `chunk_days` days.
+    """
+    windows: list[tuple[date, date]] = []
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=chunk_days - 1), end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return [
+        (stock_ticker_ids[idx : idx + batch_size], window_start, window_end)
+        for window_start, window_end in windows
+        for idx in range(0, len(stock_ticker_ids), batch_size)
+    ]
 
-async def fetch_all_daily_prices(db: AsyncSession) -> list[DailyPriceResponse]:
-    query = select(DailyPrices, StockTicker.ticker).join(
-        StockTicker, StockTicker.id == DailyPrices.stock_ticker_id
+
+async def execute_price_backfill(
+    db: AsyncSession = Depends(get_db),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    task_id: int | None = None,
+    provider: PriceProvider | None = None,
+    concurrency: int | None = None,
+    batch_size: int | None = None,
+    chunk_days: int | None = None,
+) -> PriceBackfillProgress:
+    """
+    Backfill prices for an arbitrary date range. The range is split into
+    ticker x time chunks that are checkpointed against `task_id`; running the
+    same task again only processes the chunks that are not COMPLETED yet.
+    """
+    if start_date is None or end_date is None or task_id is None:
+        raise ValueError("Backfill needs a start date, an end date and a task.")
+    if start_date > end_date:
+        raise ValueError("Start date should be less than end date.")
+    provider = (
+        PriceProviderFactory.get_provider(settings.PRICE_PROVIDER)
+        if provider is None
+        else provider
+    )
+    concurrency = (
+        settings.PRICE_FETCH_CONCURRENCY if concurrency is None else concurrency
     )
-    res = await db.execute(query)
-    result = res.all()
-    response_list = [
-        DailyPriceResponse(
-            id=row[0].id,
-            ticker=row[1],
-            close_price=row[0].close_price,
-            market_cap=row[0].market_cap,
-            date=row[0].date,
+    batch_size = settings.PRICE_FETCH_BATCH_SIZE if batch_size is None else batch_size
+    chunk_days = settings.PRICE_BACKFILL_CHUNK_DAYS if chunk_days is None else chunk_days
+    if concurrency < 1 or batch_size < 1 or chunk_days < 1:
+        raise ValueError("Concurrency, batch size and chunk days should be at least 1.")
+
+    ticker_ids = {
+        ticker.ticker: ticker.id for ticker in await fetch_all_tickers(db=db)
+    }
+    ticker_symbols = {
+        stock_ticker_id: symbol for symbol, stock_ticker_id in ticker_ids.items()
+    }
+    chunk_result = await db.execute(
+        select(PriceBackfillChunk)
+        .where(PriceBackfillChunk.task_id == task_id)
+        .order_by(PriceBackfillChunk.id)
+    )
+    chunks = chunk_result.scalars().all()
+    if not chunks:
+        chunks = [
+            PriceBackfillChunk(
+                task_id=task_id,
+                stock_ticker_ids=chunk_ticker_ids,
+                start_date=chunk_start,
+                end_date=chunk_end,
+                status=TaskStatus.INITIATED,
+                rows_written=0,
+            )
+            for chunk_ticker_ids, chunk_start, chunk_end in plan_backfill_chunks(
+                stock_ticker_ids=sorted(ticker_symbols),
+                start_date=start_date,
+                end_date=end_date,
+                batch_size=batch_size,
+                chunk_days=chunk_days,
+            )
+        ]
+        db.add_all(chunks)
+        await db.commit()
+
+    pending_chunks = [chunk for chunk in chunks if chunk.status != TaskStatus.COMPLETED]
+    pending_chunk_ids = [chunk.id for chunk in pending_chunks]
+    work = [
+        (
+            chunk.start_date,
+            chunk.end_date,
+            [
+                ticker_symbols[stock_ticker_id]
+                for stock_ticker_id in chunk.stock_ticker_ids
+                if stock_ticker_id in ticker_symbols
+            ],
         )
-        for row in result
+        for chunk in pending_chunks
     ]
+    progress = PriceBackfillProgress(
+        total_chunks=len(chunks),
+        completed_chunks=len(chunks) - len(pending_chunks),
+        failed_chunks=0,
+        rows_written=sum(chunk.rows_written for chunk in chunks),
+        rows_per_second=0.0,
+    )
+    logger.debug(
+        f"Backfill task {task_id}: resuming with {len(work)} of "
+        f"{progress.total_chunks} chunks left."
+    )
+    started_at = time.perf_counter()
+    run_rows_written = 0
+
+    async def checkpoint(
+        db: AsyncSession, work_index: int, failed_symbols: set[str], rows_written: int
+    ):
+        nonlocal run_rows_written
+        status = TaskStatus.FAILED if failed_symbols else TaskStatus.COMPLETED
+        await db.execute(
+            update(PriceBackfillChunk)
+            .where(PriceBackfillChunk.id == pending_chunk_ids[work_index])
+            .values(status=status, rows_written=rows_written)
+        )
+        run_rows_written += rows_written
+        progress.rows_written += rows_written
+        if failed_symbols:
+            progress.failed_chunks += 1
+        else:
+            progress.completed_chunks += 1
+        progress.rows_per_second = run_rows_written / max(
+            time.perf_counter() - started_at, 1e-9
+        )
+        remaining_chunks = (
+            progress.total_chunks - progress.completed_chunks - progress.failed_chunks
+        )
+        logger.debug(
+            f"Backfill task {task_id}: {progress.completed_chunks}/"
+            f"{progress.total_chunks} chunks done, {remaining_chunks} remaining, "
+            f"{progress.rows_per_second:.0f} rows/sec."
+        )
+
+    watermarks, gaps = await load_watermarks(
+        db=db, stock_ticker_ids=list(ticker_ids.values())
+    )
+    await _ingest_work(
+        db=db,
+        provider=provider,
+        work=work,
+        ticker_ids=ticker_ids,
+        watermarks=watermarks,
+        gaps=gaps,
+        concurrency=concurrency,
+        ingestion_result=PriceIngestionResult(),
+        checkpoint=checkpoint,
+    )
+
+    if progress.completed_chunks < progress.total_chunks:
+        raise RuntimeError(
+            f"Backfill task {task_id}: "
+            f"{progress.total_chunks - progress.completed_chunks} chunks did not "
+            f"complete; run the task again to resume."
+        )
+    return progress
+
+
+def _daily_prices_query(
+    tickers: list[str] | None, start_date: date | None, end_date: date | None
+):
+    """
+    Prices joined with their ticker symbol in (stock_ticker_id, date) order,
+    which the table's unique key serves, filtered to `tickers` and the dates
+    between `start_date` and `end_date`. Rows hold the `DailyPriceResponse`
+    fields followed by the stock_ticker_id of the sort key.
+    """
+    query = (
+        select(
+            DailyPrices.id,
+            StockTicker.ticker,
+            DailyPrices.close_price,
+            DailyPrices.market_cap,
+            DailyPrices.date,
+            DailyPrices.stock_ticker_id,
+        )
+        .join(StockTicker, StockTicker.id == DailyPrices.stock_ticker_id)
+        .order_by(DailyPrices.stock_ticker_id, DailyPrices.date)
+    )
+    if tickers:
+        query = query.where(StockTicker.ticker.in_(tickers))
+    if start_date is not None:
+        query = query.where(DailyPrices.date >= start_date)
+    if end_date is not None:
+        query = query.where(DailyPrices.date <= end_date)
+    return query
+
 
-    return response_list
+async def fetch_daily_price_rows(
+    db: AsyncSession,
+    tickers: list[str] | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    cursor: str | None = None,
+    limit: int = settings.PAGE_SIZE,
+) -> tuple[list[Row], str | None]:
+    """
+    One page of at most `limit` price rows after `cursor`, seeking on the
+    (stock_ticker_id, date) key of the last row of the previous page, and the
+    cursor of the next page.
+    """
+    query = _daily_prices_query(
+        tickers=tickers, start_date=start_date, end_date=end_date
+    )
+    if cursor is not None:
+        query = query.where(
+            tuple_(DailyPrices.stock_ticker_id, DailyPrices.date)
+            > decode_cursor(cursor, [int, date.fromisoformat])
+        )
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    next_cursor = (
+        encode_cursor((rows[limit - 1].stock_ticker_id, rows[limit - 1].date))
+        if len(rows) > limit
+        else None
+    )
+    return rows[:limit], next_cursor
+
+
+async def stream_daily_prices(
+    db: AsyncSession,
+    tickers: list[str] | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> AsyncIterator[list[Row]]:
+    """
+    Every matching price row, read through a server-side cursor in batches of
+    `settings.STREAM_BATCH_SIZE` rows.
+    """
+    result = await db.stream(
+        _daily_prices_query(
+            tickers=tickers, start_date=start_date, end_date=end_date
+        ).execution_options(yield_per=settings.STREAM_BATCH_SIZE)
+    )
+    async for rows in result.partitions():
+        yield rows
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from price_provider.factory import FixturePriceProvider
+from prices.models import DailyPrices, PriceBackfillChunk
+from prices.services import execute_price_backfill, plan_backfill_chunks
+from stocks.models import StockTicker
+from tasks.enums import TaskStatus, TaskType
+from tasks.models import Tasks
+
+
+class FlakyFixturePriceProvider(FixturePriceProvider):
+    def __init__(self, fail_from: date | None = None):
+        super().__init__()
+        self.fail_from = fail_from
+        self.requests: list[tuple[date, date]] = []
+
+    def fetch_history(self, tickers: list[str], start: date, end: date):
+        self.requests.append((start, end))
+        if self.fail_from and start >= self.fail_from:
+            raise ConnectionError("connection reset")
+        return super().fetch_history(tickers, start, end)
+
+
+def test_plan_backfill_chunks():
+    chunks = plan_backfill_chunks(
+        stock_ticker_ids=[1, 2, 3],
+        start_date=date(2024, 1, 1),
+        end_date=date(2024, 1, 25),
+        batch_size=2,
+        chunk_days=10,
+    )
+
+    assert chunks == [
+        ([1, 2], date(2024, 1, 1), date(2024, 1, 10)),
+        ([3], date(2024, 1, 1), date(2024, 1, 10)),
+        ([1, 2], date(2024, 1, 11), date(2024, 1, 20)),
+        ([3], date(2024, 1, 11), date(2024, 1, 20)),
+        ([1, 2], date(2024, 1, 21), date(2024, 1, 25)),
+        ([3], date(2024, 1, 21), date(2024, 1, 25)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_from_checkpoint(test_db: AsyncSession):
+    for symbol in ["AAPL", "MSFT"]:
+        test_db.add(StockTicker(ticker=symbol, name=symbol, exchange="NASDAQ"))
+    task = Tasks(
+        task_type=TaskType.PRICE_BACKFILL,
+        start_date=date(2023, 1, 1),
+        end_date=date(2023, 12, 31),
+    )
+    test_db.add(task)
+    await test_db.commit()
+    backfill_args = {
+        "db": test_db,
+        "start_date": date(2023, 1, 1),
+        "end_date": date(2023, 12, 31),
+        "task_id": task.id,
+        "chunk_days": 100,
+    }
+
+    with pytest.raises(RuntimeError):
+        await execute_price_backfill(
+            provider=FlakyFixturePriceProvider(fail_from=date(2023, 7, 1)),
+            **backfill_args,
+        )
+    chunks = await test_db.execute(select(PriceBackfillChunk))
+    statuses = [chunk.status for chunk in chunks.scalars().all()]
+    assert statuses.count(TaskStatus.COMPLETED) == 2
+
+    provider = FlakyFixturePriceProvider()
+    progress = await execute_price_backfill(provider=provider, **backfill_args)
+
+    assert sorted(provider.requests) == [
+        (date(2023, 7, 20), date(2023, 10, 27)),
+        (date(2023, 10, 28), date(2023, 12, 31)),
+    ]
+    assert progress.completed_chunks == progress.total_chunks == 4
+    # 2023 had 250 trading sessions.
+    assert progress.rows_written == 2 * 250
+    prices = await test_db.execute(select(DailyPrices))
+    assert len(prices.scalars().all()) == 2 * 250
@@ -0,0 +1,179 @@
+from datetime import date, datetime, timedelta, UTC
+
+import pandas as pd
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from price_provider.factory import FixturePriceProvider
+from prices.models import DailyPrices
+from prices.services import (
+    _build_price_records,
+    advance_watermark,
+    fetch_and_store_target_date_data,
+    missing_ranges,
+)
+from stocks.models import StockTicker
+from trading_calendar.services import get_trading_calendar
+
+
+class FailingFixturePriceProvider(FixturePriceProvider):
+    def fetch_fundamentals(self, ticker: str):
+        if ticker == "FAIL":
+            raise RuntimeError("provider error")
+        return super().fetch_fundamentals(ticker)
+
+
+def test_fixture_provider_is_deterministic():
+    provider = FixturePriceProvider()
+    month = provider.fetch_history(["AAPL"], date(2024, 1, 1), date(2024, 1, 31))
+    week = provider.fetch_history(["AAPL"], date(2024, 1, 8), date(2024, 1, 12))
+
+    assert len(week["AAPL"]) == 5
+    assert month["AAPL"].loc[week["AAPL"].index, "Close"].equals(week["AAPL"]["Close"])
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_store_reports_per_ticker_results(test_db: AsyncSession):
+    for symbol in ["AAPL", "FAIL", "MSFT"]:
+        test_db.add(StockTicker(ticker=symbol, name=symbol, exchange="NASDAQ"))
+    await test_db.commit()
+
+    result = await fetch_and_store_target_date_data(
+        db=test_db, provider=FailingFixturePriceProvider(), concurrency=2, batch_size=2
+    )
+
+    assert sorted(result.succeeded) == ["AAPL", "MSFT"]
+    assert list(result.failed) == ["FAIL"]
+
+    prices = await test_db.execute(select(DailyPrices))
+    stored_ticker_ids = {price.stock_ticker_id for price in prices.scalars().all()}
+    assert len(stored_ticker_ids) == 2
+
+
+@pytest.mark.asyncio
+async def test_reingesting_prices_is_idempotent(test_db: AsyncSession):
+    test_db.add(StockTicker(ticker="AAPL", name="Apple Inc.", exchange="NASDAQ"))
+    await test_db.commit()
+
+    await fetch_and_store_target_date_data(db=test_db, provider=FixturePriceProvider())
+    first_run = await test_db.execute(select(DailyPrices))
+    first_count = len(first_run.scalars().all())
+    await fetch_and_store_target_date_data(db=test_db, provider=FixturePriceProvider())
+    second_run = await test_db.execute(select(DailyPrices))
+
+    today = datetime.now(tz=UTC).date()
+    assert first_count == len(
+        get_trading_calendar().sessions(today - timedelta(days=30), today)
+    )
+    assert len(second_run.scalars().all()) == first_count
+
+
+class RecordingFixturePriceProvider(FixturePriceProvider):
+    def __init__(self):
+        super().__init__()
+        self.requests: list[tuple[tuple[str, ...], date, date]] = []
+
+    def fetch_history(self, tickers: list[str], start: date, end: date):
+        self.requests.append((tuple(tickers), start, end))
+        return super().fetch_history(tickers, start, end)
+
+
+def test_missing_ranges_covers_head_gaps_and_tail():
+    watermark = (date(2024, 1, 10), date(2024, 1, 20))
+    gaps = [(date(2024, 1, 12), date(2024, 1, 14))]
+
+    assert missing_ranges(None, [], date(2024, 1, 1), date(2024, 1, 31)) == [
+        (date(2024, 1, 1), date(2024, 1, 31))
+    ]
+    assert missing_ranges(watermark, gaps, date(2024, 1, 1), date(2024, 1, 25)) == [
+        (date(2024, 1, 1), date(2024, 1, 9)),
+        (date(2024, 1, 12), date(2024, 1, 14)),
+        (date(2024, 1, 21), date(2024, 1, 25)),
+    ]
+    assert missing_ranges(watermark, [], date(2024, 1, 11), date(2024, 1, 20)) == []
+
+
+def test_advance_watermark_records_and_fills_gaps():
+    watermark, gaps = advance_watermark(
+        watermark=(date(2024, 1, 1), date(2024, 1, 10)),
+        gaps=[],
+        range_start=date(2024, 1, 20),
+        range_end=date(2024, 1, 25),
+        last_price_date=date(2024, 1, 24),
+    )
+    assert watermark == (date(2024, 1, 1), date(2024, 1, 24))
+    assert gaps == [(date(2024, 1, 11), date(2024, 1, 19))]
+
+    watermark, gaps = advance_watermark(
+        watermark=watermark,
+        gaps=gaps,
+        range_start=date(2024, 1, 11),
+        range_end=date(2024, 1, 15),
+        last_price_date=date(2024, 1, 15),
+    )
+    assert watermark == (date(2024, 1, 1), date(2024, 1, 24))
+    assert gaps == [(date(2024, 1, 16), date(2024, 1, 19))]
+
+
+@pytest.mark.asyncio
+async def test_incremental_run_fetches_only_missing_days(test_db: AsyncSession):
+    for symbol in ["AAPL", "MSFT"]:
+        test_db.add(StockTicker(ticker=symbol, name=symbol, exchange="NASDAQ"))
+    await test_db.commit()
+    provider = RecordingFixturePriceProvider()
+
+    await fetch_and_store_target_date_data(
+        db=test_db,
+        provider=provider,
+        start_date=date(2024, 1, 1),
+        end_date=date(2024, 1, 31),
+    )
+    result = await fetch_and_store_target_date_data(
+        db=test_db,
+        provider=provider,
+        start_date=date(2024, 1, 2),
+        end_date=date(2024, 2, 1),
+    )
+
+    assert provider.requests == [
+        (("AAPL", "MSFT"), date(2024, 1, 1), date(2024, 1, 31)),
+        (("AAPL", "MSFT"), date(2024, 2, 1), date(2024, 2, 1)),
+    ]
+    assert sorted(result.succeeded) == ["AAPL", "MSFT"]
+    prices = await test_db.execute(select(DailyPrices))
+    # 21 sessions in January 2024 plus February 1st.
+    assert len(prices.scalars().all()) == 2 * 22
+
+
+def test_build_price_records_fills_sessions():
+    history = pd.DataFrame(
+        {"Close": [10.0, 12.0]},
+        index=pd.DatetimeIndex(["2024-01-03", "2024-01-05"]).tz_localize(
+            "America/New_York"
+        ),
+    )
+
+    back_filled = _build_price_records(
+        stock_ticker_id=1,
+        total_shares=2.0,
+        history=history,
+        start_date=date(2024, 1, 2),
+        end_date=date(2024, 1, 6),
+    )
+    seeded = _build_price_records(
+        stock_ticker_id=1,
+        total_shares=2.0,
+        history=history,
+        start_date=date(2024, 1, 2),
+        end_date=date(2024, 1, 6),
+        prev_data={"close_price": 9.0, "market_cap": 18.0},
+    )
+
+    # January 6th is a Saturday.
+    assert [record["date"] for record in back_filled] == [
+        date(2024, 1, day) for day in range(2, 6)
+    ]
+    assert [record["close_price"] for record in back_filled] == [10, 10, 10, 12]
+    assert [record["market_cap"] for record in back_filled] == [20, 20, 20, 24]
+    assert [record["close_price"] for record in seeded] == [9, 10, 10, 12]
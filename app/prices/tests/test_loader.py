@@ -0,0 +1,44 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from prices.loader import load_price_file
+from prices.models import DailyPrices, PriceWatermark
+from stocks.models import StockTicker
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+async def test_load_price_file_in_chunks(test_db: AsyncSession, tmp_path, suffix):
+    test_db.add(StockTicker(ticker="AAPL", name="Apple Inc.", exchange="NASDAQ"))
+    await test_db.commit()
+    prices = pd.DataFrame(
+        {
+            "symbol": ["AAPL", "AAPL", "XXXX", "AAPL"],
+            "date": ["2024-01-02", "2024-01-03", "2024-01-03", "2024-01-04"],
+            "close": [10.0, 11.0, 5.0, 12.0],
+            "market_cap": [100.0, 110.0, 50.0, 120.0],
+        }
+    )
+    file_path = tmp_path / f"prices.{suffix}"
+    if suffix == "csv":
+        prices.to_csv(file_path, index=False)
+    else:
+        prices.to_parquet(file_path, index=False)
+
+    result = await load_price_file(db=test_db, file_path=str(file_path), chunk_size=2)
+
+    assert result.rows_read == 4
+    assert result.rows_written == 3
+    assert result.unknown_symbols == ["XXXX"]
+    stored = await test_db.execute(select(DailyPrices).order_by(DailyPrices.date))
+    assert [row.close_price for row in stored.scalars().all()] == [10.0, 11.0, 12.0]
+    watermark = await test_db.execute(select(PriceWatermark))
+    watermark = watermark.scalar_one()
+    assert (watermark.first_date, watermark.last_date) == (
+        date(2024, 1, 2),
+        date(2024, 1, 4),
+    )
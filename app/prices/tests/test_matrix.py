@@ -0,0 +1,93 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from prices.matrix import PriceMatrix, PriceMatrixCache
+from prices.models import DailyPrices
+
+
+def test_top_n_skips_missing_prices_and_breaks_ties_by_ticker():
+    matrix = PriceMatrix.from_rows(
+        start_date=date(2024, 3, 4),
+        end_date=date(2024, 3, 4),
+        rows=[
+            (date(2024, 3, 4), 4, 1.0, 300.0),
+            (date(2024, 3, 4), 3, 1.0, 200.0),
+            (date(2024, 3, 4), 1, 1.0, 200.0),
+            (date(2024, 3, 4), 2, 1.0, 100.0),
+        ],
+    )
+    matrix.market_cap[0, matrix.ticker_positions[4]] = np.nan
+
+    assert matrix.stock_ticker_ids[matrix.top_n(0, 2)].tolist() == [1, 3]
+    assert matrix.stock_ticker_ids[matrix.top_n(0, 10)].tolist() == [1, 3, 2]
+
+
+def test_apply_adds_dates_and_tickers():
+    matrix = PriceMatrix.from_rows(
+        start_date=date(2024, 3, 1),
+        end_date=date(2024, 3, 31),
+        rows=[(date(2024, 3, 5), 1, 10.0, 100.0)],
+    )
+
+    matrix.apply(
+        [
+            {
+                "stock_ticker_id": 2,
+                "date": date(2024, 3, 4),
+                "close_price": 20.0,
+                "market_cap": 200.0,
+            },
+            {
+                "stock_ticker_id": 1,
+                "date": date(2024, 3, 5),
+                "close_price": 11.0,
+                "market_cap": 110.0,
+            },
+            {
+                "stock_ticker_id": 1,
+                "date": date(2024, 4, 1),
+                "close_price": 12.0,
+                "market_cap": 120.0,
+            },
+        ]
+    )
+
+    assert matrix.dates == [date(2024, 3, 4), date(2024, 3, 5)]
+    assert matrix.stock_ticker_ids.tolist() == [1, 2]
+    np.testing.assert_array_equal(
+        matrix.close, np.array([[np.nan, 20.0], [11.0, np.nan]])
+    )
+
+
+@pytest.mark.asyncio
+async def test_cache_serves_applied_records_without_reloading(test_db: AsyncSession):
+    test_db.add(
+        DailyPrices(
+            stock_ticker_id=1, date=date(2024, 3, 4), close_price=10.0, market_cap=1.0
+        )
+    )
+    await test_db.commit()
+    cache = PriceMatrixCache()
+
+    await cache.get(
+        db=test_db, start_date=date(2024, 3, 1), end_date=date(2024, 3, 31)
+    )
+    cache.apply(
+        [
+            {
+                "stock_ticker_id": 1,
+                "date": date(2024, 3, 5),
+                "close_price": 11.0,
+                "market_cap": 1.1,
+            }
+        ]
+    )
+    matrix = await cache.get(
+        db=test_db, start_date=date(2024, 3, 5), end_date=date(2024, 3, 5)
+    )
+
+    assert matrix.dates == [date(2024, 3, 5)]
+    assert matrix.close.tolist() == [[11.0]]
@@ -0,0 +1,108 @@
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from indexes import paths as index_paths
+from indexes.routers import router as index_router
+from indexes.services import IndexService
+from indexes.tests.test_build import SESSIONS, seed_index
+from pagination import NDJSON_MEDIA_TYPE
+from prices import paths
+from prices.routers import router
+
+
+def client_for(db: AsyncSession) -> httpx.AsyncClient:
+    app = FastAPI()
+    app.include_router(router)
+    app.include_router(index_router)
+    app.dependency_overrides[get_db] = lambda: db
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+@pytest.mark.asyncio
+async def test_prices_are_paged_by_cursor(test_db: AsyncSession):
+    await seed_index(test_db)
+
+    pages = []
+    params = {"ticker": ["AAA", "CCC"], "start_date": SESSIONS[1], "limit": 3}
+    async with client_for(test_db) as client:
+        while True:
+            response = await client.get(paths.base, params=params)
+            assert response.status_code == 200
+            pages.append(response.json())
+            if pages[-1]["next_cursor"] is None:
+                break
+            params["cursor"] = pages[-1]["next_cursor"]
+        invalid = await client.get(paths.base, params={"cursor": "not-a-cursor"})
+
+    assert [len(page["data"]) for page in pages] == [3, 1]
+    rows = [row for page in pages for row in page["data"]]
+    assert [(row["ticker"], row["date"]) for row in rows] == [
+        ("AAA", str(SESSIONS[1])),
+        ("AAA", str(SESSIONS[2])),
+        ("CCC", str(SESSIONS[1])),
+        ("CCC", str(SESSIONS[2])),
+    ]
+    assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_prices_are_streamed_as_ndjson(test_db: AsyncSession):
+    await seed_index(test_db)
+
+    async with client_for(test_db) as client:
+        response = await client.get(
+            paths.base,
+            params={"end_date": SESSIONS[0]},
+            headers={"Accept": NDJSON_MEDIA_TYPE},
+        )
+
+    assert response.headers["content-type"] == NDJSON_MEDIA_TYPE
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["ticker"] for row in rows] == ["AAA", "BBB", "CCC"]
+    assert {row["date"] for row in rows} == {str(SESSIONS[0])}
+
+
+@pytest.mark.asyncio
+async def test_index_memberships_are_filtered_paged_and_streamed(
+    test_db: AsyncSession,
+):
+    ticker_ids = await seed_index(test_db)
+    await IndexService.build_index_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_name="top_2",
+    )
+    url = f"{index_paths.base}{index_paths.stock_ticker_idx}"
+
+    async with client_for(test_db) as client:
+        first = await client.get(url, params={"limit": 2})
+        second = await client.get(
+            url, params={"limit": 2, "cursor": first.json()["next_cursor"]}
+        )
+        # AAA leaves and CCC joins on the last session.
+        before_last = await client.get(url, params={"end_date": SESSIONS[1]})
+        streamed = await client.get(
+            url,
+            params={"ticker": ["AAA", "CCC"], "start_date": SESSIONS[2]},
+            headers={"Accept": NDJSON_MEDIA_TYPE},
+        )
+
+    assert len(first.json()["data"]) == 2
+    assert len(second.json()["data"]) == 1
+    assert second.json()["next_cursor"] is None
+    assert {row["stock_ticker_id"] for row in before_last.json()["data"]} == {
+        ticker_ids["AAA"],
+        ticker_ids["BBB"],
+    }
+    rows = [json.loads(line) for line in streamed.text.splitlines()]
+    assert [
+        (row["stock_ticker_id"], row["valid_from"], row["valid_to"]) for row in rows
+    ] == [(ticker_ids["CCC"], str(SESSIONS[2]), None)]
@@ -0,0 +1,115 @@
+from datetime import date
+from typing import Callable, Hashable
+
+import numpy as np
+
+from indexes.enums import RebalancePolicy
+
+
+class RebalancePolicyFactory:
+    """
+    Factory for handling rebalance policies.
+
+    A policy decides on which dates an index takes a new selection from its
+    strategy. Between rebalances the constituents held since the last one are
+    carried forward, so the strategy only has to be evaluated on the dates
+    returned by `get_rebalance_dates`. Policies return `{date: matrix columns}`
+    for every build date, as the performance calculators take them, and the
+    dates a new selection was taken on.
+    """
+
+    @staticmethod
+    def get_policy(rebalance_policy: RebalancePolicy) -> Callable:
+        """
+        Returns the appropriate rebalance policy function.
+        """
+        policies = {
+            RebalancePolicy.DAILY: RebalancePolicyFactory._scheduled,
+            RebalancePolicy.WEEKLY: RebalancePolicyFactory._scheduled,
+            RebalancePolicy.MONTHLY: RebalancePolicyFactory._scheduled,
+            RebalancePolicy.THRESHOLD: RebalancePolicyFactory._threshold,
+        }
+
+        if rebalance_policy not in policies:
+            raise ValueError(f"Unsupported rebalance policy: {rebalance_policy}")
+
+        return policies[rebalance_policy]
+
+    @staticmethod
+    def get_rebalance_dates(
+        rebalance_policy: RebalancePolicy, dates: list[date], prev_date: date | None
+    ) -> list[date]:
+        """
+        Dates of `dates` the strategy has to be evaluated on: the first date of
+        every calendar period after the period of `prev_date`, the last date
+        constituents were held. Threshold rebalances are decided on every date.
+        """
+        periods: dict[RebalancePolicy, Callable[[date], Hashable]] = {
+            RebalancePolicy.DAILY: lambda period_date: period_date,
+            RebalancePolicy.WEEKLY: lambda period_date: period_date.isocalendar()[:2],
+            RebalancePolicy.MONTHLY: lambda period_date: (
+                period_date.year,
+                period_date.month,
+            ),
+            RebalancePolicy.THRESHOLD: lambda period_date: period_date,
+        }
+
+        if rebalance_policy not in periods:
+            raise ValueError(f"Unsupported rebalance policy: {rebalance_policy}")
+
+        period = periods[rebalance_policy]
+        prev_period = None if prev_date is None else period(prev_date)
+        rebalance_dates: list[date] = []
+        for rebalance_date in dates:
+            if period(rebalance_date) != prev_period:
+                rebalance_dates.append(rebalance_date)
+            prev_period = period(rebalance_date)
+        return rebalance_dates
+
+    @staticmethod
+    def _scheduled(
+        dates: list[date],
+        selections: dict[date, np.ndarray],
+        held: np.ndarray | None,
+        top_n: int,
+        buffer: int,
+    ) -> tuple[dict[date, np.ndarray], list[date]]:
+        """
+        Calendar rebalancing: take the selection on every rebalance date and hold
+        it until the next one.
+        """
+        constituents: dict[date, np.ndarray] = {}
+        rebalanced: list[date] = []
+        for target_date in dates:
+            if target_date in selections:
+                held = selections[target_date]
+                rebalanced.append(target_date)
+            if held is not None:
+                constituents[target_date] = held
+        return constituents, rebalanced
+
+    @staticmethod
+    def _threshold(
+        dates: list[date],
+        selections: dict[date, np.ndarray],
+        held: np.ndarray | None,
+        top_n: int,
+        buffer: int,
+    ) -> tuple[dict[date, np.ndarray], list[date]]:
+        """
+        Buffer rebalancing: keep the held constituents until a non-member ranks
+        within the top `top_n - buffer`, then take that date's selection.
+        """
+        constituents: dict[date, np.ndarray] = {}
+        rebalanced: list[date] = []
+        for target_date in dates:
+            selection = selections.get(target_date)
+            if selection is not None and (
+                held is None
+                or not np.isin(selection[: max(top_n - buffer, 0)], held).all()
+            ):
+                held = selection
+                rebalanced.append(target_date)
+            if held is not None:
+                constituents[target_date] = held
+        return constituents, rebalanced
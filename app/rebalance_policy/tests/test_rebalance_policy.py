@@ -0,0 +1,50 @@
+from datetime import date
+
+import numpy as np
+
+from indexes.enums import RebalancePolicy
+from rebalance_policy.factory import RebalancePolicyFactory
+
+# Thursday 2024-02-29 through Tuesday 2024-03-05.
+DATES = [
+    date(2024, 2, 29),
+    date(2024, 3, 1),
+    date(2024, 3, 4),
+    date(2024, 3, 5),
+]
+
+
+def test_rebalance_dates_follow_calendar_periods():
+    def rebalance_dates(rebalance_policy, prev_date):
+        return RebalancePolicyFactory.get_rebalance_dates(
+            rebalance_policy=rebalance_policy, dates=DATES, prev_date=prev_date
+        )
+
+    assert rebalance_dates(RebalancePolicy.DAILY, date(2024, 2, 28)) == DATES
+    assert rebalance_dates(RebalancePolicy.WEEKLY, date(2024, 2, 28)) == [DATES[2]]
+    assert rebalance_dates(RebalancePolicy.MONTHLY, date(2024, 2, 28)) == [DATES[1]]
+    assert rebalance_dates(RebalancePolicy.MONTHLY, None) == DATES[:2]
+
+
+def test_threshold_rebalances_when_a_non_member_crosses_the_buffer():
+    selections = {
+        DATES[0]: np.array([0, 1, 2]),
+        # Column 3 ranks third, inside the top 3 but outside the top 3 - 1.
+        DATES[1]: np.array([0, 1, 3]),
+        DATES[2]: np.array([3, 0, 1]),
+        DATES[3]: np.array([3, 0, 2]),
+    }
+
+    constituents, rebalanced = RebalancePolicyFactory.get_policy(
+        RebalancePolicy.THRESHOLD
+    )(dates=DATES, selections=selections, held=None, top_n=3, buffer=1)
+
+    assert {
+        target_date: columns.tolist() for target_date, columns in constituents.items()
+    } == {
+        DATES[0]: [0, 1, 2],
+        DATES[1]: [0, 1, 2],
+        DATES[2]: [3, 0, 1],
+        DATES[3]: [3, 0, 1],
+    }
+    assert rebalanced == [DATES[0], DATES[2]]
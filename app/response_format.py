@@ -0,0 +1,156 @@
+import types
+from datetime import date
+from functools import cache
+from typing import Any, get_args, get_origin, Sequence, Union
+
+import msgpack
+import orjson
+import pyarrow as pa
+from fastapi import Request, status
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+MEDIA_TYPES = {
+    JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+    ARROW_STREAM_MEDIA_TYPE: ARROW_STREAM_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/*": JSON_MEDIA_TYPE,
+    "*/*": JSON_MEDIA_TYPE,
+}
+
+ARROW_TYPES = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    date: pa.date32(),
+}
+
+
+def negotiate_media_type(request: Request) -> str:
+    """
+    Preferred media type of the request's Accept header among JSON, Arrow IPC
+    stream and MessagePack, by quality then order. JSON when none of them is
+    accepted.
+    """
+    accepted: list[tuple[float, str]] = []
+    for media_range in request.headers.get("accept", "").split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0 and media_type.lower() in MEDIA_TYPES:
+            accepted.append((quality, MEDIA_TYPES[media_type.lower()]))
+    if not accepted:
+        return JSON_MEDIA_TYPE
+    return max(accepted, key=lambda item: item[0])[1]
+
+
+def negotiated_responses(*media_types: str) -> dict[int | str, dict[str, Any]]:
+    """
+    OpenAPI `responses` of a handler negotiating its body by `Accept`: an
+    Arrow IPC stream, MessagePack and `media_types` on top of the JSON of its
+    response model.
+    """
+    return {
+        status.HTTP_200_OK: {
+            "content": {
+                media_type: {}
+                for media_type in (
+                    ARROW_STREAM_MEDIA_TYPE,
+                    MSGPACK_MEDIA_TYPE,
+                    *media_types,
+                )
+            }
+        }
+    }
+
+
+@cache
+def arrow_schema(model: type[BaseModel]) -> pa.Schema:
+    fields = []
+    for name, field in model.model_fields.items():
+        annotation: Any = field.annotation
+        nullable = False
+        if get_origin(annotation) in (Union, types.UnionType):
+            args = get_args(annotation)
+            annotation = next(arg for arg in args if arg is not type(None))
+            nullable = type(None) in args
+        fields.append(pa.field(name, ARROW_TYPES[annotation], nullable=nullable))
+    return pa.schema(fields)
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+def encode_rows(
+    media_type: str,
+    model: type[BaseModel],
+    rows: Sequence[Sequence],
+    envelope: dict[str, Any] | None = None,
+) -> bytes:
+    """
+    Encode `rows`, tuples starting with the fields of `model` in order, as
+    `media_type` without building a model per row. Trailing values, such as
+    the sort key of a keyset page, are left out.
+
+    JSON and MessagePack bodies are the list of row objects, or `envelope`
+    with the list under "data". Arrow bodies are an IPC stream of one record
+    batch, with `envelope` as schema metadata.
+    """
+    names = list(model.model_fields)
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        schema = arrow_schema(model)
+        if envelope:
+            schema = schema.with_metadata(
+                {
+                    key: str(value)
+                    for key, value in envelope.items()
+                    if value is not None
+                }
+            )
+        columns = list(zip(*rows)) or [()] * len(names)
+        table = pa.Table.from_arrays(
+            [
+                pa.array(values, type=field.type)
+                for field, values in zip(schema, columns)
+            ],
+            schema=schema,
+        )
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    records: Any = [dict(zip(names, row)) for row in rows]
+    if envelope is not None:
+        records = {"data": records, **envelope}
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(records, default=_msgpack_default)
+    return orjson.dumps(records)
+
+
+def rows_response(
+    media_type: str,
+    model: type[BaseModel],
+    rows: Sequence[Sequence],
+    envelope: dict[str, Any] | None = None,
+) -> Response:
+    return Response(
+        content=encode_rows(media_type, model, rows, envelope),
+        media_type=media_type,
+        headers={"Vary": "Accept"},
+    )
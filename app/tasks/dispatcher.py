@@ -1,8 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from indexes.services import execute_index_creator
+from indexes.services import execute_index_creator, execute_index_recompute
 from logger import get_logger
-from prices.services import execute_ticker_price_fetcher
+from prices.services import execute_price_backfill, execute_ticker_price_fetcher
 from stocks.services import execute_ticker_creator
 from tasks.enums import TaskType
 from tasks.models import Tasks
@@ -20,7 +20,21 @@ TASK_EXECUTORS = {
     },
     TaskType.INDEX_CREATOR: {
         "executor": execute_index_creator,
-        "params": ["db", "stock_index_name", "target_date"],
+        "params": [
+            "db",
+            "stock_index_name",
+            "target_date",
+            "start_date",
+            "end_date",
+        ],
+    },
+    TaskType.INDEX_RECOMPUTE: {
+        "executor": execute_index_recompute,
+        "params": ["db"],
+    },
+    TaskType.PRICE_BACKFILL: {
+        "executor": execute_price_backfill,
+        "params": ["db", "start_date", "end_date", "task_id"],
     },
 }
 
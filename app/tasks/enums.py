@@ -12,3 +12,5 @@ class TaskType(StrEnum):
     TICKER_CREATOR: str = "TICKER_CREATOR"
     TICKER_PRICE_FETCHER: str = "TICKER_PRICE_FETCHER"
     INDEX_CREATOR: str = "INDEX_CREATOR"
+    PRICE_BACKFILL: str = "PRICE_BACKFILL"
+    INDEX_RECOMPUTE: str = "INDEX_RECOMPUTE"
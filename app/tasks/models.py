@@ -26,6 +26,10 @@ class Tasks(Base):
         server_default=TaskType.TICKER_CREATOR,
     )
     run_date = sa.Column(sa.Date, nullable=True)
+    start_date = sa.Column(
+        sa.Date, nullable=True, comment="First date of a date range task."
+    )
+    end_date = sa.Column(sa.Date, nullable=True, comment="Last date of a date range task.")
     depends_on = sa.Column(sa.Integer, ForeignKey("tasks.id"), nullable=True)
     created_at = sa.Column(TIMESTAMP, nullable=False, server_default=func.now())
     updated_at = sa.Column(
@@ -1,2 +1,3 @@
 base = "/tasks"
 manual_execution = "/manual_execution"
+backfill = "/backfill"
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -8,7 +8,9 @@ from logger import get_logger
 from tasks import paths
 from tasks.models import Tasks
 from tasks.scheduler import execute_scheduled_tasks
-from tasks.schema import TaskResponse
+from tasks.enums import TaskStatus, TaskType
+from tasks.schema import PriceBackfillRequest, TaskResponse
+from tasks.services import TaskService
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -28,3 +30,24 @@ async def get_tasks(db: AsyncSession = Depends(get_db)) -> list[TaskResponse]:
 @router.get(f"{paths.manual_execution}")
 async def execute_tasks():
     await execute_scheduled_tasks()
+
+
+@router.post(
+    f"{paths.backfill}",
+    status_code=status.HTTP_200_OK,
+)
+async def create_backfill_task(
+    data: PriceBackfillRequest, db: AsyncSession = Depends(get_db)
+) -> TaskResponse:
+    if data.start_date > data.end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start date should be less than end date.",
+        )
+    return await TaskService.create_task(
+        db=db,
+        status=TaskStatus.INITIATED,
+        task_type=TaskType.PRICE_BACKFILL,
+        start_date=data.start_date,
+        end_date=data.end_date,
+    )
@@ -54,8 +54,10 @@ async def execute_scheduled_tasks(db: AsyncSession):
             result = await execute_task_by_type(
                 db=db,
                 task=task,
-                stock_index_name=settings.STOCK_INDEX_NAME,
                 target_date=task.run_date,
+                start_date=task.start_date,
+                end_date=task.end_date,
+                task_id=task.id,
             )
             task.status = TaskStatus.COMPLETED
             await db.commit()
@@ -73,7 +75,10 @@ async def create_startup_tasks(db: AsyncSession):
     Ensures:
       - TICKER_CREATOR task is created.
       - TICKER_PRICE_FETCHER task is created, dependent on TICKER_CREATOR.
-      - INDEX_CREATOR task is created, dependent on TICKER_PRICE_FETCHER.
+      - An INDEX_CREATOR task is created for the whole date range, building
+        every registered index, dependent on TICKER_PRICE_FETCHER.
+      - An INDEX_RECOMPUTE task is created to rebuild index days whose prices
+        changed after they were built, dependent on INDEX_CREATOR.
     """
     await IndexService.create_stock_index(
         db=db,
@@ -131,19 +136,36 @@ async def create_startup_tasks(db: AsyncSession):
             ),
             None,
         )
-    while run_date < end_date:
-        if (
-            TaskType.INDEX_CREATOR not in existing_task_types
-            and ticker_price_fetcher_task
-        ):
-            index_creation_task = Tasks(
-                status=TaskStatus.INITIATED,
-                task_type=TaskType.INDEX_CREATOR,
-                run_date=run_date,
-                depends_on=ticker_price_fetcher_task.id,
-            )
-            db.add(index_creation_task)
-            await db.commit()
-            await db.refresh(index_creation_task)
+    # A single range build covers every trading session of the window.
+    if TaskType.INDEX_CREATOR not in existing_task_types and ticker_price_fetcher_task:
+        index_creation_task = Tasks(
+            status=TaskStatus.INITIATED,
+            task_type=TaskType.INDEX_CREATOR,
+            run_date=run_date,
+            start_date=run_date,
+            end_date=end_date - timedelta(days=1),
+            depends_on=ticker_price_fetcher_task.id,
+        )
+        db.add(index_creation_task)
+        await db.commit()
+        await db.refresh(index_creation_task)
+    else:
+        index_creation_task = next(
+            (
+                task
+                for task in existing_tasks
+                if task.task_type == TaskType.INDEX_CREATOR
+            ),
+            None,
+        )
 
-        run_date = run_date + timedelta(days=1)
+    if TaskType.INDEX_RECOMPUTE not in existing_task_types and index_creation_task:
+        index_recompute_task = Tasks(
+            status=TaskStatus.INITIATED,
+            task_type=TaskType.INDEX_RECOMPUTE,
+            run_date=run_date,
+            depends_on=index_creation_task.id,
+        )
+        db.add(index_recompute_task)
+        await db.commit()
+        await db.refresh(index_recompute_task)
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from pydantic import BaseModel
 
@@ -9,10 +9,17 @@ class TaskResponse(BaseModel):
     id: int
     status: TaskStatus
     task_type: TaskType
-    run_date: datetime
+    run_date: datetime | None = None
+    start_date: date | None = None
+    end_date: date | None = None
     depends_on: int | None = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         orm_mode = True
+
+
+class PriceBackfillRequest(BaseModel):
+    start_date: date
+    end_date: date
@@ -1,3 +1,5 @@
+from datetime import date
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -11,8 +13,8 @@ class TaskService:
         db: AsyncSession,
         status: TaskStatus,
         task_type: TaskType,
-        start_date: str | None = None,
-        end_date: str | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
         depends_on: int | None = None,
     ) -> Tasks:
         """
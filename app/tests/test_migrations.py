@@ -0,0 +1,165 @@
+from datetime import date
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.future import select
+
+from database import ALEMBIC_CONFIG_PATH, Base, upgrade_database
+from indexes.models import CompositionDiff, IndexPerformance, StockIndexMembership
+from prices.models import DailyPrices
+
+
+@pytest.fixture
+async def migrated_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stocks.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade_database)
+    yield engine
+    await engine.dispose()
+
+
+async def query_plan(conn: AsyncConnection, statement) -> str:
+    compiled = statement.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    return "\n".join(row[-1] for row in result.all())
+
+
+@pytest.mark.asyncio
+async def test_migrations_match_models(migrated_engine):
+    async with migrated_engine.connect() as conn:
+        differences = await conn.run_sync(
+            lambda sync_conn: compare_metadata(
+                MigrationContext.configure(sync_conn), Base.metadata
+            )
+        )
+
+    assert differences == []
+
+
+@pytest.mark.asyncio
+async def test_create_all_database_is_stamped_and_upgraded(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stocks.db'}")
+
+    def create_baseline(sync_conn):
+        alembic_config = Config(str(ALEMBIC_CONFIG_PATH))
+        alembic_config.attributes["connection"] = sync_conn
+        command.upgrade(alembic_config, "0001")
+        sync_conn.execute(text("DROP TABLE alembic_version"))
+        sync_conn.execute(
+            text(
+                "INSERT INTO stock_index (id, name, ticker_count) VALUES (1, 'idx', 5)"
+            )
+        )
+        sync_conn.execute(
+            text(
+                "INSERT INTO index_performance (stock_index_id, date, value) "
+                "VALUES (1, '2024-03-04', 25.0), (1, '2024-03-04', 25.0)"
+            )
+        )
+        sync_conn.execute(
+            text(
+                "INSERT INTO stock_ticker (id, ticker, name, exchange) VALUES "
+                "(1, 'AAA', 'AAA', 'NASDAQ'), (2, 'BBB', 'BBB', 'NASDAQ')"
+            )
+        )
+        # AAA leaves on the third built date and comes back on the fourth.
+        sync_conn.execute(
+            text(
+                "INSERT INTO stock_index_ticker (stock_index_id, date, stock_ticker_id) "
+                "VALUES (1, '2024-03-04', 1), (1, '2024-03-05', 1), "
+                "(1, '2024-03-07', 1), (1, '2024-03-04', 2), (1, '2024-03-05', 2), "
+                "(1, '2024-03-06', 2), (1, '2024-03-07', 2)"
+            )
+        )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(create_baseline)
+    async with engine.begin() as conn:
+        await conn.run_sync(upgrade_database)
+    async with engine.connect() as conn:
+        version = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        levels = await conn.execute(text("SELECT COUNT(*) FROM index_performance"))
+        dirty = await conn.execute(text("SELECT stock_index_id FROM index_dirty_date"))
+        memberships = await conn.execute(
+            select(
+                StockIndexMembership.stock_ticker_id,
+                StockIndexMembership.valid_from,
+                StockIndexMembership.valid_to,
+            ).order_by(
+                StockIndexMembership.stock_ticker_id, StockIndexMembership.valid_from
+            )
+        )
+        assert version.scalar_one() == "0007"
+        diffs = await conn.execute(
+            select(
+                CompositionDiff.date,
+                CompositionDiff.added_stock_ticker_ids,
+                CompositionDiff.removed_count,
+            )
+        )
+        assert diffs.all() == [(date(2024, 3, 4), [1, 2], 0)]
+        assert memberships.all() == [
+            (1, date(2024, 3, 4), date(2024, 3, 6)),
+            (1, date(2024, 3, 7), None),
+            (2, date(2024, 3, 4), None),
+        ]
+        assert levels.scalar_one() == 1
+        assert dirty.scalars().all() == [1]
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_use_indexes(migrated_engine):
+    target_date = date(2024, 3, 4).isoformat()
+    async with migrated_engine.connect() as conn:
+        top_n_plan = await query_plan(
+            conn,
+            select(DailyPrices.stock_ticker_id)
+            .where(DailyPrices.date == target_date)
+            .order_by(DailyPrices.market_cap.desc())
+            .limit(5),
+        )
+        price_range_plan = await query_plan(
+            conn,
+            select(
+                DailyPrices.date,
+                DailyPrices.stock_ticker_id,
+                DailyPrices.close_price,
+                DailyPrices.market_cap,
+            )
+            .where(DailyPrices.date >= target_date)
+            .where(DailyPrices.date <= target_date),
+        )
+        composition_plan = await query_plan(
+            conn,
+            select(StockIndexMembership.stock_ticker_id)
+            .where(StockIndexMembership.stock_index_id == 1)
+            .where(StockIndexMembership.valid_from <= target_date),
+        )
+        composition_change_plan = await query_plan(
+            conn,
+            select(CompositionDiff.date, CompositionDiff.added_count)
+            .where(CompositionDiff.stock_index_id == 1)
+            .where(CompositionDiff.date >= target_date)
+            .where(CompositionDiff.date < target_date),
+        )
+        performance_plan = await query_plan(
+            conn,
+            select(IndexPerformance.date, IndexPerformance.value)
+            .where(IndexPerformance.stock_index_id == 1)
+            .where(IndexPerformance.date >= target_date)
+            .where(IndexPerformance.date <= target_date),
+        )
+
+    assert "ix_daily_prices_all_date_market_cap" in top_n_plan
+    assert "TEMP B-TREE" not in top_n_plan
+    assert "ix_daily_prices_all_date_market_cap" in price_range_plan
+    assert "ix_stock_index_membership_stock_index_id_valid_from" in composition_plan
+    assert "sqlite_autoindex_composition_diff" in composition_change_plan
+    assert "sqlite_autoindex_index_performance" in performance_plan
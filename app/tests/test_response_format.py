@@ -0,0 +1,177 @@
+from datetime import date
+
+import httpx
+import msgpack
+import orjson
+import pyarrow as pa
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from database import get_db
+from indexes import paths as index_paths
+from indexes.routers import router as index_router
+from indexes.schema import StockIndexResponse
+from indexes.services import IndexService, settings
+from indexes.tests.test_build import SESSIONS, seed_index
+from pagination import NDJSON_MEDIA_TYPE
+from prices import paths
+from prices.routers import router
+from response_format import (
+    ARROW_STREAM_MEDIA_TYPE,
+    encode_rows,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    negotiate_media_type,
+)
+
+ROWS = [
+    (1, 1, 10, date(2024, 3, 4), date(2024, 3, 6), "sort key"),
+    (2, 1, 11, date(2024, 3, 6), None, "sort key"),
+]
+
+
+def request_accepting(accept: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+@pytest.mark.parametrize(
+    "accept, media_type",
+    [
+        ("", JSON_MEDIA_TYPE),
+        ("text/html", JSON_MEDIA_TYPE),
+        ("application/x-msgpack", MSGPACK_MEDIA_TYPE),
+        (
+            f"{MSGPACK_MEDIA_TYPE};q=0.5, {ARROW_STREAM_MEDIA_TYPE}",
+            ARROW_STREAM_MEDIA_TYPE,
+        ),
+        (f"{ARROW_STREAM_MEDIA_TYPE};q=0, */*", JSON_MEDIA_TYPE),
+    ],
+)
+def test_media_type_is_negotiated_from_accept(accept: str, media_type: str):
+    assert negotiate_media_type(request_accepting(accept)) == media_type
+
+
+def test_rows_encode_to_the_same_records_in_every_format():
+    envelope = {"next_cursor": "abc"}
+    records = [
+        {
+            "id": 1,
+            "stock_index_id": 1,
+            "stock_ticker_id": 10,
+            "valid_from": "2024-03-04",
+            "valid_to": "2024-03-06",
+        },
+        {
+            "id": 2,
+            "stock_index_id": 1,
+            "stock_ticker_id": 11,
+            "valid_from": "2024-03-06",
+            "valid_to": None,
+        },
+    ]
+
+    as_json = encode_rows(JSON_MEDIA_TYPE, StockIndexResponse, ROWS, envelope)
+    as_msgpack = encode_rows(MSGPACK_MEDIA_TYPE, StockIndexResponse, ROWS, envelope)
+    as_arrow = encode_rows(ARROW_STREAM_MEDIA_TYPE, StockIndexResponse, ROWS, envelope)
+    table = pa.ipc.open_stream(as_arrow).read_all()
+
+    assert orjson.loads(as_json) == {"data": records, "next_cursor": "abc"}
+    assert msgpack.unpackb(as_msgpack) == {"data": records, "next_cursor": "abc"}
+    assert table.schema.metadata == {b"next_cursor": b"abc"}
+    assert table.schema.field("valid_to").nullable
+    assert table.to_pylist() == [
+        dict(zip(StockIndexResponse.model_fields, row)) for row in ROWS
+    ]
+
+
+def test_empty_rows_keep_the_arrow_schema():
+    table = pa.ipc.open_stream(
+        encode_rows(ARROW_STREAM_MEDIA_TYPE, StockIndexResponse, [])
+    ).read_all()
+
+    assert table.num_rows == 0
+    assert table.schema.field("valid_from").type == pa.date32()
+
+
+def test_negotiated_formats_are_documented():
+    app = FastAPI()
+    app.include_router(router)
+    app.include_router(index_router)
+
+    openapi_paths = app.openapi()["paths"]
+    prices_content = openapi_paths[paths.base]["get"]["responses"]["200"]["content"]
+    performance_content = openapi_paths[
+        f"{index_paths.base}{index_paths.performance}"
+    ]["get"]["responses"]["200"]["content"]
+
+    assert prices_content.keys() == {
+        JSON_MEDIA_TYPE,
+        ARROW_STREAM_MEDIA_TYPE,
+        MSGPACK_MEDIA_TYPE,
+        NDJSON_MEDIA_TYPE,
+    }
+    assert prices_content[JSON_MEDIA_TYPE]["schema"] == {
+        "$ref": "#/components/schemas/DailyPricePage"
+    }
+    assert performance_content.keys() == {
+        JSON_MEDIA_TYPE,
+        ARROW_STREAM_MEDIA_TYPE,
+        MSGPACK_MEDIA_TYPE,
+    }
+
+
+@pytest.mark.asyncio
+async def test_read_endpoints_negotiate_their_format(
+    test_db: AsyncSession, monkeypatch
+):
+    monkeypatch.setattr(settings, "STOCK_INDEX_NAME", "top_2")
+    await seed_index(test_db)
+    await IndexService.build_index_range(
+        db=test_db,
+        start_date=SESSIONS[0],
+        end_date=SESSIONS[-1],
+        stock_index_name="top_2",
+    )
+    app = FastAPI()
+    app.include_router(router)
+    app.include_router(index_router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    performance_url = f"{index_paths.base}{index_paths.performance}"
+    params = {"start_date": SESSIONS[0], "end_date": SESSIONS[-1]}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        as_json = await client.get(performance_url, params=params)
+        as_arrow = await client.get(
+            performance_url,
+            params=params,
+            headers={"Accept": ARROW_STREAM_MEDIA_TYPE},
+        )
+        summary = await client.get(
+            f"{index_paths.base}{index_paths.summary}", params=params
+        )
+        prices = await client.get(
+            paths.base,
+            params={"ticker": "BBB", "limit": 2},
+            headers={"Accept": MSGPACK_MEDIA_TYPE},
+        )
+
+    assert as_arrow.headers["content-type"] == ARROW_STREAM_MEDIA_TYPE
+    assert as_arrow.headers["Vary"] == "Accept"
+    assert as_arrow.headers["ETag"] != as_json.headers["ETag"]
+    table = pa.ipc.open_stream(as_arrow.content).read_all()
+    assert table.column_names == ["date", "index_value"]
+    assert table.to_pylist() == [
+        {"date": date.fromisoformat(row["date"]), "index_value": row["index_value"]}
+        for row in as_json.json()
+    ]
+    # Summaries are JSON whatever the Accept header, so they do not vary on it.
+    assert summary.headers["content-type"] == JSON_MEDIA_TYPE
+    assert "Vary" not in summary.headers
+    assert prices.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    page = msgpack.unpackb(prices.content)
+    assert [row["date"] for row in page["data"]] == [str(day) for day in SESSIONS[:2]]
+    assert page["next_cursor"] is not None
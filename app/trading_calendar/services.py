@@ -0,0 +1,133 @@
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Callable
+
+import pandas as pd
+from dateutil.easter import easter
+
+from config import get_settings
+from stocks.enums import StockExchanges
+
+settings = get_settings()
+
+MONDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = 0, 3, 4, 5, 6
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    The `n`-th `weekday` of a month; a negative `n` counts from the month end.
+    """
+    if n > 0:
+        first_day = date(year, month, 1)
+        return first_day + timedelta(days=(weekday - first_day.weekday()) % 7 + 7 * (n - 1))
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last_day = next_month - timedelta(days=1)
+    return last_day - timedelta(days=(last_day.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+
+def _observed(holiday: date) -> date:
+    """
+    Saturday holidays are observed on Friday, Sunday holidays on Monday.
+    """
+    if holiday.weekday() == SATURDAY:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == SUNDAY:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+# One-off full-day closures that no rule covers.
+US_SPECIAL_CLOSURES = {
+    date(2001, 9, 11),
+    date(2001, 9, 12),
+    date(2001, 9, 13),
+    date(2001, 9, 14),
+    date(2004, 6, 11),
+    date(2007, 1, 2),
+    date(2012, 10, 29),
+    date(2012, 10, 30),
+    date(2018, 12, 5),
+    date(2025, 1, 9),
+}
+
+
+def us_equity_holidays(year: int) -> set[date]:
+    """
+    Full-day NYSE/NASDAQ holidays of a year.
+    """
+    holidays = {
+        _nth_weekday(year, 1, MONDAY, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, MONDAY, 3),  # Washington's Birthday
+        easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, MONDAY, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, MONDAY, 1),  # Labor Day
+        _nth_weekday(year, 11, THURSDAY, 4),  # Thanksgiving Day
+        _observed(date(year, 12, 25)),  # Christmas Day
+    }
+    # A Saturday New Year's Day is not observed on the Friday before.
+    new_years_day = date(year, 1, 1)
+    if new_years_day.weekday() != SATURDAY:
+        holidays.add(_observed(new_years_day))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    holidays.update(closure for closure in US_SPECIAL_CLOSURES if closure.year == year)
+    return holidays
+
+
+class TradingCalendar:
+    """
+    Trading sessions of an exchange: weekdays that are not exchange holidays.
+    """
+
+    def __init__(self, holiday_rule: Callable[[int], set[date]]):
+        self.holiday_rule = holiday_rule
+        self._holidays: dict[int, set[date]] = {}
+
+    def holidays(self, year: int) -> set[date]:
+        if year not in self._holidays:
+            self._holidays[year] = self.holiday_rule(year)
+        return self._holidays[year]
+
+    def is_session(self, day: date) -> bool:
+        return day.weekday() < SATURDAY and day not in self.holidays(day.year)
+
+    def sessions_index(self, start_date: date, end_date: date) -> pd.DatetimeIndex:
+        """
+        Sessions between `start_date` and `end_date` (both inclusive).
+        """
+        holidays = [
+            holiday
+            for year in range(start_date.year, end_date.year + 1)
+            for holiday in self.holidays(year)
+        ]
+        return pd.bdate_range(start=start_date, end=end_date, freq="C", holidays=holidays)
+
+    def sessions(self, start_date: date, end_date: date) -> list[date]:
+        return list(self.sessions_index(start_date, end_date).date)
+
+    def previous_session(self, day: date) -> date:
+        """
+        The session a non-trading date resolves to: the last session on or
+        before `day`.
+        """
+        while not self.is_session(day):
+            day = day - timedelta(days=1)
+        return day
+
+
+# Only exchanges with a holiday rule have a calendar. A weekdays-only stand-in
+# would turn every holiday into a session, and ingestion would fill it with
+# carried-forward prices. NSE holidays follow lunar dates that no rule here
+# covers, so it is left unsupported until a holiday source is added.
+TRADING_CALENDARS: dict[str, Callable[[int], set[date]]] = {
+    StockExchanges.NASDAQ: us_equity_holidays,
+}
+
+
+@lru_cache()
+def get_trading_calendar(exchange: str | None = None) -> TradingCalendar:
+    exchange = settings.TRADING_CALENDAR_EXCHANGE if exchange is None else exchange
+    if exchange not in TRADING_CALENDARS:
+        raise ValueError(f"Unsupported trading calendar exchange: {exchange}")
+    return TradingCalendar(holiday_rule=TRADING_CALENDARS[exchange])
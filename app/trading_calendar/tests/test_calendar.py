@@ -0,0 +1,41 @@
+from datetime import date
+
+import pytest
+
+from trading_calendar.services import get_trading_calendar, us_equity_holidays
+
+
+def test_us_equity_holidays():
+    assert us_equity_holidays(2024) == {
+        date(2024, 1, 1),
+        date(2024, 1, 15),
+        date(2024, 2, 19),
+        date(2024, 3, 29),
+        date(2024, 5, 27),
+        date(2024, 6, 19),
+        date(2024, 7, 4),
+        date(2024, 9, 2),
+        date(2024, 11, 28),
+        date(2024, 12, 25),
+    }
+    # New Year's Day 2022 fell on a Saturday and was not observed on Friday.
+    assert date(2021, 12, 31) not in us_equity_holidays(2021)
+    assert date(2022, 1, 1) not in us_equity_holidays(2022)
+    # Independence Day 2026 falls on a Saturday and is observed on Friday.
+    assert date(2026, 7, 3) in us_equity_holidays(2026)
+
+
+def test_sessions_and_as_of_resolution():
+    calendar = get_trading_calendar("NASDAQ")
+
+    assert len(calendar.sessions(date(2024, 1, 1), date(2024, 12, 31))) == 252
+    assert calendar.is_session(date(2024, 7, 5))
+    assert not calendar.is_session(date(2024, 7, 6))
+    # Saturday and Sunday resolve to Friday; Monday July 4th 2022 to July 1st.
+    assert calendar.previous_session(date(2024, 7, 7)) == date(2024, 7, 5)
+    assert calendar.previous_session(date(2022, 7, 4)) == date(2022, 7, 1)
+
+
+def test_exchanges_without_holiday_rules_are_unsupported():
+    with pytest.raises(ValueError, match="Unsupported trading calendar"):
+        get_trading_calendar("NSE")